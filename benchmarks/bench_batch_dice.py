@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+批量骰子基准测试
+
+对比逐次掷骰（random.randint ×6 + 组合枚举 + 爆掉判定）与批量实现
+（(N, 6) 骰子矩阵 + 广播分组求和 + 掩码判定）每秒能处理的掷骰次数，并校验两者的掩码一致。
+每次掷骰落在一个随机局面上（3 个临时标记位于随机的三列）。
+
+用法:
+    python benchmarks/bench_batch_dice.py [--turns 1000000] [--scalar-turns 100000] [--chunk 65536]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import batch_dice
+from src.core.batch_dice import bust_flags, column_bit, reach_masks, roll_batch, roll_mask
+from src.models.game_models import DiceRoll, MIN_COLUMN, MAX_COLUMN
+
+# 所有"三个标记位于不同列且都可推进"的局面掩码
+BOARD_MASKS = [
+    column_bit(a) | column_bit(b) | column_bit(c)
+    for a, b, c in combinations(range(MIN_COLUMN, MAX_COLUMN + 1), 3)
+]
+
+
+def bench_scalar(turns: int, seed: int) -> tuple:
+    """逐次掷骰，返回 (掷骰/秒, 爆掉率)"""
+    rng = random.Random(seed)
+    busts = 0
+    start = time.perf_counter()
+    for _ in range(turns):
+        results = [rng.randint(1, 6) for _ in range(6)]
+        mask = 0
+        for first, second in DiceRoll(results).get_possible_combinations():
+            mask |= column_bit(first) | column_bit(second)
+        if mask & rng.choice(BOARD_MASKS) == 0:
+            busts += 1
+    elapsed = time.perf_counter() - start
+    return turns / elapsed, busts / turns
+
+
+def bench_batch(turns: int, chunk: int, seed: int) -> tuple:
+    """批量掷骰，返回 (掷骰/秒, 爆掉率)"""
+    if batch_dice.HAS_NUMPY:
+        np = batch_dice.np
+        rng = np.random.default_rng(seed)
+        boards = np.array(BOARD_MASKS, dtype=np.uint32)
+    else:
+        rng = random.Random(seed)
+
+    busts = 0
+    done = 0
+    start = time.perf_counter()
+    while done < turns:
+        count = min(chunk, turns - done)
+        masks = reach_masks(roll_batch(count, rng))
+        if batch_dice.HAS_NUMPY:
+            busts += int(bust_flags(masks, boards[rng.integers(0, len(boards), size=count)]).sum())
+        else:
+            busts += sum(bust_flags(masks, rng.choices(BOARD_MASKS, k=count)))
+        done += count
+    elapsed = time.perf_counter() - start
+    return turns / elapsed, busts / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量骰子基准测试")
+    parser.add_argument("--turns", type=int, default=1_000_000, help="批量实现的掷骰次数")
+    parser.add_argument("--scalar-turns", type=int, default=100_000, help="逐次实现的掷骰次数（较慢）")
+    parser.add_argument("--chunk", type=int, default=65536, help="每批掷骰次数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # 校验：批量掩码与逐次掩码一致
+    sample = roll_batch(10000, batch_dice.np.random.default_rng(args.seed) if batch_dice.HAS_NUMPY
+                        else random.Random(args.seed))
+    batch = [int(mask) for mask in reach_masks(sample)]
+    if batch_dice.HAS_NUMPY:
+        sample = sample.tolist()
+    scalar = [roll_mask(r) for r in sample]
+    if batch != scalar:
+        print("[ERROR] 批量掩码与逐次结果不一致")
+        sys.exit(1)
+
+    backend = "NumPy" if batch_dice.HAS_NUMPY else "纯 Python（未安装 NumPy）"
+    print(f"批量后端: {backend}")
+    print(f"{'实现':<8} {'掷骰次数':>10} {'掷骰/秒':>14} {'爆掉率':>8}")
+    rate, bust = bench_scalar(args.scalar_turns, args.seed)
+    print(f"{'逐次':<8} {args.scalar_turns:>10} {rate:>14,.0f} {bust:>8.2%}")
+    batch_rate, bust = bench_batch(args.turns, args.chunk, args.seed)
+    print(f"{'批量':<8} {args.turns:>10} {batch_rate:>14,.0f} {bust:>8.2%}")
+    print(f"加速比: {batch_rate / rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+内容包冷启动基准测试
+
+在全新的解释器进程中重放启动时的内容读取（ConfigManager 读取全部配置、
+遭遇、陷阱插件、陷阱/遭遇位置配置、成就配置），分别测量：
+- 直接读取: 各加载器各自 open + json.load
+- 内容包:   一次读取编译缓存，之后从内存返回
+
+用法:
+    python benchmarks/bench_content_pack.py [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.core.content_pack import ContentPack
+
+# 启动时各加载器读取的文件（ConfigManager 读取全部，其余加载器再各读一次）
+STARTUP_READS = [
+    "config/encounters.json",
+    "config/trap_plugins.json",
+    "config/trap_config.json",
+    "config/encounter_config.json",
+    "config/achievements.json",
+    "config/achievements.json",
+]
+
+# 实际启动时这些标准库早已被其他模块导入，不计入内容读取耗时
+PRELUDE = "import json, os, sys, time, typing\n"
+
+DIRECT_SCRIPT = PRELUDE + """
+start = time.perf_counter()
+paths = [os.path.join("config", n) for n in sorted(os.listdir("config")) if n.endswith(".json")]
+for path in paths + {reads!r}:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+    except Exception:
+        pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+PACK_SCRIPT = PRELUDE + """
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from src.core.content_pack import load_json_config
+paths = [os.path.join("config", n) for n in sorted(os.listdir("config")) if n.endswith(".json")]
+for path in paths + {reads!r}:
+    try:
+        load_json_config(path)
+    except Exception:
+        pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run(script: str, runs: int) -> float:
+    """在新进程中执行脚本，返回耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内容包冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=20, help="每种方式启动的进程数")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    pack = ContentPack().load(force=True)
+    print(f"编译: {pack.stats.load_ms:.2f} ms（{pack.stats.sources} 个内容源）")
+
+    direct = run(DIRECT_SCRIPT.format(reads=STARTUP_READS), args.runs)
+    cached = run(PACK_SCRIPT.format(root=ROOT, reads=STARTUP_READS), args.runs)
+
+    print(f"直接读取: {direct:8.2f} ms")
+    print(f"内容包:   {cached:8.2f} ms")
+    print(f"加速比:   {direct / cached:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
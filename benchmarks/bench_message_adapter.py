@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+QQ消息适配器基准测试
+
+对典型的状态、排行榜、掷骰和帮助回复测量 QQMessageAdapter.adapt_message 的吞吐量，
+分别覆盖默认样式、无emoji样式和紧凑样式。
+
+用法:
+    python benchmarks/bench_message_adapter.py [--iterations 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bots.adapters.qq_message_adapter import QQMessageAdapter, MessageStyle
+
+
+def _leaderboard_reply(rows: int = 10) -> str:
+    message = "排行榜\n" + "-" * 40 + "\n"
+    message += f"{'排名':<4} {'玩家':<10} {'阵营':<8} {'积分':<6} {'登顶':<4}\n"
+    message += "-" * 40 + "\n"
+    for i in range(1, rows + 1):
+        message += f"{i}. {'玩家' + str(i):<10} {'收养人':<8} {1000 - i * 37:<6} {i % 3:<4}\n"
+    return message
+
+
+STATUS_REPLY = (
+    "🎲 掷骰结果：骰点: 3 5 2 6 1 4\n"
+    "积分-10，剩余积分：230\n\n\n"
+    "当前位置：第7列-位置3、第10列-位置5；剩余可放置标记：1\n"
+    "当前永久棋子位置：第3列-已登顶、第8列-进度4、第12列-进度2\n"
+    "已登顶棋子数：1/3\n"
+    + "=" * 50 + "\n"
+    "⚠️ 注意：第10列前方有陷阱"
+)
+
+REPLIES = {
+    "status": (STATUS_REPLY, "game"),
+    "dice": (STATUS_REPLY, "dice_result"),
+    "leaderboard": (_leaderboard_reply(), "leaderboard"),
+    "long_status": ("\n".join([STATUS_REPLY] * 8), "game"),
+}
+
+STYLES = {
+    "default": MessageStyle(),
+    "no_emoji": MessageStyle(use_emoji=False),
+    "compact": MessageStyle(max_length=500, compact_mode=True),
+}
+
+
+def bench(adapter: QQMessageAdapter, text: str, message_type: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        adapter.adapt_message(text, "10001", message_type)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QQ消息适配器基准测试")
+    parser.add_argument("--iterations", type=int, default=20000, help="每项迭代次数")
+    args = parser.parse_args()
+
+    print(f"{'样式':<10} {'回复':<12} {'μs/条':>10} {'条/秒':>12}")
+    for style_name, style in STYLES.items():
+        adapter = QQMessageAdapter(style)
+        for reply_name, (text, message_type) in REPLIES.items():
+            elapsed = bench(adapter, text, message_type, args.iterations)
+            print(f"{style_name:<10} {reply_name:<12} "
+                  f"{elapsed / args.iterations * 1e6:>10.2f} {args.iterations / elapsed:>12,.0f}")
+
+    adapter = QQMessageAdapter()
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        adapter.format_help_message()
+    elapsed = time.perf_counter() - start
+    print(f"{'default':<10} {'help':<12} "
+          f"{elapsed / args.iterations * 1e6:>10.2f} {args.iterations / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+群消息预过滤基准测试
+
+在模拟的真实群聊语料上对比旧版逐个关键词 in 检查与预编译过滤器的吞吐量，
+并校验两者的判定结果（新过滤器额外识别指令路由的精确指令）。
+
+用法:
+    python benchmarks/bench_message_filter.py [--messages 200000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bots.utils.message_filter import GameMessageFilter, GAME_KEYWORDS, CHOICE_KEYWORDS
+
+# 普通群聊（与机器人无关）
+CHATTER = [
+    "哈哈哈哈哈哈", "草", "今天吃什么", "有人打游戏吗", "晚安", "早上好呀各位",
+    "这个画得太好了吧！！", "[图片]", "我去上班了", "下班了下班了", "?", "？？？",
+    "刚刚那个是谁的号", "明天几点集合", "救命我还没写完作业", "你们看昨天的直播了吗",
+    "笑死我了这个表情包", "求问这个怎么画阴影", "收到", "好的好的", "+1", "确实",
+    "等我一下马上来", "这周末有空吗要不要一起出去玩", "在吗", "晚上有活动吗",
+    "https://www.bilibili.com/video/BV1xx411c7mD", "我觉得还行吧，就是有点贵",
+    "周末一起去看展吗，听说新开的美术馆很不错，门票也不贵", "太困了", "冲冲冲",
+    "谁有这个角色的设定图啊，想参考一下服装的细节", "这期活动奖励是什么来着",
+    "你们用什么软件画画的？我一直在用procreate", "稍等，我找一下之前的聊天记录",
+]
+
+# 游戏指令与选择回复
+COMMANDS = [
+    "轮次开始", ".r6d6", "8,13", "7", " 10 , 12 ", "替换永久棋子", "查看当前进度",
+    "数列7登顶", "1. 好呀好呀", "道具商店", "购买丑喵玩偶", "使用后悔券", "排行榜",
+    "打卡完毕", "摸摸猫", "吓死我了", "好", "不了", "继续前进", "领取草图奖励1",
+]
+
+
+def legacy_should_respond(text: str) -> bool:
+    """旧版实现（逐个关键词 in 检查 + 三个未预编译的正则）"""
+    game_keywords = list(GAME_KEYWORDS)
+    if re.match(r'^\s*\d+\s*(,\s*\d+)?\s*$', text.strip()):
+        return True
+    if re.match(r'^数列\d+登顶$', text.strip()):
+        return True
+    if re.match(r'^\s*\d+\.\s*.+', text.strip()):
+        return True
+    choice_keywords = list(CHOICE_KEYWORDS)
+    if any(keyword in text for keyword in game_keywords):
+        return True
+    if len(text.strip()) <= 20:
+        return any(keyword in text for keyword in choice_keywords)
+    return False
+
+
+def build_corpus(count: int, command_ratio: float, seed: int):
+    """生成群聊语料：大部分为普通聊天，少量为游戏指令"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        if rng.random() < command_ratio:
+            corpus.append(rng.choice(COMMANDS))
+        else:
+            line = rng.choice(CHATTER)
+            if rng.random() < 0.2:
+                line = line + rng.choice(CHATTER)
+            corpus.append(line)
+    return corpus
+
+
+def load_router_commands():
+    """读取指令路由的精确指令（依赖缺失时退化为空集）"""
+    try:
+        from src.services.message_processor import MessageProcessor
+        return list(MessageProcessor().command_handlers.keys())
+    except Exception as e:
+        print(f"[WARN] 无法加载指令路由词汇，仅使用关键词表: {e}")
+        return []
+
+
+def timed(func, corpus):
+    start = time.perf_counter()
+    hits = sum(1 for text in corpus if func(text))
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="群消息预过滤基准测试")
+    parser.add_argument("--messages", type=int, default=200000, help="语料消息数")
+    parser.add_argument("--command-ratio", type=float, default=0.05, help="游戏指令占比")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.command_ratio, args.seed)
+    message_filter = GameMessageFilter(commands=load_router_commands())
+
+    # 校验：旧版响应的消息新过滤器必须也响应
+    missed = [t for t in set(corpus) if legacy_should_respond(t) and not message_filter.should_respond(t)]
+    if missed:
+        print(f"[ERROR] 新过滤器漏判 {len(missed)} 条: {missed[:5]}")
+        sys.exit(1)
+
+    legacy_time, legacy_hits = timed(legacy_should_respond, corpus)
+    new_time, new_hits = timed(message_filter.should_respond, corpus)
+
+    print(f"语料: {len(corpus)} 条消息（指令占比 {args.command_ratio:.0%}）")
+    print(f"旧版:   {legacy_time * 1000:8.1f} ms  {len(corpus) / legacy_time:12,.0f} 条/秒  响应 {legacy_hits} 条")
+    print(f"预编译: {new_time * 1000:8.1f} ms  {len(corpus) / new_time:12,.0f} 条/秒  响应 {new_hits} 条")
+    print(f"加速比: {legacy_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
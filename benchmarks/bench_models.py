@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+核心数据模型基准测试
+
+对比旧版普通 dataclass 模型（字典进度 + 集合 + 每次调用新建 MapConfig）
+与 slots/数组实现的单玩家内存占用和构造耗时，并校验骰子组合结果一致。
+
+用法:
+    python benchmarks/bench_models.py [--players 20000]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.game_models import DiceRoll, Faction, GameSession, Player
+
+
+# ==================== 旧版实现 ====================
+
+@dataclass
+class LegacyMapConfig:
+    COLUMN_LENGTHS: Dict[int, int] = field(default_factory=lambda: {
+        3: 3, 4: 4, 5: 5, 6: 6, 7: 7, 8: 8,
+        9: 9, 10: 10, 11: 10, 12: 9, 13: 8,
+        14: 7, 15: 6, 16: 5, 17: 4, 18: 3
+    })
+
+    def get_column_length(self, column: int) -> int:
+        return self.COLUMN_LENGTHS.get(column, 0)
+
+    def is_valid_column(self, column: int) -> bool:
+        return column in self.COLUMN_LENGTHS
+
+
+@dataclass
+class LegacyPlayerProgress:
+    permanent_progress: Dict[int, int] = field(default_factory=dict)
+    completed_columns: Set[int] = field(default_factory=set)
+
+    def set_progress(self, column: int, progress: int):
+        if not LegacyMapConfig().is_valid_column(column):
+            raise ValueError(f"无效的列号: {column}")
+        max_length = LegacyMapConfig().get_column_length(column)
+        if progress >= max_length:
+            self.completed_columns.add(column)
+            self.permanent_progress[column] = max_length
+        else:
+            self.permanent_progress[column] = max(0, progress)
+
+    def is_winner(self) -> bool:
+        return len(self.completed_columns) >= 3
+
+
+@dataclass
+class LegacyPlayer:
+    player_id: str
+    username: str
+    faction: Faction
+    current_score: int = 0
+    total_score: int = 0
+    games_played: int = 0
+    games_won: int = 0
+    total_dice_rolls: int = 0
+    total_turns: int = 0
+    progress: LegacyPlayerProgress = field(default_factory=LegacyPlayerProgress)
+    inventory: List[str] = field(default_factory=list)
+    achievements: Set[str] = field(default_factory=set)
+    is_active: bool = True
+    created_at: datetime = field(default_factory=datetime.now)
+    last_active: datetime = field(default_factory=datetime.now)
+
+
+def legacy_combinations(results: List[int]):
+    combinations = []
+    used = set()
+    for i in range(6):
+        for j in range(i + 1, 6):
+            for k in range(j + 1, 6):
+                group1 = [i, j, k]
+                group2 = [x for x in range(6) if x not in group1]
+                sum1 = sum(results[idx] for idx in group1)
+                sum2 = sum(results[idx] for idx in group2)
+                if 3 <= sum1 <= 18 and 3 <= sum2 <= 18:
+                    combo = tuple(sorted([sum1, sum2]))
+                    if combo not in used:
+                        combinations.append(combo)
+                        used.add(combo)
+    return sorted(combinations)
+
+
+# ==================== 测量 ====================
+
+# 典型玩家：6 列有进度，其中 2 列登顶
+PROGRESS = [(3, 3), (7, 4), (8, 2), (10, 10), (12, 5), (15, 1)]
+
+
+def build_players(player_cls, count: int):
+    players = []
+    for i in range(count):
+        player = player_cls(str(i), f"玩家{i}", Faction.ADOPTER)
+        for column, progress in PROGRESS:
+            player.progress.set_progress(column, progress)
+        players.append(player)
+    return players
+
+
+def measure(player_cls, count: int):
+    """返回 (字节/玩家, μs/玩家)，计时与内存分别测量以免 tracemalloc 影响计时"""
+    start = time.perf_counter()
+    players = build_players(player_cls, count)
+    elapsed = time.perf_counter() - start
+    assert all(not p.progress.is_winner() for p in players)
+    del players
+
+    tracemalloc.start()
+    players = build_players(player_cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / count, elapsed / count * 1e6
+
+
+def bench_combinations(func, rolls) -> float:
+    start = time.perf_counter()
+    for roll in rolls:
+        func(roll)
+    return (time.perf_counter() - start) / len(rolls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心数据模型基准测试")
+    parser.add_argument("--players", type=int, default=20000, help="构造的玩家数")
+    args = parser.parse_args()
+
+    # 校验：全部 6^6 种骰子结果的组合与旧版一致
+    rolls = [list(r) for r in itertools.product(range(1, 7), repeat=6)]
+    mismatched = [r for r in rolls if DiceRoll(r).get_possible_combinations() != legacy_combinations(r)]
+    if mismatched:
+        print(f"[ERROR] 组合结果不一致: {mismatched[:3]}")
+        sys.exit(1)
+
+    print(f"{'实现':<8} {'字节/玩家':>10} {'μs/玩家':>10}")
+    for name, cls in (("旧版", LegacyPlayer), ("slots", Player)):
+        per_player, per_build = measure(cls, args.players)
+        print(f"{name:<8} {per_player:>10.0f} {per_build:>10.2f}")
+
+    sample = rolls[::7]
+    legacy = bench_combinations(legacy_combinations, sample)
+    new = bench_combinations(lambda r: DiceRoll(r).get_possible_combinations(), sample)
+    print(f"骰子组合: 旧版 {legacy:.2f} μs，新版（含 DiceRoll 构造）{new:.2f} μs")
+
+    tracemalloc.start()
+    sessions = [GameSession(f"s{i}", str(i)) for i in range(args.players)]
+    print(f"GameSession: {tracemalloc.get_traced_memory()[0] / len(sessions):.0f} 字节/会话")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
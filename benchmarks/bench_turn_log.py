@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+会话事件日志基准测试
+
+用 GameEngine 驱动一个单人会话进行 --turns 轮（每轮掷骰、移动到爆掉或走满 --steps 步后停止，
+获胜后清空进度继续），事件写入内存存储，然后测量：
+    记录开销  每条事件的编码 + 补丁计算耗时
+    重建耗时  从最近快照回放到最新状态 / 任意位置，目标 < 10ms
+    全量回放  不写周期快照（只有首条快照）时回放到最新状态的耗时，作为对比
+并校验重建结果与引擎中的会话一致。
+
+用法:
+    python benchmarks/bench_turn_log.py [--turns 500] [--steps 3] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.batch_dice import DiceStream
+from src.core.game_engine import GameEngine
+from src.core.turn_log import MemoryTurnLogStore, TurnLog, STATE_SIZE, encode_state
+from src.models.game_models import Faction, Player, PlayerProgress, TurnState
+
+PLAYER_ID = "bench_player"
+
+
+def play_session(engine: GameEngine, turns: int, steps: int, seed: int) -> str:
+    """驱动一个会话进行 turns 轮，返回会话ID"""
+    rng = random.Random(seed)
+    player = engine.create_player(PLAYER_ID, PLAYER_ID, Faction.ADOPTER)
+    player.current_score = 10 ** 9
+    session = engine.create_game_session(PLAYER_ID)
+    session_id = session.session_id
+
+    for _ in range(turns):
+        for _ in range(steps):
+            dice = engine.roll_dice(session_id)
+            moves = []
+            for first, second in dice.get_possible_combinations():
+                for move in ([first, second], [first], [second]):
+                    if engine.can_move_markers(session_id, move)[0]:
+                        moves.append(move)
+            if not moves:
+                # 爆掉：丢失临时进度，完成打卡
+                session.clear_temporary_markers()
+                break
+            engine.move_markers(session_id, rng.choice(moves))
+            for column in list(session.pending_summit_columns):
+                engine.confirm_summit(session_id, column)
+        else:
+            engine.end_turn_actively(session_id)
+
+        if session.turn_state != TurnState.WAITING_FOR_CHECKIN:
+            session.needs_checkin = True
+            session.turn_state = TurnState.WAITING_FOR_CHECKIN
+        engine.complete_checkin(session_id)
+        if player.progress.is_winner():
+            player.progress = PlayerProgress()
+    return session_id
+
+
+def bench_rebuild(turn_log: TurnLog, session_id: str, seqs: list, repeat: int = 5) -> float:
+    """回放到每个 seq 的平均耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for seq in seqs:
+            turn_log.rebuild(session_id, seq)
+        best = min(best, (time.perf_counter() - start) / len(seqs))
+    return best * 1000
+
+
+def run(turns: int, steps: int, seed: int, snapshot_interval: int):
+    engine = GameEngine()
+    engine.reload_events_on_move = False
+    engine.map_events = {}
+    engine.dice_source = DiceStream(seed)
+    store = MemoryTurnLogStore()
+    turn_log = TurnLog(store, snapshot_interval=snapshot_interval)
+    engine.set_turn_log(turn_log)
+
+    start = time.perf_counter()
+    # 引擎的登顶提示直接打印，基准测试中丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        session_id = play_session(engine, turns, steps, seed)
+    elapsed = time.perf_counter() - start
+    turn_log.flush()
+    return engine, turn_log, store, session_id, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话事件日志基准测试")
+    parser.add_argument("--turns", type=int, default=500, help="会话轮数")
+    parser.add_argument("--steps", type=int, default=3, help="每轮最多掷骰次数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine, turn_log, store, session_id, elapsed = run(args.turns, args.steps, args.seed, 64)
+    events = store.events[session_id]
+    last_seq = events[-1].seq
+    patch_bytes = sum(len(e.patch) for e in events)
+
+    # 校验：重建结果与引擎中的会话一致
+    session = engine.get_game_session(session_id)
+    replay = turn_log.rebuild(session_id)
+    expected = encode_state(session, engine.get_player(PLAYER_ID))
+    rebuilt = Player(PLAYER_ID, PLAYER_ID, Faction.ADOPTER,
+                     current_score=replay.current_score, progress=replay.progress)
+    if encode_state(replay.session, rebuilt) != expected or replay.seq != last_seq:
+        print("[ERROR] 重建结果与会话当前状态不一致")
+        sys.exit(1)
+
+    # 回放到任意位置：每条事件都校验可解码
+    for seq in range(1, last_seq + 1):
+        turn_log.rebuild(session_id, seq)
+
+    rng = random.Random(args.seed)
+    sample = [rng.randint(1, last_seq) for _ in range(200)]
+
+    print(f"会话: {args.turns} 轮, {last_seq} 条事件, {len(store.snapshots[session_id])} 个快照")
+    print(f"状态记录: {STATE_SIZE} 字节, 平均补丁: {patch_bytes / len(events):.1f} 字节")
+    print(f"驱动会话（含记录）: {elapsed * 1000:.0f} ms")
+
+    print(f"{'回放方式':<18} {'到最新 (ms)':>12} {'到任意位置 (ms)':>16}")
+    latest = bench_rebuild(turn_log, session_id, [last_seq])
+    anywhere = bench_rebuild(turn_log, session_id, sample)
+    print(f"{'快照 + 补丁':<18} {latest:>12.3f} {anywhere:>16.3f}")
+
+    _, full_log, _, full_id, _ = run(args.turns, args.steps, args.seed, 0)
+    full_latest = bench_rebuild(full_log, full_id, [last_seq])
+    full_anywhere = bench_rebuild(full_log, full_id, sample)
+    print(f"{'全量回放':<18} {full_latest:>12.3f} {full_anywhere:>16.3f}")
+
+    # 记录开销：不经过引擎，单独测编码 + 补丁
+    player = engine.get_player(PLAYER_ID)
+    probe = TurnLog(MemoryTurnLogStore())
+    count = 20000
+    start = time.perf_counter()
+    for i in range(count):
+        session.rng_counter += 1
+        probe.record(session, player, "roll")
+    per_event = (time.perf_counter() - start) / count * 1e6
+    print(f"记录开销: {per_event:.1f} us/事件")
+
+    if latest >= 10:
+        print("[WARN] 重建到最新状态超过 10ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+对比两次 suite.py 的结果，标出超过阈值的性能回退
+
+按用例比较所选指标（默认中位数），变慢超过 --threshold 记为回退，
+有回退时退出码为 1，可直接用于 CI。
+
+用法:
+    python benchmarks/compare.py baseline.json current.json [--threshold 0.10] [--metric median]
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float, metric: str) -> list:
+    """返回 [(用例, 基线, 当前, 变化率, 状态)]，缺失的值为 None"""
+    rows = []
+    base_results = baseline.get("results", {})
+    current_results = current.get("results", {})
+    for name in list(base_results) + [n for n in current_results if n not in base_results]:
+        base = base_results.get(name, {}).get(metric)
+        value = current_results.get(name, {}).get(metric)
+        if base is None and value is None:
+            rows.append((name, None, None, None, "skipped"))
+        elif base is None:
+            rows.append((name, None, value, None, "new"))
+        elif value is None:
+            rows.append((name, base, None, None, "missing"))
+        else:
+            change = (value - base) / base if base else 0.0
+            if change > threshold:
+                status = "REGRESSION"
+            elif change < -threshold:
+                status = "faster"
+            else:
+                status = "ok"
+            rows.append((name, base, value, change, status))
+    return rows
+
+
+def _fmt(value) -> str:
+    return f"{value:,.2f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比基准测试结果")
+    parser.add_argument("baseline", help="基线结果 JSON")
+    parser.add_argument("current", help="当前结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回退阈值（相对变化，默认 10%%）")
+    parser.add_argument("--metric", default="median", choices=("median", "min", "mean"))
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    rows = compare(baseline, current, args.threshold, args.metric)
+
+    print(f"基线: {baseline.get('meta', {}).get('commit')}  当前: {current.get('meta', {}).get('commit')}  "
+          f"指标: {args.metric}  阈值: {args.threshold:.0%}")
+    print(f"{'用例':<44} {'基线 (us)':>14} {'当前 (us)':>14} {'变化':>8}  状态")
+    for name, base, value, change, status in rows:
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(f"{name:<44} {_fmt(base):>14} {_fmt(value):>14} {change_text:>8}  {status}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n[ERROR] {len(regressions)} 个用例回退超过 {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n没有超过阈值的回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+录制流量回放 - 用本地假 OneBot v11 服务端对机器人做端到端压测
+
+不需要真实 QQ 账号：脚本扮演 Lagrange.OneBot，把录制的群消息按原始时间间隔
+（除以 --speed 倍速）推送给机器人，并以固定数据应答机器人的 API 调用：
+    get_login_info / send_group_msg / send_private_msg / send_msg / delete_msg
+    get_group_list / get_group_info / get_group_member_list / get_group_member_info
+其余动作返回 retcode 1404。
+
+两种连接方式：
+    ws    正向 WebSocket，机器人（LagrangeBot / CantStopGameBot）连接到本服务端，
+          事件和 API 应答走同一连接
+    http  QQBot 方式：事件 POST 到机器人的回调地址，机器人通过 HTTP 调用本服务端的 /<action>
+
+流量来源：
+    *.log    机器人日志，解析 CantStopGameBot 的 "[MSG] 群 ... | 昵称(QQ): 内容" 和
+             "[PRIVATE] 昵称(QQ): 内容" 行（带时间戳）；没有这类行时退而解析
+             LagrangeBot 打印的 "📩 群 ..." / "💬 私聊 | ..." 行（无时间戳，按 --interval 间隔）
+    *.jsonl  每行一个 OneBot 消息事件（按 time 字段计算间隔），或
+             {"offset": 秒, "group_id": 群号, "user_id": QQ, "nickname": 昵称, "text": 内容}
+    --synthetic N  内置的 N 条合成游戏指令（泊松到达，--rate 条/秒）
+
+端到端延迟从推送事件到收到 @ 该用户（私聊为发给该用户）的第一条回复为止。
+只有预过滤器认为需要响应的群消息和所有私聊消息计入应答统计；回复中出现
+机器人的系统错误提示、回调被拒绝（HTTP 503）或推送失败记为错误。
+
+--bot lagrange / qq 时在本进程内启动机器人，使用临时 SQLite 数据库，不会写入正式数据；
+--bot none 时只启动假服务端，由外部启动的机器人连接（ws）或接收回调（http，--bot-url）。
+
+用法:
+    python benchmarks/replay_onebot.py logs/lagrange_game_bot.log --bot lagrange --speed 10
+    python benchmarks/replay_onebot.py capture.jsonl --bot qq --speed 0
+    python benchmarks/replay_onebot.py --synthetic 2000 --rate 50 --bot lagrange
+    python benchmarks/replay_onebot.py capture.jsonl --bot none --mode ws --port 8080
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_REPORT = os.path.join("cache", "benchmarks", "replay.json")
+SELF_ID = 10000
+
+# 机器人的系统错误提示（游戏规则层面的拒绝不算错误）
+ERROR_MARKERS = ("处理指令时发生错误", "处理指令失败", "指令处理失败", "处理消息时发生错误")
+
+
+# ==================== 流量来源 ====================
+
+@dataclass
+class ReplayMessage:
+    """一条待回放的消息（group_id 为 None 表示私聊）"""
+    offset: float
+    user_id: int
+    nickname: str
+    text: str
+    group_id: Optional[int] = None
+
+
+_LOG_TIME = r"(?P<ts>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3})"
+_LOG_GROUP = re.compile(_LOG_TIME + r" - .*?\[MSG\] 群 (?P<group>\d+) \| (?P<nick>.*)\((?P<uid>\d+)\): (?P<text>.*)$")
+_LOG_PRIVATE = re.compile(_LOG_TIME + r" - .*?\[PRIVATE\] (?P<nick>.*)\((?P<uid>\d+)\): (?P<text>.*)$")
+_PRINT_GROUP = re.compile(r"📩 群 (?P<group>\d+) \| (?P<nick>.*)\((?P<uid>\d+)\): (?P<text>.*)$")
+_PRINT_PRIVATE = re.compile(r"💬 私聊 \| (?P<nick>.*)\((?P<uid>\d+)\): (?P<text>.*)$")
+
+
+def parse_log(path: str, interval: float = 1.0) -> List[ReplayMessage]:
+    """解析机器人日志中的入站消息"""
+    logged, printed = [], []
+    first = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            match = _LOG_GROUP.search(line) or _LOG_PRIVATE.search(line)
+            if match:
+                ts = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S,%f")
+                first = first or ts
+                group = match.groupdict().get("group")
+                logged.append(ReplayMessage((ts - first).total_seconds(), int(match["uid"]), match["nick"],
+                                            match["text"], int(group) if group else None))
+                continue
+            match = _PRINT_GROUP.search(line) or _PRINT_PRIVATE.search(line)
+            if match:
+                group = match.groupdict().get("group")
+                printed.append(ReplayMessage(len(printed) * interval, int(match["uid"]), match["nick"],
+                                             match["text"], int(group) if group else None))
+    # 同一条消息两种格式都会出现，优先使用带时间戳的日志行
+    return logged or printed
+
+
+def _segments_text(message) -> str:
+    if isinstance(message, str):
+        return re.sub(r"\[CQ:.*?\]", "", message).strip()
+    return "".join(seg.get("data", {}).get("text", "") for seg in message
+                   if isinstance(seg, dict) and seg.get("type") == "text").strip()
+
+
+def parse_jsonl(path: str) -> List[ReplayMessage]:
+    """解析 JSONL 录制（OneBot 消息事件或简化记录）"""
+    messages = []
+    first = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if "post_type" in data:
+                if data.get("post_type") != "message":
+                    continue
+                first = data.get("time", 0) if first is None else first
+                group = data.get("group_id") if data.get("message_type") == "group" else None
+                messages.append(ReplayMessage(
+                    float(data.get("time", 0) - first), int(data["user_id"]),
+                    data.get("sender", {}).get("nickname", ""),
+                    _segments_text(data.get("message") or data.get("raw_message", "")), group))
+            else:
+                messages.append(ReplayMessage(
+                    float(data.get("offset", 0)), int(data["user_id"]), data.get("nickname", ""),
+                    data["text"], data.get("group_id")))
+    messages.sort(key=lambda m: m.offset)
+    return messages
+
+
+# 合成流量：每名玩家按顺序循环的一轮指令
+_SYNTHETIC_TURN = ("轮次开始", ".r6d6", "{a},{b}", ".r6d6", "{a},{b}", "替换永久棋子", "打卡完毕",
+                   "查看当前进度", "排行榜", "道具商店")
+
+
+def synthetic_traffic(count: int, users: int = 50, groups: int = 3, rate: float = 20.0,
+                      seed: int = 0) -> List[ReplayMessage]:
+    """生成 count 条合成群指令，泊松到达，平均 rate 条/秒"""
+    rng = random.Random(seed)
+    cursors = [0] * users
+    offset = 0.0
+    messages = []
+    for _ in range(count):
+        user = rng.randrange(users)
+        text = _SYNTHETIC_TURN[cursors[user] % len(_SYNTHETIC_TURN)]
+        cursors[user] += 1
+        if "{a}" in text:
+            text = text.format(a=rng.randint(3, 18), b=rng.randint(3, 18))
+        messages.append(ReplayMessage(offset, 20000 + user, f"回放玩家{user}", text,
+                                      900000 + user % groups))
+        offset += rng.expovariate(rate) if rate > 0 else 0.0
+    return messages
+
+
+def load_messages(args) -> List[ReplayMessage]:
+    if args.synthetic:
+        return synthetic_traffic(args.synthetic, args.users, args.groups, args.rate, args.seed)
+    if not args.source:
+        raise SystemExit("需要指定流量来源（日志 / JSONL）或 --synthetic")
+    if args.source.endswith(".jsonl"):
+        return parse_jsonl(args.source)
+    return parse_log(args.source, args.interval)
+
+
+# ==================== 应答统计 ====================
+
+def _reply_users(message) -> List[int]:
+    """群回复中被 @ 的用户"""
+    if isinstance(message, str):
+        return [int(qq) for qq in re.findall(r"\[CQ:at,qq=(\d+)\]", message)]
+    users = []
+    for seg in message or []:
+        if isinstance(seg, dict) and seg.get("type") == "at":
+            qq = str(seg.get("data", {}).get("qq", ""))
+            if qq.isdigit():
+                users.append(int(qq))
+    return users
+
+
+@dataclass
+class LatencyTracker:
+    """按 (群, 用户) 把回复与推送的消息按先后配对"""
+    pending: Dict[Tuple[Optional[int], int], Deque[float]] = field(default_factory=lambda: defaultdict(deque))
+    latencies: List[float] = field(default_factory=list)
+    pushed: int = 0
+    expected: int = 0
+    errors: int = 0
+    rejected: int = 0
+    unmatched_replies: int = 0
+    replies: int = 0
+    api_calls: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    first_push: Optional[float] = None
+    last_reply: Optional[float] = None
+
+    def on_push(self, message: ReplayMessage, expect_reply: bool) -> Optional[float]:
+        """记录推送，需要应答时返回推送时刻"""
+        now = time.perf_counter()
+        self.first_push = self.first_push or now
+        self.pushed += 1
+        if not expect_reply:
+            return None
+        self.expected += 1
+        self.pending[(message.group_id, message.user_id)].append(now)
+        return now
+
+    def on_rejected(self, message: ReplayMessage, pushed_at: Optional[float]):
+        """推送失败的消息不再等待回复"""
+        self.rejected += 1
+        queue = self.pending.get((message.group_id, message.user_id))
+        if pushed_at is not None and queue and pushed_at in queue:
+            queue.remove(pushed_at)
+
+    def on_reply(self, group_id: Optional[int], users: List[int], message):
+        now = time.perf_counter()
+        self.replies += 1
+        if any(marker in _segments_text(message) for marker in ERROR_MARKERS):
+            self.errors += 1
+        matched = False
+        for user_id in users:
+            queue = self.pending.get((group_id, user_id))
+            if queue:
+                self.latencies.append(now - queue.popleft())
+                self.last_reply = now
+                matched = True
+        if not matched:
+            self.unmatched_replies += 1
+
+    def outstanding(self) -> int:
+        return sum(len(q) for q in self.pending.values())
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        span = (self.last_reply - self.first_push) if self.last_reply and self.first_push else 0.0
+        failures = self.errors + self.rejected + self.outstanding()
+        return {
+            "pushed": self.pushed,
+            "expected_replies": self.expected,
+            "answered": len(latencies),
+            "unanswered": self.outstanding(),
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "unmatched_replies": self.unmatched_replies,
+            "error_rate": failures / self.expected if self.expected else 0.0,
+            "duration_s": duration,
+            "offered_rate": self.pushed / duration if duration else 0.0,
+            "throughput": len(latencies) / span if span else 0.0,
+            "latency_ms": {
+                "p50": percentile(50), "p90": percentile(90), "p95": percentile(95),
+                "p99": percentile(99), "max": latencies[-1] * 1000 if latencies else None,
+                "mean": statistics.fmean(latencies) * 1000 if latencies else None,
+            },
+            "api_calls": dict(self.api_calls),
+        }
+
+
+# ==================== 假 OneBot 服务端 ====================
+
+class FakeOneBot:
+    """以固定数据应答 OneBot v11 API，发送类动作交给统计"""
+
+    def __init__(self, tracker: LatencyTracker, messages: List[ReplayMessage], api_latency: float = 0.0):
+        self.tracker = tracker
+        self.api_latency = api_latency
+        self.message_ids = itertools.count(1)
+        self.members: Dict[int, Dict[int, str]] = defaultdict(dict)
+        for message in messages:
+            if message.group_id is not None:
+                self.members[message.group_id][message.user_id] = message.nickname
+
+    def _member(self, group_id: int, user_id: int) -> Dict[str, Any]:
+        nickname = self.members.get(group_id, {}).get(user_id, f"用户{user_id}")
+        return {"group_id": group_id, "user_id": user_id, "nickname": nickname, "card": "", "role": "member"}
+
+    async def call(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.tracker.api_calls[action] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+        if action == "send_msg":
+            action = "send_group_msg" if params.get("message_type") == "group" or "group_id" in params \
+                else "send_private_msg"
+        if action == "send_group_msg":
+            group_id = int(params["group_id"])
+            self.tracker.on_reply(group_id, _reply_users(params.get("message")), params.get("message"))
+            data = {"message_id": next(self.message_ids)}
+        elif action == "send_private_msg":
+            self.tracker.on_reply(None, [int(params["user_id"])], params.get("message"))
+            data = {"message_id": next(self.message_ids)}
+        elif action == "get_login_info":
+            data = {"user_id": SELF_ID, "nickname": "回放机器人"}
+        elif action == "delete_msg":
+            data = None
+        elif action == "get_group_list":
+            data = [{"group_id": g, "group_name": f"群{g}", "member_count": len(m)}
+                    for g, m in self.members.items()]
+        elif action == "get_group_info":
+            group_id = int(params["group_id"])
+            data = {"group_id": group_id, "group_name": f"群{group_id}",
+                    "member_count": len(self.members.get(group_id, {}))}
+        elif action == "get_group_member_list":
+            group_id = int(params["group_id"])
+            data = [self._member(group_id, user_id) for user_id in self.members.get(group_id, {})]
+        elif action == "get_group_member_info":
+            data = self._member(int(params["group_id"]), int(params["user_id"]))
+        else:
+            return {"status": "failed", "retcode": 1404, "data": None, "wording": f"不支持的动作: {action}"}
+        return {"status": "ok", "retcode": 0, "data": data}
+
+
+def make_event(message: ReplayMessage, message_id: int, segments: bool) -> Dict[str, Any]:
+    """构造 OneBot v11 消息事件（segments 为 False 时消息为字符串格式）"""
+    text = message.text
+    event = {
+        "time": int(time.time()),
+        "self_id": SELF_ID,
+        "post_type": "message",
+        "message_id": message_id,
+        "user_id": message.user_id,
+        "message": [{"type": "text", "data": {"text": text}}] if segments else text,
+        "raw_message": text,
+        "font": 0,
+        "sender": {"user_id": message.user_id, "nickname": message.nickname, "card": "", "role": "member"},
+    }
+    if message.group_id is not None:
+        event.update(message_type="group", sub_type="normal", group_id=message.group_id)
+    else:
+        event.update(message_type="private", sub_type="friend")
+    return event
+
+
+class WebSocketTransport:
+    """正向 WebSocket：等待机器人连接，事件与 API 应答共用连接"""
+
+    def __init__(self, server: FakeOneBot, host: str, port: int):
+        self.server = server
+        self.host = host
+        self.port = port
+        self.connected = asyncio.Event()
+        self.connection = None
+        self._listener = None
+
+    async def _handle(self, connection, *_):
+        self.connection = connection
+        self.connected.set()
+        async for frame in connection:
+            request = json.loads(frame)
+            asyncio.create_task(self._respond(connection, request))
+
+    async def _respond(self, connection, request):
+        response = await self.server.call(request.get("action", ""), request.get("params") or {})
+        if "echo" in request:
+            response["echo"] = request["echo"]
+        await connection.send(json.dumps(response, ensure_ascii=False))
+
+    async def start(self):
+        try:
+            from websockets.asyncio.server import serve
+        except ImportError:
+            from websockets import serve
+        self._listener = await serve(self._handle, self.host, self.port)
+
+    async def push(self, event: Dict[str, Any]) -> bool:
+        await self.connection.send(json.dumps(event, ensure_ascii=False))
+        return True
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.close()
+            await self._listener.wait_closed()
+
+
+class HttpTransport:
+    """QQBot 方式：事件 POST 到机器人回调地址，机器人以 HTTP 调用 API"""
+
+    def __init__(self, server: FakeOneBot, host: str, port: int, bot_url: str):
+        self.server = server
+        self.host = host
+        self.port = port
+        self.bot_url = bot_url
+        self.connected = asyncio.Event()
+        self._runner = None
+        self._session = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+        try:
+            params = await request.json()
+        except ValueError:
+            params = {}
+        response = await self.server.call(request.match_info["action"], params or {})
+        return web.json_response(response)
+
+    async def start(self):
+        import aiohttp
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_post("/{action}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._session = aiohttp.ClientSession()
+        self.connected.set()
+
+    async def push(self, event: Dict[str, Any]) -> bool:
+        async with self._session.post(self.bot_url, json=event) as response:
+            return response.status == 200
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+# ==================== 进程内机器人 ====================
+
+def _use_temp_database(workdir: str):
+    """
+    让服务注册表和全局数据库管理器都使用临时数据库，回放不写入正式数据
+
+    成就系统、效果处理器等直接调用 get_db_manager()，只替换注册表不够。
+    """
+    from src.database import database
+    from src.services.service_registry import SERVICE_DATABASE, get_service_registry
+
+    db = database.DatabaseManager(f"sqlite:///{os.path.join(workdir, 'replay.db')}")
+    db.create_tables()
+    database.db_manager = db
+    get_service_registry().provide(SERVICE_DATABASE, db)
+
+
+async def start_bot(kind: str, host: str, port: int, bot_port: int):
+    """在本进程内启动机器人，返回 (机器人, 运行任务)"""
+    if kind == "lagrange":
+        from src.bots.platforms.lagrange_game_bot import CantStopGameBot
+        bot = CantStopGameBot(ws_url=f"ws://{host}:{port}", enable_log=False)
+        bot.bot.enable_log = False
+        return bot, asyncio.create_task(bot.start())
+
+    from src.bots.platforms.qq_bot import QQBot
+    bot = QQBot(onebot_url=f"http://{host}:{port}", listen_host=host, listen_port=bot_port)
+    await bot.start()
+    return bot, None
+
+
+# ==================== 回放 ====================
+
+async def replay(messages: List[ReplayMessage], transport, tracker: LatencyTracker, speed: float,
+                 expects_reply) -> float:
+    """按时间轴推送全部消息，返回推送耗时（秒）"""
+    segments = isinstance(transport, WebSocketTransport)
+    tasks = []
+    start = time.perf_counter()
+
+    async def push(message: ReplayMessage, event: Dict[str, Any], pushed_at: Optional[float]):
+        try:
+            accepted = await transport.push(event)
+        except Exception:
+            accepted = False
+        if not accepted:
+            tracker.on_rejected(message, pushed_at)
+
+    for message_id, message in enumerate(messages, 1):
+        if speed > 0:
+            delay = start + message.offset / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        pushed_at = tracker.on_push(message, expects_reply(message))
+        tasks.append(asyncio.create_task(push(message, make_event(message, message_id, segments), pushed_at)))
+        if speed <= 0 and message_id % 100 == 0:
+            # 全速回放时也让出事件循环，避免推送独占
+            await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+async def drain(tracker: LatencyTracker, timeout: float):
+    """等待未应答的消息，超过 timeout 秒没有新回复则放弃"""
+    last_answered, idle_since = -1, time.perf_counter()
+    while tracker.outstanding():
+        answered = len(tracker.latencies)
+        if answered != last_answered:
+            last_answered, idle_since = answered, time.perf_counter()
+        elif time.perf_counter() - idle_since > timeout:
+            break
+        await asyncio.sleep(0.05)
+
+
+def _reply_filter():
+    """群消息是否需要应答：与机器人相同的预过滤器；私聊总是应答"""
+    from src.bots.utils.message_filter import GameMessageFilter
+    message_filter = GameMessageFilter()
+    return lambda m: m.group_id is None or message_filter.should_respond(m.text)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_summary(summary: Dict[str, Any]):
+    latency = summary["latency_ms"]
+
+    def ms(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    print(f"推送 {summary['pushed']} 条（{summary['offered_rate']:.1f} 条/秒），"
+          f"应答 {summary['answered']}/{summary['expected_replies']}，"
+          f"吞吐 {summary['throughput']:.1f} 条/秒")
+    print(f"延迟 (ms)  p50 {ms(latency['p50'])}  p90 {ms(latency['p90'])}  p95 {ms(latency['p95'])}  "
+          f"p99 {ms(latency['p99'])}  max {ms(latency['max'])}")
+    print(f"错误率 {summary['error_rate']:.2%}（系统错误 {summary['errors']}，拒绝 {summary['rejected']}，"
+          f"未应答 {summary['unanswered']}），未配对回复 {summary['unmatched_replies']}")
+
+
+async def run(args) -> Dict[str, Any]:
+    messages = load_messages(args)
+    if not messages:
+        raise SystemExit("流量来源中没有可回放的消息")
+
+    mode = args.mode or ("http" if args.bot == "qq" else "ws")
+    tracker = LatencyTracker()
+    server = FakeOneBot(tracker, messages, args.api_latency / 1000)
+    if mode == "ws":
+        transport = WebSocketTransport(server, args.host, args.port)
+    else:
+        bot_url = args.bot_url or f"http://{args.host}:{args.bot_port}/onebot"
+        transport = HttpTransport(server, args.host, args.port, bot_url)
+    await transport.start()
+
+    bot, bot_task = None, None
+    try:
+        if args.bot != "none":
+            bot, bot_task = await start_bot(args.bot, args.host, args.port, args.bot_port)
+        print(f"等待机器人连接（{mode}，端口 {args.port}）...")
+        await asyncio.wait_for(transport.connected.wait(), args.connect_timeout)
+        if mode == "ws":
+            # 连接后机器人先查询登录信息，稍候再推送
+            await asyncio.sleep(0.2)
+
+        print(f"回放 {len(messages)} 条消息，倍速 {args.speed if args.speed > 0 else '不限'}")
+        duration = await replay(messages, transport, tracker, args.speed, _reply_filter())
+        await drain(tracker, args.drain)
+    finally:
+        if bot is not None:
+            await bot.stop()
+        if bot_task is not None:
+            bot_task.cancel()
+            await asyncio.gather(bot_task, return_exceptions=True)
+        await transport.stop()
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "source": f"synthetic:{args.synthetic}" if args.synthetic else args.source,
+            "bot": args.bot,
+            "mode": mode,
+            "speed": args.speed,
+            "api_latency_ms": args.api_latency,
+        },
+        "summary": tracker.summary(duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制流量回放（假 OneBot 服务端）")
+    parser.add_argument("source", nargs="?", help="机器人日志或 JSONL 录制")
+    parser.add_argument("--synthetic", type=int, default=0, help="改用 N 条合成指令")
+    parser.add_argument("--users", type=int, default=50, help="合成流量的玩家数")
+    parser.add_argument("--groups", type=int, default=3, help="合成流量的群数")
+    parser.add_argument("--rate", type=float, default=20.0, help="合成流量的平均条/秒（倍速前）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=float, default=1.0, help="无时间戳日志行的间隔（秒）")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示不等待")
+    parser.add_argument("--bot", choices=("lagrange", "qq", "none"), default="lagrange",
+                        help="在本进程内启动的机器人，none 表示连接外部机器人")
+    parser.add_argument("--mode", choices=("ws", "http"), default=None, help="连接方式（默认随 --bot）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080, help="假 OneBot 服务端端口")
+    parser.add_argument("--bot-port", type=int, default=18081, help="进程内 QQBot 的回调端口")
+    parser.add_argument("--bot-url", default=None, help="外部 QQBot 的回调地址")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="API 应答的模拟延迟（毫秒）")
+    parser.add_argument("--connect-timeout", type=float, default=60.0, help="等待机器人连接的秒数")
+    parser.add_argument("--drain", type=float, default=10.0, help="回放结束后无新回复多少秒即停止等待")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="报告 JSON 路径")
+    args = parser.parse_args()
+
+    # 机器人逐条记录消息，压测时只保留警告
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="cant_stop_replay_") as workdir:
+        if args.bot != "none":
+            _use_temp_database(workdir)
+        try:
+            report = asyncio.run(run(args))
+        finally:
+            from src.services.service_registry import shutdown_services
+            shutdown_services()
+
+    print_summary(report["summary"])
+    os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"已写入: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+热点路径基准测试套件
+
+覆盖骰子组合、引擎移动/事件检查、消息路由往返（临时 SQLite 数据库）以及
+排行榜/GM 总览在不同玩家规模下的耗时，结果写入 JSON，可用 compare.py 与基线对比。
+
+用例:
+    dice.*      DiceRoll.get_possible_combinations（命中缓存 / 清空缓存）
+    engine.*    GameEngine.can_move_markers / move_markers / _check_and_trigger_events
+    router.*    MessageProcessor.process_message_async 往返（查看进度 / 完整一轮）
+    service.*   GameService.get_leaderboard / get_gm_overview，按 --scales 的玩家数
+
+每个用例先预热一次，再取 --repeat 个样本，每个样本连续执行 number 次操作
+（用例可提供在每个样本前执行、不计时的准备函数），报告单次操作的最小值、中位数、平均值和标准差（微秒）。
+依赖缺失（如未安装 SQLAlchemy）的用例标记为 skipped，不影响其他用例。
+
+用法:
+    python benchmarks/suite.py [--filter engine] [--scales 1000,10000,100000] [--repeat 7]
+                               [--out cache/benchmarks/latest.json]
+    python benchmarks/compare.py baseline.json cache/benchmarks/latest.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+DEFAULT_OUT = os.path.join("cache", "benchmarks", "latest.json")
+
+
+@dataclass
+class BenchCase:
+    """一个基准用例：setup 返回被计时的无参操作，或 (操作, 每个样本前执行的不计时准备函数)"""
+    name: str
+    setup: Callable[["BenchContext"], Callable[[], None]]
+    number: int = 1000
+    repeat: Optional[int] = None  # 为空时使用 --repeat
+
+
+@dataclass
+class BenchContext:
+    """用例共享的资源（临时目录、按规模缓存的数据库）"""
+    seed: int
+    workdir: str
+    databases: Dict[str, object] = field(default_factory=dict)
+    router_users: int = 0
+
+
+CASES: List[BenchCase] = []
+
+
+def bench(name: str, number: int = 1000, repeat: Optional[int] = None):
+    """注册基准用例"""
+    def decorator(setup):
+        CASES.append(BenchCase(name, setup, number, repeat))
+        return setup
+    return decorator
+
+
+# ==================== 骰子 ====================
+
+def _random_rolls(seed: int, count: int = 1000) -> List[List[int]]:
+    rng = random.Random(seed)
+    return [[rng.randint(1, 6) for _ in range(6)] for _ in range(count)]
+
+
+@bench("dice.combinations.cached", number=20000)
+def _dice_cached(ctx: BenchContext):
+    from src.models.game_models import DiceRoll
+
+    rolls = itertools.cycle([DiceRoll(r) for r in _random_rolls(ctx.seed)])
+    return lambda: next(rolls).get_possible_combinations()
+
+
+@bench("dice.combinations.uncached", number=5000)
+def _dice_uncached(ctx: BenchContext):
+    from src.models import game_models
+    from src.models.game_models import DiceRoll
+
+    rolls = itertools.cycle([DiceRoll(r) for r in _random_rolls(ctx.seed)])
+    cache = game_models._COMBINATION_CACHE
+
+    def op():
+        cache.clear()
+        next(rolls).get_possible_combinations()
+    return op
+
+
+# ==================== 引擎 ====================
+
+# 组合为 (7, 9)：1+2+4 / 3+3+3
+ENGINE_DICE = [1, 2, 4, 3, 3, 3]
+ENGINE_MOVE = [7, 9]
+
+
+def _engine_fixture():
+    """带默认地图事件的引擎、一名玩家和一个刚掷完骰子的会话，返回 (引擎, 会话, 玩家, 掷骰后检查点)"""
+    from src.core.game_engine import GameEngine
+    from src.core.session_history import take_checkpoint
+    from src.models.game_models import DiceRoll, Faction, TurnState
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = GameEngine()
+    # 不受"花言巧语"陷阱读取全局游戏服务的影响
+    engine.set_player_directory(lambda: (True, []))
+    player = engine.create_player("bench_player", "bench_player", Faction.ADOPTER)
+    player.current_score = 10 ** 9
+    session = engine.create_game_session(player.player_id)
+    session.current_dice = DiceRoll(list(ENGINE_DICE))
+    session.turn_state = TurnState.MOVE_MARKERS
+    return engine, session, player, take_checkpoint(session, "bench")
+
+
+@bench("engine.can_move_markers", number=20000)
+def _engine_can_move(ctx: BenchContext):
+    engine, session, _, _ = _engine_fixture()
+    session_id = session.session_id
+    return lambda: engine.can_move_markers(session_id, ENGINE_MOVE)
+
+
+@bench("engine.move_markers", number=2000)
+def _engine_move(ctx: BenchContext):
+    from src.core.session_history import restore_checkpoint
+
+    engine, session, player, checkpoint = _engine_fixture()
+    session_id = session.session_id
+
+    def op():
+        # 每次从同一掷骰后状态开始移动（包含每次移动前重读陷阱配置）
+        restore_checkpoint(checkpoint, session)
+        engine.move_markers(session_id, ENGINE_MOVE)
+    return op
+
+
+@bench("engine.check_and_trigger_events", number=2000)
+def _engine_events(ctx: BenchContext):
+    engine, session, _, _ = _engine_fixture()
+    session.add_temporary_marker(7, 1)
+    session.add_temporary_marker(9, 1)
+    session_id = session.session_id
+    return lambda: engine._check_and_trigger_events(session_id, ENGINE_MOVE)
+
+
+# ==================== 消息路由 ====================
+
+def _temp_database(ctx: BenchContext, key: str):
+    """临时 SQLite 数据库（同一 key 共享）"""
+    if key not in ctx.databases:
+        from src.database.database import DatabaseManager
+
+        path = os.path.join(ctx.workdir, f"{key}.db")
+        db = DatabaseManager(f"sqlite:///{path}")
+        db.create_tables()
+        ctx.databases[key] = db
+    return ctx.databases[key]
+
+
+def _router_service(ctx: BenchContext):
+    """临时数据库上的游戏服务和消息处理器"""
+    from src.core.game_engine import GameEngine
+    from src.services.game_service import GameService
+    from src.services.message_processor import MessageProcessor
+
+    db = _temp_database(ctx, "router")
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = GameEngine()
+    # 路由往返只测路由、服务和数据库，不触发地图事件（事件检查见 engine.*）
+    engine.reload_events_on_move = False
+    engine.map_events = {}
+    engine.set_player_directory(lambda: (True, []))
+    service = GameService(engine=engine, db=db)
+    return service, MessageProcessor(service), asyncio.new_event_loop()
+
+
+def _router_player(ctx: BenchContext, service, processor, loop):
+    """注册一名新玩家并开始游戏，返回 (玩家ID, 发送消息的函数)"""
+    from src.services.message_processor import UserMessage
+
+    db = service.db
+    ctx.router_users += 1
+    user_id = f"bench_user_{ctx.router_users}"
+
+    def send(content: str):
+        return loop.run_until_complete(processor.process_message_async(
+            UserMessage(user_id=user_id, username=user_id, content=content, group_id="bench")))
+
+    service.register_player(user_id, user_id, "收养人")
+    player = db.get_player(user_id)
+    player.current_score = 10 ** 8
+    db.update_player(player)
+    send("轮次开始")
+    return user_id, send
+
+
+def _router_fixture(ctx: BenchContext):
+    """临时数据库上的消息处理器和一名已开始游戏的玩家，返回发送消息的函数"""
+    return _router_player(ctx, *_router_service(ctx))[1]
+
+
+def _expect(response, marker: str, command: str):
+    """回复中没有 marker 时报错，避免计时的是被拒绝的指令"""
+    content = response.content if response else ""
+    if marker not in content:
+        raise RuntimeError(f"{command} 未成功: {content[:80]!r}")
+
+
+@bench("router.status", number=200)
+def _router_status(ctx: BenchContext):
+    send = _router_fixture(ctx)
+    return lambda: send("查看当前进度")
+
+
+@bench("router.turn_cycle", number=10)
+def _router_turn(ctx: BenchContext):
+    from src.models.game_models import get_column_length
+
+    service, processor, loop = _router_service(ctx)
+    current = {}
+
+    def new_player():
+        # 每个样本换一名新玩家：同一玩家反复入账十几轮后会登顶，之后的指令都会被拒绝
+        current["user_id"], current["send"] = _router_player(ctx, service, processor, loop)
+
+    def fill(player, columns) -> float:
+        return max((player.progress.get_progress(c) + 1) / get_column_length(c) for c in columns)
+
+    def op():
+        # 掷骰 -> 移动 -> 主动结束轮次 -> 打卡，每一步都必须成功
+        send = current["send"]
+        response = send("掷骰")
+        combinations = (response.additional_data or {}).get("combinations") if response else None
+        if not combinations:
+            raise RuntimeError(f"掷骰未成功: {response.content[:80] if response else None!r}")
+        # 每轮第一次掷骰没有临时标记，不会爆掉；选离登顶最远的组合，number 轮内不会登顶
+        player = service.engine.get_player(current["user_id"])
+        first, second = min(combinations, key=lambda combo: fill(player, combo))
+        _expect(send(f"{first},{second}"), "已移动标记", "移动")
+        _expect(send("替换永久棋子"), "轮次结束", "替换永久棋子")
+        _expect(send("打卡完毕"), "打卡完成", "打卡完毕")
+
+    new_player()
+    return op, new_player
+
+
+# ==================== 排行榜 / GM 总览 ====================
+
+def _population_service(ctx: BenchContext, players: int):
+    """有 players 名玩家的临时数据库上的游戏服务"""
+    from src.core.game_engine import GameEngine
+    from src.services.game_service import GameService
+
+    key = f"population_{players}"
+    fresh = key not in ctx.databases
+    db = _temp_database(ctx, key)
+    if fresh:
+        # 与 python -m src.database.population 相同的生成器，同一种子各次运行的数据相同
+        from src.database.population import PopulationSpec, generate_population
+        generate_population(db, PopulationSpec(players=players, seed=ctx.seed))
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = GameEngine()
+    return GameService(engine=engine, db=db)
+
+
+def register_scaled_cases(scales):
+    """按玩家规模注册排行榜 / GM 总览用例"""
+    for players in scales:
+        # 规模越大样本越少
+        repeat = 5 if players <= 1000 else 3 if players <= 10000 else 1
+
+        def leaderboard(ctx, players=players):
+            service = _population_service(ctx, players)
+            return lambda: service.get_leaderboard(10)
+
+        def overview(ctx, players=players):
+            service = _population_service(ctx, players)
+            return lambda: service.get_gm_overview()
+
+        CASES.append(BenchCase(f"service.get_leaderboard[players={players}]", leaderboard, 1, repeat))
+        CASES.append(BenchCase(f"service.get_gm_overview[players={players}]", overview, 1, repeat))
+
+
+# ==================== 运行 ====================
+
+def run_case(case: BenchCase, ctx: BenchContext, repeat: int) -> Dict:
+    """运行一个用例，返回结果字典（微秒/次）"""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            op = case.setup(ctx)
+            before_sample = None
+            if isinstance(op, tuple):
+                op, before_sample = op
+            op()
+    except ImportError as e:
+        return {"skipped": f"缺少依赖: {e}"}
+
+    samples = []
+    repeat = case.repeat or repeat
+    number = case.number
+    # 引擎和服务会打印提示，计时期间丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            if before_sample:
+                before_sample()
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            samples.append((time.perf_counter() - start) / number * 1e6)
+
+    return {
+        "unit": "us",
+        "number": number,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点路径基准测试套件")
+    parser.add_argument("--filter", default=None, help="只运行名称匹配该正则的用例")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="排行榜/GM 总览的玩家规模（逗号分隔）")
+    parser.add_argument("--repeat", type=int, default=7, help="每个用例的样本数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=DEFAULT_OUT, help="结果 JSON 路径")
+    parser.add_argument("--list", action="store_true", help="只列出用例")
+    args = parser.parse_args()
+
+    register_scaled_cases([int(s) for s in args.scales.split(",") if s.strip()])
+    cases = [c for c in CASES if not args.filter or re.search(args.filter, c.name)]
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="cant_stop_bench_") as workdir:
+        ctx = BenchContext(seed=args.seed, workdir=workdir)
+        print(f"{'用例':<44} {'中位数 (us)':>14} {'最小值 (us)':>14} {'样本':>6}")
+        for case in cases:
+            result = run_case(case, ctx, args.repeat)
+            results[case.name] = result
+            if "skipped" in result:
+                print(f"{case.name:<44} {'skipped':>14}  {result['skipped']}")
+            else:
+                print(f"{case.name:<44} {result['median']:>14,.2f} {result['min']:>14,.2f} {result['repeat']:>6}")
+        for db in ctx.databases.values():
+            db.engine.dispose()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"已写入: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
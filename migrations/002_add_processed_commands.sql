@@ -0,0 +1,15 @@
+-- Migration: Add Processed Commands Table
+-- Date: 2026-10-19
+-- Description: Adds idempotency records for score-changing commands
+
+-- Table: processed_commands
+-- Stores idempotency keys (self_id:message_id) of executed score-changing commands
+CREATE TABLE IF NOT EXISTS processed_commands (
+    idempotency_key VARCHAR(100) PRIMARY KEY,
+    player_id VARCHAR(50) NOT NULL,
+    command VARCHAR(200) NOT NULL,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (player_id) REFERENCES players(player_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_processed_commands_processed_at ON processed_commands(processed_at);
@@ -0,0 +1,33 @@
+-- Migration: Pack Player Progress
+-- Date: 2026-10-19
+-- Description: Stores each player's permanent progress and completion in packed columns on players
+
+-- Columns: players.packed_progress / progress_mask / completed_mask
+-- packed_progress is a 16-byte BLOB, byte i = progress of column i+3
+-- progress_mask / completed_mask: bit i = column i+3 has progress / is completed
+-- NULL packed_progress means the player's progress still lives in player_progress rows
+ALTER TABLE players ADD COLUMN packed_progress BLOB;
+ALTER TABLE players ADD COLUMN progress_mask INTEGER DEFAULT 0;
+ALTER TABLE players ADD COLUMN completed_mask INTEGER DEFAULT 0;
+
+-- View: player_progress_packed
+-- One row per (player, column) decoded from the packed columns, same shape as player_progress
+-- (progress never exceeds 10, so the low hex digit of each byte is its value)
+CREATE VIEW IF NOT EXISTS player_progress_packed AS
+WITH RECURSIVE board(column_number) AS (
+    SELECT 3
+    UNION ALL
+    SELECT column_number + 1 FROM board WHERE column_number < 18
+)
+SELECT
+    p.player_id AS player_id,
+    board.column_number AS column_number,
+    instr('0123456789ABCDEF', substr(hex(substr(p.packed_progress, board.column_number - 2, 1)), 2, 1)) - 1
+        AS permanent_progress,
+    (p.completed_mask >> (board.column_number - 3)) & 1 AS is_completed
+FROM players p
+JOIN board
+WHERE p.packed_progress IS NOT NULL
+  AND (p.progress_mask >> (board.column_number - 3)) & 1;
+
+-- Backfill: run_migration.py packs existing player_progress rows into these columns after this script
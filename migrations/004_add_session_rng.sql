@@ -0,0 +1,9 @@
+-- Migration: Add Session RNG State
+-- Date: 2026-10-19
+-- Description: Stores each session's dice stream seed and roll counter so any roll can be reproduced
+
+-- Columns: game_sessions.rng_seed / rng_counter
+-- Roll n of a session is determined by (rng_seed, n), see src/core/dice_rng.py
+-- NULL rng_seed: session created before this migration or in secure mode (a seed is assigned on the next roll)
+ALTER TABLE game_sessions ADD COLUMN rng_seed INTEGER;
+ALTER TABLE game_sessions ADD COLUMN rng_counter INTEGER DEFAULT 0;
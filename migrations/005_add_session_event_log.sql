@@ -0,0 +1,30 @@
+-- Migration: Add Session Event Log
+-- Date: 2026-10-19
+-- Description: Append-only per-session event log with periodic snapshots, used to replay and rebuild any session
+
+-- Table: session_events
+-- One row per state change (roll, move, trap, summit, end of turn, checkin, bust, item effect)
+-- patch holds only the bytes that differ from the previous state record, see src/core/turn_log.py
+CREATE TABLE IF NOT EXISTS session_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id VARCHAR(50) NOT NULL,
+    seq INTEGER NOT NULL,
+    kind VARCHAR(20) NOT NULL,
+    detail VARCHAR(100),
+    patch BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_session_event_seq UNIQUE (session_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS ix_session_events_session_id ON session_events(session_id);
+
+-- Table: session_snapshots
+-- Full state record after event seq, written on the first event after startup and every 64 events
+CREATE TABLE IF NOT EXISTS session_snapshots (
+    session_id VARCHAR(50) NOT NULL,
+    seq INTEGER NOT NULL,
+    player_id VARCHAR(50) NOT NULL,
+    state BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, seq)
+);
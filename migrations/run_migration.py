@@ -5,8 +5,46 @@
 
 import sqlite3
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def backfill_packed_progress(cursor: sqlite3.Cursor) -> int:
+    """把 player_progress 行打包写入 players 表（只处理尚未打包的玩家），返回回填的玩家数"""
+    from src.models.game_models import PlayerProgress
+
+    cursor.execute("""
+        SELECT pp.player_id, pp.column_number, pp.permanent_progress, pp.is_completed
+        FROM player_progress pp
+        JOIN players p ON p.player_id = pp.player_id
+        WHERE p.packed_progress IS NULL
+    """)
+    progress_by_player = {}
+    for player_id, column, progress, is_completed in cursor.fetchall():
+        player_progress = progress_by_player.setdefault(player_id, PlayerProgress())
+        player_progress.set_progress(column, progress or 0)
+        if is_completed:
+            player_progress.completed_columns.add(column)
+
+    cursor.executemany(
+        "UPDATE players SET packed_progress = ?, progress_mask = ?, completed_mask = ? WHERE player_id = ?",
+        [(*progress.pack(), player_id) for player_id, progress in progress_by_player.items()]
+    )
+    # 没有任何进度行的玩家
+    cursor.execute(
+        "UPDATE players SET packed_progress = zeroblob(16), progress_mask = 0, completed_mask = 0 "
+        "WHERE packed_progress IS NULL"
+    )
+    return len(progress_by_player) + cursor.rowcount
+
+
+# 迁移脚本执行后需要运行的数据回填
+POST_MIGRATION_HOOKS = {
+    "003_pack_player_progress.sql": backfill_packed_progress,
+}
+
 
 def run_migration(db_path: str = "cant_stop.db", migration_file: str = "001_add_encounter_tables.sql"):
     """运行迁移脚本"""
@@ -30,16 +68,23 @@ def run_migration(db_path: str = "cant_stop.db", migration_file: str = "001_add_
         # 分割并执行每个语句
         statements = migration_sql.split(';')
         for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
+            # 去掉语句前的注释行
+            lines = [line for line in statement.strip().splitlines() if not line.strip().startswith('--')]
+            statement = "\n".join(lines).strip()
+            if statement:
                 try:
                     cursor.execute(statement)
                 except sqlite3.Error as e:
-                    # 如果是"表已存在"错误，可以忽略
-                    if "already exists" not in str(e):
+                    # 如果是"表已存在"/"列已存在"错误，可以忽略
+                    if "already exists" not in str(e) and "duplicate column name" not in str(e):
                         print(f"⚠️  警告: {e}")
                         print(f"   语句: {statement[:100]}...")
 
+        hook = POST_MIGRATION_HOOKS.get(migration_file)
+        if hook:
+            count = hook(cursor)
+            print(f"🔄 数据回填: {hook.__name__}，处理 {count} 名玩家")
+
         conn.commit()
         print(f"✅ 迁移成功: {migration_file}")
         print(f"   数据库: {db_path}")
@@ -60,8 +105,6 @@ def run_migration(db_path: str = "cant_stop.db", migration_file: str = "001_add_
 
 
 if __name__ == "__main__":
-    import sys
-
     # 获取命令行参数
     db_path = sys.argv[1] if len(sys.argv) > 1 else "cant_stop.db"
     migration_file = sys.argv[2] if len(sys.argv) > 2 else "001_add_encounter_tables.sql"
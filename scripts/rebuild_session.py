@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+从会话事件日志重建会话
+
+回放 session_events / session_snapshots，输出会话在指定事件之后的状态；
+加 --apply 时把重建结果写回 game_sessions 和玩家进度（用于修复损坏的会话数据）。
+
+用法:
+    python scripts/rebuild_session.py <session_id> [--seq N] [--events] [--apply]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.turn_log import TurnLog
+from src.database.database import get_db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从会话事件日志重建会话")
+    parser.add_argument("session_id", help="会话ID")
+    parser.add_argument("--seq", type=int, default=None, help="重建到第几条事件（默认最新）")
+    parser.add_argument("--events", action="store_true", help="列出回放的事件")
+    parser.add_argument("--apply", action="store_true", help="把重建结果写回数据库")
+    args = parser.parse_args()
+
+    db = get_db_manager()
+    if args.events:
+        snapshot, events = db.load_turn_log(args.session_id, args.seq)
+        if snapshot:
+            print(f"快照 #{snapshot.seq}  {snapshot.created_at:%Y-%m-%d %H:%M:%S}")
+        for event in events:
+            print(f"#{event.seq:<6} {event.created_at:%Y-%m-%d %H:%M:%S}  {event.kind:<10} "
+                  f"{event.detail or '':<20} {len(event.patch)}B")
+
+    replay = TurnLog(db).rebuild(args.session_id, args.seq)
+    if replay is None:
+        print(f"[ERROR] 会话 {args.session_id} 没有事件日志")
+        sys.exit(1)
+
+    session = replay.session
+    markers = "、".join(f"{m.column}列+{m.position}" for m in session.temporary_markers) or "无"
+    progress = "、".join(f"{c}列{p}" for c, p in sorted(replay.progress.permanent_progress.items())) or "无"
+    print(f"会话: {session.session_id}  玩家: {session.player_id}  事件: #{replay.seq}")
+    print(f"状态: {session.state.value} / {session.turn_state.value}  轮次: {session.turn_number}")
+    print(f"骰子: {session.current_dice.results if session.current_dice else '无'}  "
+          f"骰子流: 种子 {session.rng_seed} 计数 {session.rng_counter}")
+    print(f"临时标记: {markers}")
+    print(f"永久进度: {progress}  已登顶: {sorted(replay.progress.completed_columns) or '无'}")
+    print(f"积分: {replay.current_score}")
+
+    if args.apply:
+        player = db.get_player(session.player_id)
+        if player is None:
+            print(f"[ERROR] 玩家 {session.player_id} 不存在")
+            sys.exit(1)
+        current = db.get_game_session(session.session_id)
+        if current is not None:
+            session.created_at = current.created_at
+            session.forced_dice_result = current.forced_dice_result
+        player.progress = replay.progress
+        player.current_score = replay.current_score
+        db.update_player(player)
+        db.save_game_session(session)
+        print("已写回数据库")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ QQ消息适配器 - 优化游戏消息在QQ群中的显示效果
 """
 
 import re
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -14,6 +15,39 @@ class MessageStyle:
     max_length: int = 1000
     compact_mode: bool = False
     mention_user: bool = False
+    max_bytes: Optional[int] = None  # UTF-8字节上限，None表示只按字符数限制
+
+    def cache_key(self) -> tuple:
+        """用于缓存的样式键"""
+        return (self.use_emoji, self.max_length, self.compact_mode, self.mention_user, self.max_bytes)
+
+
+# 预编译的格式化规则
+_DICE_PATTERN = re.compile(r'骰点[:：]\s*(\d+\s+\d+\s+\d+\s+\d+\s+\d+\s+\d+)')
+_TRAP_PATTERN = re.compile(r'触发陷阱[:：](.+?)(\n|$)')
+_QUOTE_PATTERN = re.compile(r'"([^"]+)"')
+_LEADERBOARD_ENTRY = re.compile(r'^([123])\.(?=\s)', re.MULTILINE)
+_SCORE_PATTERN = re.compile(r'积分([+-])(\d+)')
+_STATUS_KEYWORDS = re.compile(r'当前位置|积分|已登顶|轮次')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n')
+_DECORATIVE_SEPARATOR = re.compile(r'[─┄=\-]{5,}')
+
+_MEDALS = {'1': '🥇 ', '2': '🥈 ', '3': '🥉 '}
+_SENTENCE_ENDS = '.。\n'
+_ELLIPSIS = "..."
+
+
+def _format_dice_match(match: re.Match) -> str:
+    return '骰点: ' + " | ".join(f"[{num}]" for num in match.group(1).split())
+
+
+def _format_score_match(match: re.Match) -> str:
+    sign, amount = match.groups()
+    return f"💰+{amount}积分" if sign == '+' else f"💸-{amount}积分"
+
+
+# 分隔线替换（str.replace 未命中时不复制字符串）
+_SEPARATOR_REPLACEMENTS = (('=' * 50, '─' * 20), ('-' * 30, '┄' * 15))
 
 
 class QQMessageAdapter:
@@ -108,31 +142,15 @@ class QQMessageAdapter:
 
     def _format_dice_result(self, text: str) -> str:
         """格式化骰子结果"""
-        # 识别骰子结果模式
-        dice_pattern = r'骰点[:：]\s*(\d+\s+\d+\s+\d+\s+\d+\s+\d+\s+\d+)'
-        match = re.search(dice_pattern, text)
-
-        if match:
-            dice_str = match.group(1)
-            dice_numbers = dice_str.split()
-
-            # 美化骰子显示
-            formatted_dice = " | ".join([f"[{num}]" for num in dice_numbers])
-            text = re.sub(dice_pattern, f'骰点: {formatted_dice}', text)
-
-        return text
+        # 美化骰子显示
+        return _DICE_PATTERN.sub(_format_dice_match, text, count=1)
 
     def _format_game_status(self, text: str) -> str:
         """格式化游戏状态"""
         if self.style.compact_mode:
             # 紧凑模式：简化状态显示
-            lines = text.split('\n')
-            important_lines = []
-
-            for line in lines:
-                if any(keyword in line for keyword in ['当前位置', '积分', '已登顶', '轮次']):
-                    important_lines.append(line.strip())
-
+            important_lines = [line.strip() for line in text.split('\n')
+                               if _STATUS_KEYWORDS.search(line)]
             return ' | '.join(important_lines) if important_lines else text
 
         return text
@@ -142,14 +160,10 @@ class QQMessageAdapter:
         # 为陷阱消息添加特殊格式
         if '触发陷阱' in text:
             # 突出显示陷阱名称
-            trap_pattern = r'触发陷阱[:：](.+?)(\n|$)'
-            text = re.sub(trap_pattern, r'⚡触发陷阱: **\1**\2', text)
+            text = _TRAP_PATTERN.sub(r'⚡触发陷阱: **\1**\2', text)
 
         # 格式化角色台词
-        quote_pattern = r'"([^"]+)"'
-        text = re.sub(quote_pattern, r'💬 "\1"', text)
-
-        return text
+        return _QUOTE_PATTERN.sub(r'💬 "\1"', text)
 
     def _format_achievement_message(self, text: str) -> str:
         """格式化成就消息"""
@@ -161,59 +175,41 @@ class QQMessageAdapter:
 
     def _format_leaderboard(self, text: str) -> str:
         """格式化排行榜"""
-        lines = text.split('\n')
-        formatted_lines = []
-
-        for line in lines:
-            if re.match(r'^\d+\.\s', line):  # 排行榜条目
-                # 为前三名添加特殊标记
-                if line.startswith('1.'):
-                    line = f"🥇 {line[2:]}"
-                elif line.startswith('2.'):
-                    line = f"🥈 {line[2:]}"
-                elif line.startswith('3.'):
-                    line = f"🥉 {line[2:]}"
-
-            formatted_lines.append(line)
-
-        return '\n'.join(formatted_lines)
+        # 为前三名添加特殊标记
+        return _LEADERBOARD_ENTRY.sub(lambda m: _MEDALS[m.group(1)], text)
 
     def _format_general_game_message(self, text: str) -> str:
         """格式化通用游戏消息"""
         # 突出显示重要信息
         if 'ERROR' in text:
             text = f"❌ {text.replace('ERROR', '').strip()}"
-        elif 'OK' in text and text.startswith('OK'):
+        elif text.startswith('OK'):
             text = f"✅ {text.replace('OK', '').strip()}"
 
         # 格式化积分变化
-        score_pattern = r'积分\+(\d+)'
-        text = re.sub(score_pattern, r'💰+\1积分', text)
-
-        score_pattern = r'积分-(\d+)'
-        text = re.sub(score_pattern, r'💸-\1积分', text)
+        if '积分' in text:
+            text = _SCORE_PATTERN.sub(_format_score_match, text)
 
         return text
 
     def _optimize_layout(self, text: str) -> str:
         """优化显示布局"""
         # 移除多余的空行
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+        text = _BLANK_LINES.sub('\n\n', text)
 
         # 优化分隔线
-        text = text.replace('=' * 50, '─' * 20)
-        text = text.replace('-' * 30, '┄' * 15)
+        for separator, replacement in _SEPARATOR_REPLACEMENTS:
+            text = text.replace(separator, replacement)
 
         # 如果是紧凑模式，进一步简化
         if self.style.compact_mode:
             # 移除装饰性分隔线
-            text = re.sub(r'[─┄=\-]{5,}', '', text)
+            text = _DECORATIVE_SEPARATOR.sub('', text)
             # 合并短行
-            lines = text.split('\n')
             merged_lines = []
             current_line = ""
 
-            for line in lines:
+            for line in text.split('\n'):
                 line = line.strip()
                 if not line:
                     continue
@@ -233,23 +229,44 @@ class QQMessageAdapter:
         return text
 
     def _limit_length(self, text: str) -> str:
-        """限制消息长度"""
-        if len(text) <= self.style.max_length:
-            return text
+        """限制消息长度（字符数，以及可选的UTF-8字节数）"""
+        max_length = self.style.max_length
+        max_bytes = self.style.max_bytes
 
-        # 智能截断，尽量在句子边界
-        truncate_pos = self.style.max_length - 3  # 为"..."预留空间
+        # 纯ASCII以外的字符最多4字节，字符数足够小时无需编码即可判定
+        if len(text) <= max_length and (max_bytes is None or len(text) * 4 <= max_bytes):
+            return text
 
-        # 寻找最近的句子结束位置
-        for i in range(truncate_pos, max(0, truncate_pos - 100), -1):
-            if text[i] in '.。\n':
-                return text[:i + 1] + "..."
+        # 为"..."预留空间
+        truncate_pos = max_length - len(_ELLIPSIS)
+        if max_bytes is not None:
+            encoded = text.encode('utf-8')
+            if len(text) <= max_length and len(encoded) <= max_bytes:
+                return text
+            # 字节预算内能容纳的字符数
+            byte_budget = max(0, max_bytes - len(_ELLIPSIS))
+            truncate_pos = min(truncate_pos,
+                               len(encoded[:byte_budget].decode('utf-8', errors='ignore')))
+
+        # 智能截断，尽量在最近100个字符内的句子边界
+        window_start = max(0, truncate_pos - 100)
+        boundary = max(text.rfind(end, window_start, truncate_pos) for end in _SENTENCE_ENDS)
+        if boundary >= 0:
+            return text[:boundary + 1] + _ELLIPSIS
 
         # 如果找不到合适的截断点，直接截断
-        return text[:truncate_pos] + "..."
+        return text[:truncate_pos] + _ELLIPSIS
 
     def format_help_message(self) -> str:
-        """格式化帮助消息"""
+        """格式化帮助消息（按样式缓存）"""
+        return _render_static_message(self.style.cache_key(), "help", "")
+
+    def format_welcome_message(self, username: str) -> str:
+        """格式化欢迎消息（按样式和用户名缓存）"""
+        return _render_static_message(self.style.cache_key(), "welcome", username)
+
+    def _build_help_message(self) -> str:
+        """构建帮助消息"""
         help_text = """🎮 CantStop贪骰无厌 - QQ群版
 
 🎯 基础指令:
@@ -272,8 +289,8 @@ class QQMessageAdapter:
 
         return self.adapt_message(help_text, message_type="help")
 
-    def format_welcome_message(self, username: str) -> str:
-        """格式化欢迎消息"""
+    def _build_welcome_message(self, username: str) -> str:
+        """构建欢迎消息"""
         welcome = f"""欢迎 {username} 加入CantStop！🎲
 
 这是一个骰子策略游戏，目标是在3列登顶获胜！
@@ -300,4 +317,13 @@ class QQMessageAdapter:
             compact_mode=False,
             mention_user=False
         )
-        return QQMessageAdapter(no_emoji_style)
\ No newline at end of file
+        return QQMessageAdapter(no_emoji_style)
+
+
+@lru_cache(maxsize=256)
+def _render_static_message(style_key: tuple, kind: str, argument: str) -> str:
+    """渲染静态文本（帮助/欢迎），同一样式下结果固定，可缓存"""
+    adapter = QQMessageAdapter(MessageStyle(*style_key))
+    if kind == "help":
+        return adapter._build_help_message()
+    return adapter._build_welcome_message(argument)
@@ -4,10 +4,11 @@ Lagrange OneBot 客户端类库
 """
 
 import asyncio
+import itertools
 import json
 import re
 import base64
-from typing import Dict, Any, Optional, List, Callable, Awaitable, Union
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable, Union
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -21,6 +22,11 @@ except ImportError:
 
 from websockets.exceptions import WebSocketException
 
+try:
+    from .message_dedup import MessageDeduplicator
+except ImportError:
+    from message_dedup import MessageDeduplicator
+
 # ==================== 数据类 ====================
 
 @dataclass
@@ -364,7 +370,8 @@ class LagrangeBot:
         access_token: Optional[str] = None,
         allowed_groups: Optional[List[int]] = None,
         blocked_groups: Optional[List[int]] = None,
-        enable_log: bool = True
+        enable_log: bool = True,
+        api_timeout: float = 30.0
     ) -> None:
         """
         初始化客户端
@@ -375,6 +382,7 @@ class LagrangeBot:
             allowed_groups: 白名单群号列表，None 表示监听所有群
             blocked_groups: 黑名单群号列表
             enable_log: 是否启用日志输出
+            api_timeout: API 调用等待响应的超时时间（秒）
         """
         self.ws_url: str = ws_url
         self.access_token: Optional[str] = access_token
@@ -392,6 +400,16 @@ class LagrangeBot:
         
         # 运行状态
         self._running: bool = False
+
+        # API 请求/响应复用：echo -> 等待响应的 Future
+        self.api_timeout: float = api_timeout
+        self._echo_counter = itertools.count(1)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._event_tasks: Set[asyncio.Task] = set()
+
+        # 入站消息去重（上报重试、重连回放）
+        self.deduplicator = MessageDeduplicator()
     
     def _log(self, message: str) -> None:
         """
@@ -434,6 +452,9 @@ class LagrangeBot:
                 self.ws = await connect(self.ws_url, **connect_kwargs)
                 self._log(f"[INFO] 已连接到 {self.ws_url}")
 
+                # 启动唯一的读取任务，API 响应与事件都由它分发
+                self._reader_task = asyncio.create_task(self._reader_loop())
+
                 # 获取 Bot QQ 号
                 login_info = await self._call_api("get_login_info", {})
                 self.bot_qq = login_info.get("data", {}).get("user_id")
@@ -456,6 +477,15 @@ class LagrangeBot:
     async def disconnect(self) -> None:
         """关闭 WebSocket 连接"""
         self._running = False
+        reader = self._reader_task
+        self._reader_task = None
+        if reader and reader is not asyncio.current_task() and not reader.done():
+            reader.cancel()
+            try:
+                await reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._fail_pending(ConnectionError("WebSocket 连接已关闭"))
         if self.ws:
             await self.ws.close()
             self._log("🔌 连接已关闭")
@@ -474,32 +504,50 @@ class LagrangeBot:
     async def _call_api(
         self, 
         action: str, 
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         调用 OneBot API
+
+        请求携带唯一的 echo，由读取任务按 echo 将响应路由回对应的 Future，
+        因此可以同时有多个调用在途，且不会与事件帧互相抢占。
         
         Args:
             action: API 动作
             params: 参数
+            timeout: 等待响应的超时时间（秒），None 使用 api_timeout
             
         Returns:
             API 响应
             
         Raises:
             RuntimeError: 未连接到 WebSocket
+            asyncio.TimeoutError: 等待响应超时
+            ConnectionError: 等待期间连接断开
         """
         if not self.ws:
             raise RuntimeError("未连接到 WebSocket，请先调用 connect()")
         
+        echo = f"{action}#{next(self._echo_counter)}"
         payload = {
             "action": action,
-            "params": params
+            "params": params,
+            "echo": echo
         }
         
-        await self.ws.send(json.dumps(payload))
-        response = await self.ws.recv()
-        result: Dict[str, Any] = json.loads(response)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[echo] = future
+        try:
+            await self.ws.send(json.dumps(payload))
+            result: Dict[str, Any] = await asyncio.wait_for(
+                future, timeout=timeout if timeout is not None else self.api_timeout
+            )
+        except asyncio.TimeoutError:
+            self._log(f"⚠️ API 调用超时: {action}")
+            raise
+        finally:
+            self._pending.pop(echo, None)
         
         if result.get("status") == "failed":
             error_msg = result.get("wording", "未知错误")
@@ -507,6 +555,19 @@ class LagrangeBot:
         
         return result
     
+    def _fail_pending(self, error: Exception) -> None:
+        """
+        让所有等待中的 API 调用以异常结束（内部方法）
+        
+        Args:
+            error: 设置到 Future 上的异常
+        """
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+    
     # ==================== 消息发送 ====================
     
     async def send_group_msg(
@@ -920,7 +981,7 @@ class LagrangeBot:
         raw_message = data.get("raw_message", "")
         sender = data.get("sender", {})
         
-        plain_text, _ = self.parse_message_array(message)
+        plain_text, _, _ = self.parse_message_array(message)
         
         return PrivateMessage(
             message_id=data["message_id"],
@@ -1029,6 +1090,10 @@ class LagrangeBot:
         Args:
             data: 原始消息数据
         """
+        if self.deduplicator.is_duplicate(data.get("self_id"), data.get("message_id")):
+            self._log(f"🔁 忽略重复消息: {data.get('message_id')}")
+            return
+        
         group_id = data["group_id"]
         
         # 白名单过滤
@@ -1080,6 +1145,10 @@ class LagrangeBot:
         Args:
             data: 原始消息数据
         """
+        if self.deduplicator.is_duplicate(data.get("self_id"), data.get("message_id")):
+            self._log(f"🔁 忽略重复消息: {data.get('message_id')}")
+            return
+        
         msg = await self._parse_private_message(data)
         
         # 日志
@@ -1093,6 +1162,61 @@ class LagrangeBot:
             except Exception as e:
                 self._log(f"[ERROR] 处理器错误: {e}")
     
+    async def _reader_loop(self) -> None:
+        """
+        唯一的 WebSocket 读取任务（内部方法）
+
+        带 echo 的帧是 API 响应，交给对应的 Future；其余帧作为事件，
+        以独立任务分发给处理器，避免处理器内部调用 API 时阻塞读取。
+        """
+        try:
+            async for message in self.ws:
+                try:
+                    data: Dict[str, Any] = json.loads(message)
+                except (TypeError, ValueError):
+                    self._log(f"⚠️ 无法解析的消息帧: {message!r}")
+                    continue
+                
+                # API 响应
+                echo = data.get("echo")
+                if echo is not None:
+                    future = self._pending.get(echo)
+                    if future is not None and not future.done():
+                        future.set_result(data)
+                    continue
+                
+                # 忽略心跳
+                if data.get("meta_event_type") == "heartbeat":
+                    continue
+                
+                task = asyncio.create_task(self._dispatch_event(data))
+                self._event_tasks.add(task)
+                task.add_done_callback(self._event_tasks.discard)
+        except WebSocketException as e:
+            self._log(f"[ERROR] WebSocket 异常: {e}")
+        finally:
+            self._fail_pending(ConnectionError("WebSocket 连接已断开"))
+    
+    async def _dispatch_event(self, data: Dict[str, Any]) -> None:
+        """
+        按事件类型分发到对应处理流程（内部方法）
+        
+        Args:
+            data: 原始事件数据
+        """
+        try:
+            # 群消息
+            if (data.get("post_type") == "message" 
+                and data.get("message_type") == "group"):
+                await self._handle_group_message(data)
+            
+            # 私聊消息
+            elif (data.get("post_type") == "message" 
+                  and data.get("message_type") == "private"):
+                await self._handle_private_message(data)
+        except Exception as e:
+            self._log(f"[ERROR] 事件处理错误: {e}")
+    
     async def listen(self) -> None:
         """
         监听消息（阻塞运行）
@@ -1110,32 +1234,14 @@ class LagrangeBot:
         self._log("👂 开始监听消息...\n")
         self._running = True
         
-        try:
-            while self._running:
-                try:
-                    message = await asyncio.wait_for(self.ws.recv(), timeout=60)
-                    data: Dict[str, Any] = json.loads(message)
-                    
-                    # 忽略心跳
-                    if data.get("meta_event_type") == "heartbeat":
-                        continue
-                    
-                    # 群消息
-                    if (data.get("post_type") == "message" 
-                        and data.get("message_type") == "group"):
-                        await self._handle_group_message(data)
-                    
-                    # 私聊消息
-                    elif (data.get("post_type") == "message" 
-                          and data.get("message_type") == "private"):
-                        await self._handle_private_message(data)
-                
-                except asyncio.TimeoutError:
-                    # 超时，继续下一次循环
-                    continue
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.create_task(self._reader_loop())
         
-        except WebSocketException as e:
-            self._log(f"[ERROR] WebSocket 异常: {e}")
+        try:
+            await asyncio.shield(self._reader_task)
+        except asyncio.CancelledError:
+            self._log("\n👋 停止监听")
+            raise
         except KeyboardInterrupt:
             self._log("\n👋 停止监听")
         finally:
@@ -0,0 +1,78 @@
+"""
+入站消息去重
+
+OneBot HTTP 上报重试、WebSocket 重连回放都可能让同一条消息被投递多次。
+以 (self_id, message_id) 为键，在有限容量和时间窗口内记录已处理的消息。
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class MessageDeduplicator:
+    """基于 LRU + 时间窗口的消息去重缓存"""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 600.0) -> None:
+        """
+        初始化去重缓存
+
+        Args:
+            max_size: 最多记录的消息数，超出后淘汰最早的记录
+            ttl: 记录的有效期（秒），超过后同一消息不再视为重复
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._seen: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.duplicates = 0
+
+    def is_duplicate(self, self_id: Any, message_id: Any) -> bool:
+        """
+        检查消息是否重复，首次出现的消息会被记录
+
+        Args:
+            self_id: 机器人 QQ 号
+            message_id: 消息 ID
+
+        Returns:
+            是否为重复消息（缺少 message_id 时总是返回 False）
+        """
+        if message_id is None:
+            return False
+
+        now = time.monotonic()
+        self._expire(now)
+
+        key = (str(self_id), str(message_id))
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+
+        self._seen[key] = now
+        if len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return False
+
+    def _expire(self, now: float) -> None:
+        """淘汰超过时间窗口的记录（按插入顺序，遇到未过期即停止）"""
+        cutoff = now - self.ttl
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff:
+                break
+            self._seen.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+def make_idempotency_key(self_id: Any, message_id: Any) -> Optional[str]:
+    """
+    根据消息生成幂等键，用于持久化去重积分变动类指令
+
+    Returns:
+        幂等键，缺少 message_id 时返回 None
+    """
+    if message_id is None:
+        return None
+    return f"{self_id}:{message_id}"
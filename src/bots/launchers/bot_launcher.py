@@ -176,6 +176,10 @@ class BotLauncher:
         try:
             self.logger.info("正在启动QQ机器人...")
 
+            # 开始监听前预热引擎和缓存
+            from ...services.warmup import warm_up
+            self.logger.info(warm_up().format())
+
             # 创建机器人和适配器
             self.bot = self.create_bot()
             self.message_adapter = self.create_message_adapter()
@@ -33,6 +33,14 @@ class UnifiedLauncher:
     async def launch_bot(self, config: BotConfig):
         """根据配置启动机器人"""
         try:
+            # 机器人长期运行，游戏配置修改后无需重启即可生效
+            from ...services.service_registry import get_service_registry, SERVICE_CONFIG
+            get_service_registry().get(SERVICE_CONFIG).start_watching()
+
+            # 开始监听前预热引擎和缓存
+            from ...services.warmup import warm_up
+            self.logger.info(warm_up().format())
+
             if config.platform == "lagrange":
                 # 延迟导入Lagrange机器人
                 from ..platforms.lagrange_game_bot import CantStopGameBot
@@ -85,6 +93,10 @@ class UnifiedLauncher:
             self.logger.info("用户中断启动")
         except Exception as e:
             self.logger.error(f"启动失败: {e}")
+        finally:
+            # 关闭共享服务（停止配置轮询、写回待保存配置、释放数据库连接）
+            from ...services.service_registry import shutdown_services
+            shutdown_services()
 
     def _create_example_config(self):
         """创建示例配置文件"""
@@ -9,10 +9,14 @@ from datetime import datetime
 import logging
 
 from ..api.apis import LagrangeBot, GroupMessage, PrivateMessage, MessageBuilder
-from ...services.game_service import GameService
+from ..api.message_dedup import make_idempotency_key
+from ...services.service_registry import get_game_service
 from ...services.message_processor import MessageProcessor, UserMessage
 from ...core.event_system import emit_game_event, GameEventType
 from ..adapters.qq_message_adapter import QQMessageAdapter, MessageStyle
+from ..utils.outbound_scheduler import OutboundScheduler, PRIORITY_BROADCAST
+from ..utils.message_filter import GameMessageFilter
+from ...utils.metrics import get_metrics
 
 
 class CantStopGameBot:
@@ -45,13 +49,35 @@ class CantStopGameBot:
         )
 
         # 游戏服务
-        self.game_service = GameService()
-        self.message_processor = MessageProcessor()
+        self.game_service = get_game_service()
+        self.message_processor = MessageProcessor(self.game_service)
         self.message_adapter = QQMessageAdapter()
 
+        # 群消息预过滤：关键词表 + 指令路由的精确指令
+        self.message_filter = GameMessageFilter(
+            commands=self.message_processor.command_handlers.keys()
+        )
+
+        # 出站消息调度（限速、合并、优先级）
+        self.outbound = OutboundScheduler(
+            self._deliver_message,
+            max_length=self.message_adapter.style.max_length
+        )
+
         # 权限控制
         self.admin_users = set(admin_users) if admin_users else set()
 
+        # 运行指标：出站排队、处理中的事件和等待应答的 API 调用
+        self.metrics = get_metrics()
+        self.metrics.register_gauge(
+            "cantstop_queue_depth", "机器人循环的队列深度", ("queue",), "lagrange_bot",
+            lambda: {
+                ("outbound",): self.outbound.queue_depth(),
+                ("lagrange_events",): len(self.bot._event_tasks),
+                ("lagrange_api_pending",): len(self.bot._pending),
+            }
+        )
+
         # 设置日志
         self.logger = logging.getLogger(__name__)
         if enable_log:
@@ -130,7 +156,7 @@ class CantStopGameBot:
 
             # 处理游戏指令
             self.logger.info(f"[GAME] 群 {msg.group_id} | {msg.sender_nickname}({msg.user_id}): 开始处理游戏指令: {msg.plain_text}")
-            await self._process_game_command(msg.user_id, msg.plain_text, msg.group_id)
+            await self._process_game_command(msg.user_id, msg.plain_text, msg.group_id, msg.message_id)
 
         except Exception as e:
             self.logger.error(f"[ERROR] 处理群消息失败: {e}")
@@ -145,7 +171,7 @@ class CantStopGameBot:
             self.logger.info(f"[PRIVATE] {msg.sender_nickname}({msg.user_id}): {msg.plain_text}")
 
             # 私聊消息默认都会响应
-            await self._process_game_command(msg.user_id, msg.plain_text, None)
+            await self._process_game_command(msg.user_id, msg.plain_text, None, msg.message_id)
         except Exception as e:
             self.logger.error(f"[ERROR] 处理私聊消息失败: {e}")
             await self.bot.send_private_msg(msg.user_id, f"[ERROR] 处理指令时发生错误: {str(e)}")
@@ -160,53 +186,8 @@ class CantStopGameBot:
         # if self._has_image(msg):
         #     return True
 
-        # 3. 看起来像游戏指令的消息
-        game_keywords = [
-            "轮次开始", "r6d6", "选择数值", "替换永久", "继续", "打卡完毕",
-            "查看当前进度", "help", "帮助", "选择阵营", "领取", "排行榜",
-            "选择", "数值", "骰子", "重投", "登顶", "我超级满意",  # 添加登顶和满意关键词
-            "道具商店", "查看库存", "我的道具", "背包", "查看背包",  # 库存相关
-            "购买", "捏捏", "使用", "查看成就", "恢复游戏"  # 道具和其他指令
-        ]
-
-        # 检查是否包含数字组合（优先级更高）
-        import re
-        if re.match(r'^\s*\d+\s*(,\s*\d+)?\s*$', msg.plain_text.strip()):
-            return True
-
-        # 检查登顶确认模式：数列X登顶
-        if re.match(r'^数列\d+登顶$', msg.plain_text.strip()):
-            return True
-
-        # 检查是否是编号选项格式（如 "1. 好呀好呀"）
-        if re.match(r'^\s*\d+\.\s*.+', msg.plain_text.strip()):
-            return True
-
-        # 检查是否包含常见的遭遇/道具选择关键词
-        choice_keywords = [
-            # 同意/拒绝类
-            "好呀", "还是算了", "好啊", "好", "不了", "谢谢", "参加", "不参加",
-            # 动作类
-            "继续", "休息", "靠近", "逃跑", "帮忙", "不帮", "观看", "绕过",
-            "看看", "过去", "未来", "听故事", "不听", "借书", "不借", "加入",
-            "戴上", "不戴", "走了", "走开", "前进", "仔细",
-            # 触摸/互动类
-            "摸摸", "敲敲", "浇水", "数羊", "吐槽", "夸赞", "尝试", "修复",
-            # 选择类
-            "红色", "蓝色", "甜的", "辣的", "吓死", "申请", "想要",
-            # 特殊选项
-            "321", "啊啊", "仔细观赏", "静静", "快速", "慢慢", "深度"
-        ]
-
-        # 先检查游戏关键词
-        if any(keyword in msg.plain_text for keyword in game_keywords):
-            return True
-
-        # 如果消息很短（可能是选项回复），检查选择关键词
-        if len(msg.plain_text.strip()) <= 20:
-            return any(keyword in msg.plain_text for keyword in choice_keywords)
-
-        return False
+        # 3. 看起来像游戏指令的消息（预编译的关键词/指令过滤器，一次扫描）
+        return self.message_filter.should_respond(msg.plain_text)
 
     def _has_image(self, msg: GroupMessage) -> bool:
         """检查消息是否包含图片"""
@@ -215,7 +196,8 @@ class CantStopGameBot:
             for segment in msg.message_array
         )
 
-    async def _process_game_command(self, user_id: int, message: str, group_id: Optional[int] = None):
+    async def _process_game_command(self, user_id: int, message: str, group_id: Optional[int] = None,
+                                    message_id: Optional[int] = None):
         """处理游戏指令"""
         user_id_str = str(user_id)
 
@@ -236,7 +218,7 @@ class CantStopGameBot:
             if group_id:
                 await self._send_group_at_response(user_id, welcome_msg, group_id)
             else:
-                await self.bot.send_private_msg(user_id, welcome_msg)
+                await self._send_private_response(user_id, welcome_msg)
             return
 
         # 处理特殊指令
@@ -245,7 +227,7 @@ class CantStopGameBot:
             if group_id:
                 await self._send_group_at_response(user_id, response, group_id)
             else:
-                await self.bot.send_private_msg(user_id, response)
+                await self._send_private_response(user_id, response)
             return
 
         # 管理员指令
@@ -260,7 +242,8 @@ class CantStopGameBot:
                 username=f"用户{user_id}",
                 content=message,
                 group_id=str(group_id) if group_id else None,
-                timestamp=datetime.now().isoformat()
+                timestamp=datetime.now().isoformat(),
+                idempotency_key=make_idempotency_key(self.bot.bot_qq, message_id)
             )
 
             # 使用消息处理器处理游戏指令
@@ -278,7 +261,7 @@ class CantStopGameBot:
                 if group_id:
                     await self._send_group_at_response(user_id, formatted_response, group_id)
                 else:
-                    await self.bot.send_private_msg(user_id, formatted_response)
+                    await self._send_private_response(user_id, formatted_response)
 
             # 发布游戏事件
             event_type = GameEventType.DICE_ROLLED if '.r6d6' in message else GameEventType.TURN_STARTED
@@ -294,7 +277,7 @@ class CantStopGameBot:
             if group_id:
                 await self._send_group_at_response(user_id, error_msg, group_id)
             else:
-                await self.bot.send_private_msg(user_id, error_msg)
+                await self._send_private_response(user_id, error_msg)
 
     async def _handle_admin_command(self, user_id: int, message: str, group_id: Optional[int] = None):
         """处理管理员指令"""
@@ -306,12 +289,20 @@ class CantStopGameBot:
                 f"Bot QQ: {self.bot.bot_qq}\n"
                 f"允许群组: {len(self.bot.allowed_groups) if self.bot.allowed_groups else '无限制'}\n"
                 f"管理员数: {len(self.admin_users)}\n"
-                f"运行状态: {'正常' if self.bot.is_connected() else '异常'}"
+                f"运行状态: {'正常' if self.bot.is_connected() else '异常'}\n"
+                f"{self.outbound.format_stats()}"
             )
             if group_id:
                 await self._send_group_at_response(user_id, status_msg, group_id)
             else:
-                await self.bot.send_private_msg(user_id, status_msg)
+                await self._send_private_response(user_id, status_msg)
+
+        elif command == "metrics" or command.startswith("metrics "):
+            response_msg = self.metrics.handle_admin_command(command[len("metrics"):])
+            if group_id:
+                await self._send_group_at_response(user_id, response_msg, group_id)
+            else:
+                await self._send_private_response(user_id, response_msg)
 
         elif command.startswith("broadcast "):
             broadcast_msg = command[10:]
@@ -320,14 +311,14 @@ class CantStopGameBot:
             if group_id:
                 await self._send_group_at_response(user_id, response_msg, group_id)
             else:
-                await self.bot.send_private_msg(user_id, response_msg)
+                await self._send_private_response(user_id, response_msg)
 
         else:
             error_msg = "[ERROR] 未知管理员指令"
             if group_id:
                 await self._send_group_at_response(user_id, error_msg, group_id)
             else:
-                await self.bot.send_private_msg(user_id, error_msg)
+                await self._send_private_response(user_id, error_msg)
 
     async def _ensure_player_exists(self, user_id: str, nickname: str) -> bool:
         """确保玩家在游戏系统中存在，返回是否为新用户"""
@@ -345,24 +336,45 @@ class CantStopGameBot:
 
     async def _send_group_response(self, msg: GroupMessage, text: str):
         """发送群响应消息"""
-        await self.bot.send_group_msg(msg.group_id, text)
+        self.outbound.submit(("group", msg.group_id), text)
 
     async def _send_group_at_response(self, user_id: int, text: str, group_id: int):
         """发送@用户的群响应消息"""
-        message = MessageBuilder().at(user_id).text(f" {text}")
-        await self.bot.send_group_msg(group_id, message)
+        message = MessageBuilder().at(user_id).text(f" {text}").build()
+        self.outbound.submit(("group", group_id), message)
+
+    async def _send_private_response(self, user_id: int, text: str):
+        """发送私聊响应消息"""
+        self.outbound.submit(("private", user_id), text)
+
+    async def _deliver_message(self, target, message):
+        """调度器的实际发送函数（开启指标时记录发送耗时）"""
+        kind, target_id = target
+        started = self.metrics.start()
+        result = None
+        try:
+            if kind == "group":
+                result = await self.bot.send_group_msg(target_id, message)
+            else:
+                result = await self.bot.send_private_msg(target_id, message)
+            return result
+        finally:
+            if started is not None:
+                success = result is not None and result.get("status") != "failed"
+                self.metrics.observe_since(self.metrics.sends, started, "lagrange", kind,
+                                           "true" if success else "false")
 
     async def _broadcast_message(self, message: str):
-        """向所有允许的群广播消息"""
+        """向所有允许的群广播消息（经调度器限速，优先级低于直接回复）"""
         if not self.bot.allowed_groups:
             return
 
         for group_id in self.bot.allowed_groups:
-            try:
-                await self.bot.send_group_msg(group_id, f"[BROADCAST] 系统广播: {message}")
-                await asyncio.sleep(0.5)  # 避免发送过快
-            except Exception as e:
-                self.logger.error(f"[ERROR] 广播到群 {group_id} 失败: {e}")
+            self.outbound.submit(
+                ("group", group_id),
+                f"[BROADCAST] 系统广播: {message}",
+                priority=PRIORITY_BROADCAST
+            )
 
     # ==================== 外部接口 ====================
 
@@ -376,11 +388,16 @@ class CantStopGameBot:
 
     async def start(self):
         """启动机器人（连接并开始监听）"""
-        await self.bot.start()
+        self.outbound.start()
+        try:
+            await self.bot.start()
+        finally:
+            await self.outbound.stop()
 
     async def stop(self):
         """停止机器人"""
         await self.bot.stop()
+        await self.outbound.stop()
 
     def is_connected(self) -> bool:
         """检查是否已连接"""
@@ -407,6 +424,10 @@ async def main():
     import os
     os.makedirs("logs", exist_ok=True)
 
+    # 开始监听前预热引擎和缓存
+    from ...services.warmup import warm_up
+    print(warm_up().format())
+
     # 创建机器人实例
     bot = CantStopGameBot(
         ws_url="ws://127.0.0.1:8080",
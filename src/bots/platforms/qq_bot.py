@@ -6,15 +6,18 @@ import asyncio
 import aiohttp
 import json
 import logging
+import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime
 from aiohttp import web
 
-from ...services.game_service import GameService
-from ...services.message_processor import MessageProcessor
+from ...services.service_registry import get_game_service
+from ...services.message_processor import MessageProcessor, UserMessage
 from ...core.event_system import emit_game_event, GameEventType
 from ..adapters.qq_message_adapter import QQMessageAdapter, MessageStyle
+from ..api.message_dedup import MessageDeduplicator, make_idempotency_key
+from ...utils.metrics import CONTENT_TYPE, get_metrics
 
 
 @dataclass
@@ -39,6 +42,7 @@ class QQMessage:
     time: int
     raw_message: str
     sender: Dict[str, Any]
+    self_id: Optional[str] = None  # 接收消息的机器人QQ号
 
 
 class QQBot:
@@ -47,14 +51,32 @@ class QQBot:
     def __init__(self,
                  onebot_url: str = "http://127.0.0.1:8080",
                  listen_host: str = "127.0.0.1",
-                 listen_port: int = 8080):
+                 listen_port: int = 8080,
+                 queue_size: int = 1000,
+                 worker_count: int = 4):
         self.onebot_url = onebot_url.rstrip('/')
         self.listen_host = listen_host
         self.listen_port = listen_port
 
+        # 事件队列：HTTP回调只负责校验和入队，由工作任务异步处理
+        # 按用户分片到各工作队列，保证同一用户的指令按顺序执行
+        self.queue_size = queue_size
+        self.worker_count = max(1, worker_count)
+        self.event_queues: List[asyncio.Queue] = []
+        self.workers: List[asyncio.Task] = []
+        self.queue_stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "processed": 0,
+            "failed": 0,
+            "total_lag": 0.0,
+            "max_lag": 0.0,
+            "last_lag": 0.0,
+        }
+
         # 游戏相关服务
-        self.game_service = GameService()
-        self.message_processor = MessageProcessor()
+        self.game_service = get_game_service()
+        self.message_processor = MessageProcessor(self.game_service)
 
         # 消息适配器
         self.message_adapter = QQMessageAdapter()
@@ -66,6 +88,9 @@ class QQBot:
         # HTTP会话
         self.http_session: Optional[aiohttp.ClientSession] = None
 
+        # 入站消息去重（OneBot上报重试会重复投递同一消息）
+        self.deduplicator = MessageDeduplicator()
+
         # 配置
         self.allowed_groups: List[str] = []  # 允许的群号列表，空表示允许所有
         self.admin_users: List[str] = []     # 管理员用户列表
@@ -73,6 +98,13 @@ class QQBot:
         # 日志
         self.logger = logging.getLogger(__name__)
 
+        # 运行指标（/metrics 与 admin_metrics）
+        self.metrics = get_metrics()
+        self.metrics.register_gauge(
+            "cantstop_queue_depth", "机器人循环的队列深度", ("queue",), "qq_bot",
+            lambda: {("qq_events",): sum(q.qsize() for q in self.event_queues)}
+        )
+
     async def start(self):
         """启动机器人"""
         self.logger.info("启动QQ机器人...")
@@ -80,10 +112,19 @@ class QQBot:
         # 创建HTTP会话
         self.http_session = aiohttp.ClientSession()
 
+        # 启动事件处理工作任务
+        per_worker_size = max(1, self.queue_size // self.worker_count)
+        self.event_queues = [asyncio.Queue(maxsize=per_worker_size)
+                             for _ in range(self.worker_count)]
+        self.workers = [asyncio.create_task(self._event_worker(queue))
+                        for queue in self.event_queues]
+
         # 创建Web服务器接收OneBot回调
         app = web.Application()
         app.router.add_post('/', self.handle_onebot_event)
         app.router.add_post('/onebot', self.handle_onebot_event)
+        app.router.add_get('/status', self.handle_status)
+        app.router.add_get('/metrics', self.handle_metrics)
 
         # 启动Web服务器
         runner = web.AppRunner(app)
@@ -96,39 +137,113 @@ class QQBot:
 
     async def stop(self):
         """停止机器人"""
+        for worker in self.workers:
+            worker.cancel()
+        if self.workers:
+            await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
         if self.http_session:
             await self.http_session.close()
         self.logger.info("QQ机器人已停止")
 
     async def handle_onebot_event(self, request):
-        """处理OneBot事件"""
+        """接收OneBot事件：校验后入队并立即应答，实际处理由工作任务完成"""
         try:
-            # 获取事件数据
             data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.Response(text='BAD REQUEST', status=400)
 
-            # 记录接收到的事件
-            self.logger.debug(f"收到OneBot事件: {data}")
-
-            # 处理不同类型的事件
-            post_type = data.get('post_type')
+        if not isinstance(data, dict) or 'post_type' not in data:
+            return web.Response(text='BAD REQUEST', status=400)
 
-            if post_type == 'message':
-                await self.handle_message_event(data)
-            elif post_type == 'notice':
-                await self.handle_notice_event(data)
-            elif post_type == 'request':
-                await self.handle_request_event(data)
-            elif post_type == 'meta_event':
-                await self.handle_meta_event(data)
+        # 记录接收到的事件
+        self.logger.debug(f"收到OneBot事件: {data}")
 
+        # 心跳无需排队
+        if data.get('post_type') == 'meta_event':
+            await self.handle_meta_event(data)
             return web.Response(text='OK')
 
-        except Exception as e:
-            self.logger.error(f"处理OneBot事件失败: {e}")
-            return web.Response(text='ERROR', status=500)
+        if not self.event_queues:
+            return web.Response(text='NOT READY', status=503)
+
+        # 按用户分片，保证同一用户的事件顺序处理
+        shard_key = str(data.get('user_id') or data.get('group_id') or '')
+        queue = self.event_queues[hash(shard_key) % len(self.event_queues)]
+        try:
+            queue.put_nowait((time.monotonic(), data))
+        except asyncio.QueueFull:
+            self.queue_stats["rejected"] += 1
+            self.logger.warning("事件队列已满，拒绝OneBot事件")
+            return web.Response(text='BUSY', status=503)
+
+        self.queue_stats["accepted"] += 1
+        return web.Response(text='OK')
+
+    async def _event_worker(self, queue: asyncio.Queue):
+        """事件处理工作任务"""
+        while True:
+            received_at, data = await queue.get()
+            lag = time.monotonic() - received_at
+            self.queue_stats["last_lag"] = lag
+            self.queue_stats["total_lag"] += lag
+            self.queue_stats["max_lag"] = max(self.queue_stats["max_lag"], lag)
+            try:
+                await self.dispatch_onebot_event(data)
+                self.queue_stats["processed"] += 1
+            except Exception as e:
+                self.queue_stats["failed"] += 1
+                self.logger.error(f"处理OneBot事件失败: {e}")
+            finally:
+                queue.task_done()
+
+    async def dispatch_onebot_event(self, data: Dict):
+        """按类型分发OneBot事件"""
+        post_type = data.get('post_type')
+
+        if post_type == 'message':
+            await self.handle_message_event(data)
+        elif post_type == 'notice':
+            await self.handle_notice_event(data)
+        elif post_type == 'request':
+            await self.handle_request_event(data)
+        elif post_type == 'meta_event':
+            await self.handle_meta_event(data)
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """获取事件队列统计（深度与处理延迟，延迟单位：毫秒）"""
+        stats = self.queue_stats
+        handled = stats["processed"] + stats["failed"]
+        return {
+            "queue_depth": sum(q.qsize() for q in self.event_queues),
+            "queue_capacity": sum(q.maxsize for q in self.event_queues),
+            "workers": len(self.workers),
+            "accepted": stats["accepted"],
+            "rejected": stats["rejected"],
+            "processed": stats["processed"],
+            "failed": stats["failed"],
+            "last_lag_ms": stats["last_lag"] * 1000,
+            "avg_lag_ms": stats["total_lag"] / handled * 1000 if handled else 0.0,
+            "max_lag_ms": stats["max_lag"] * 1000,
+        }
+
+    async def handle_status(self, request):
+        """事件队列状态接口"""
+        return web.json_response(self.get_queue_stats())
+
+    async def handle_metrics(self, request):
+        """Prometheus 文本格式的运行指标"""
+        return web.Response(body=self.metrics.render().encode("utf-8"),
+                            headers={"Content-Type": CONTENT_TYPE})
 
     async def handle_message_event(self, data: Dict):
         """处理消息事件"""
+        # 重复投递的消息在任何数据库操作之前丢弃
+        if self.deduplicator.is_duplicate(data.get('self_id'), data.get('message_id')):
+            self.logger.info(f"忽略重复消息: {data.get('message_id')}")
+            return
+
         try:
             # 解析消息数据
             message_data = QQMessage(
@@ -140,7 +255,8 @@ class QQBot:
                 sub_type=data.get('sub_type', ''),
                 time=data.get('time'),
                 raw_message=data.get('raw_message', ''),
-                sender=data.get('sender', {})
+                sender=data.get('sender', {}),
+                self_id=str(data.get('self_id', ''))
             )
 
             # 检查是否是允许的群
@@ -188,11 +304,19 @@ class QQBot:
         self.logger.info(f"用户 {user_info.nickname}({user_id}) 发送消息: {message}")
 
         try:
+            # 管理员查看/开关运行指标
+            if user_info.is_admin and message.startswith("admin_metrics"):
+                response = self.metrics.handle_admin_command(message[len("admin_metrics"):])
+                await self.send_message(message_data, response)
+                return
+
             # 确保用户在游戏系统中存在
             await self.ensure_player_exists(user_id, user_info.nickname)
 
             # 处理游戏指令
-            success, response = await self.process_game_command(user_id, message)
+            idempotency_key = make_idempotency_key(message_data.self_id, message_data.message_id)
+            group_id = message_data.group_id if message_data.message_type == 'group' else None
+            success, response = await self.process_game_command(user_id, message, idempotency_key, group_id)
 
             # 发送响应（只有当response不为None时才发送）
             if response:
@@ -220,11 +344,16 @@ class QQBot:
             if not success:
                 self.logger.warning(f"自动注册玩家失败: {message}")
 
-    async def process_game_command(self, user_id: str, message: str) -> tuple[bool, str]:
+    async def process_game_command(self, user_id: str, message: str,
+                                   idempotency_key: Optional[str] = None,
+                                   group_id: Optional[str] = None) -> tuple[bool, str]:
         """处理游戏指令"""
         try:
-            # 使用消息处理器处理指令
-            success, response = self.message_processor.process_message(user_id, message)
+            # 使用消息处理器处理指令（已在事件循环中，直接等待异步接口）
+            user_message = UserMessage(user_id=user_id, username="", content=message,
+                                       group_id=group_id, idempotency_key=idempotency_key)
+            result = await self.message_processor.process_message_async(user_message)
+            success, response = True, result.content if result else None
 
             # 格式化响应消息
             if response:
@@ -283,15 +412,29 @@ class QQBot:
                 }
 
             # 发送HTTP请求
-            async with self.http_session.post(api_url, json=params) as response:
-                if response.status == 200:
-                    self.logger.debug(f"消息发送成功: {content[:50]}...")
-                else:
-                    self.logger.error(f"消息发送失败: {response.status}")
+            status = await self._post_onebot(api_url, params)
+            if status == 200:
+                self.logger.debug(f"消息发送成功: {content[:50]}...")
+            else:
+                self.logger.error(f"消息发送失败: {status}")
 
         except Exception as e:
             self.logger.error(f"发送消息失败: {e}")
 
+    async def _post_onebot(self, api_url: str, params: Dict) -> int:
+        """调用OneBot发送接口，返回HTTP状态码（开启指标时记录发送耗时）"""
+        started = self.metrics.start()
+        status = 0
+        try:
+            async with self.http_session.post(api_url, json=params) as response:
+                status = response.status
+                return status
+        finally:
+            if started is not None:
+                target = "group" if "group_id" in params else "private"
+                self.metrics.observe_since(self.metrics.sends, started, "qq", target,
+                                           "true" if status == 200 else "false")
+
     async def handle_notice_event(self, data: Dict):
         """处理通知事件（群员变动等）"""
         notice_type = data.get('notice_type')
@@ -334,9 +477,9 @@ class QQBot:
                 "message": message
             }
 
-            async with self.http_session.post(api_url, json=params) as response:
-                if response.status != 200:
-                    self.logger.error(f"发送群消息失败: {response.status}")
+            status = await self._post_onebot(api_url, params)
+            if status != 200:
+                self.logger.error(f"发送群消息失败: {status}")
 
         except Exception as e:
             self.logger.error(f"发送群消息失败: {e}")
@@ -350,9 +493,9 @@ class QQBot:
                 "message": message
             }
 
-            async with self.http_session.post(api_url, json=params) as response:
-                if response.status != 200:
-                    self.logger.error(f"发送私聊消息失败: {response.status}")
+            status = await self._post_onebot(api_url, params)
+            if status != 200:
+                self.logger.error(f"发送私聊消息失败: {status}")
 
         except Exception as e:
             self.logger.error(f"发送私聊消息失败: {e}")
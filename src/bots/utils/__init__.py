@@ -1,9 +1,18 @@
 """
 工具模块
 
-提供调试和辅助功能
+提供调试、出站消息调度、群消息预过滤等辅助功能
 """
 
-from .debug_tools import MessageDebugger
+from .outbound_scheduler import OutboundScheduler, TokenBucket
+from .message_filter import GameMessageFilter
 
-__all__ = ['MessageDebugger']
\ No newline at end of file
+__all__ = ['MessageDebugger', 'OutboundScheduler', 'TokenBucket', 'GameMessageFilter']
+
+
+def __getattr__(name):
+    # 延迟导入避免依赖问题（调试工具依赖 websockets）
+    if name == 'MessageDebugger':
+        from .debug_tools import MessageDebugger
+        return MessageDebugger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,102 @@
+"""
+群消息预过滤 - 快速判断一条群消息是否可能是游戏指令
+
+大部分群聊内容与机器人无关，过滤器把关键词表和指令路由的词汇预先编译成
+单个正则交替式，一次线性扫描即可拒绝非游戏消息。
+"""
+
+import re
+from typing import Iterable, Optional
+
+# 看起来像游戏指令的关键词（任意长度的消息中出现即响应）
+GAME_KEYWORDS = (
+    "轮次开始", "r6d6", "选择数值", "替换永久", "继续", "打卡完毕",
+    "查看当前进度", "掷骰风险", "策略建议", "重试回合", "help", "帮助", "选择阵营", "领取", "排行榜",
+    "选择", "数值", "骰子", "重投", "登顶", "我超级满意",
+    "道具商店", "查看库存", "我的道具", "背包", "查看背包",
+    "购买", "捏捏", "使用", "查看成就", "恢复游戏",
+)
+
+# 常见的遭遇/道具选择关键词（仅对短消息生效）
+CHOICE_KEYWORDS = (
+    # 同意/拒绝类
+    "好呀", "还是算了", "好啊", "好", "不了", "谢谢", "参加", "不参加",
+    # 动作类
+    "继续", "休息", "靠近", "逃跑", "帮忙", "不帮", "观看", "绕过",
+    "看看", "过去", "未来", "听故事", "不听", "借书", "不借", "加入",
+    "戴上", "不戴", "走了", "走开", "前进", "仔细",
+    # 触摸/互动类
+    "摸摸", "敲敲", "浇水", "数羊", "吐槽", "夸赞", "尝试", "修复",
+    # 选择类
+    "红色", "蓝色", "甜的", "辣的", "吓死", "申请", "想要",
+    # 特殊选项
+    "321", "啊啊", "仔细观赏", "静静", "快速", "慢慢", "深度",
+)
+
+# 选择关键词只对不超过该长度的消息生效
+SHORT_MESSAGE_LENGTH = 20
+
+# 结构化指令：数字组合、数列X登顶、编号选项（如 "1. 好呀好呀"）
+STRUCTURED_COMMAND_PATTERN = re.compile(
+    r'\d+\s*(?:,\s*\d+)?\s*$'
+    r'|数列\d+登顶$'
+    r'|\d+\.\s*.'
+)
+
+
+def compile_keywords(keywords: Iterable[str]) -> Optional["re.Pattern"]:
+    """将关键词编译为单个交替式正则（长词优先），无关键词时返回 None"""
+    unique = sorted(set(k for k in keywords if k), key=len, reverse=True)
+    if not unique:
+        return None
+    return re.compile("|".join(re.escape(k) for k in unique))
+
+
+class GameMessageFilter:
+    """游戏指令预过滤器"""
+
+    def __init__(
+        self,
+        game_keywords: Iterable[str] = GAME_KEYWORDS,
+        choice_keywords: Iterable[str] = CHOICE_KEYWORDS,
+        commands: Iterable[str] = (),
+        short_length: int = SHORT_MESSAGE_LENGTH
+    ):
+        """
+        初始化过滤器
+
+        Args:
+            game_keywords: 任意长度消息中出现即响应的关键词
+            choice_keywords: 仅对短消息生效的选择关键词
+            commands: 指令路由的精确指令词汇（消息完全等于指令时响应）
+            short_length: 短消息的长度上限
+        """
+        self.short_length = short_length
+        self.commands = frozenset(c.strip() for c in commands if c and c.strip())
+        self._game_pattern = compile_keywords(game_keywords)
+        self._choice_pattern = compile_keywords(choice_keywords)
+
+    def should_respond(self, text: str) -> bool:
+        """判断消息文本是否可能是游戏指令"""
+        stripped = text.strip()
+        if not stripped:
+            return False
+
+        # 精确指令
+        if stripped in self.commands:
+            return True
+
+        # 结构化指令（数字组合、登顶确认、编号选项）；isdecimal 与 \d 一致，包括全角数字
+        first = stripped[0]
+        if (first.isdecimal() or first == '数') and STRUCTURED_COMMAND_PATTERN.match(stripped):
+            return True
+
+        # 游戏关键词
+        if self._game_pattern is not None and self._game_pattern.search(text):
+            return True
+
+        # 短消息检查选择关键词
+        if len(stripped) <= self.short_length and self._choice_pattern is not None:
+            return self._choice_pattern.search(text) is not None
+
+        return False
@@ -0,0 +1,367 @@
+"""
+出站消息调度器 - 令牌桶限速、同群合并与优先级发送
+
+所有发往QQ的消息先进入调度器，由单个发送任务按以下规则发出：
+- 每个目标（群/私聊）一个令牌桶，另有一个全局令牌桶
+- 同一目标在合并窗口内的多条待发消息合并为一条（不超过最大长度）
+- 同一目标同时只有一批在途，保证消息按顺序到达；不同目标可同时发送
+- 直接回复优先于广播
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+# 优先级：数值越小越优先
+PRIORITY_REPLY = 0
+PRIORITY_BROADCAST = 1
+
+# 发送目标：("group", 群号) 或 ("private", QQ号)
+Target = Tuple[str, int]
+MessageContent = Union[str, List[Dict[str, Any]]]
+
+
+@dataclass
+class TokenBucket:
+    """令牌桶"""
+    rate: float          # 每秒补充的令牌数
+    capacity: float      # 桶容量（允许的突发量）
+    tokens: float = -1.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = self.capacity
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """距离可取得一个令牌还需等待的秒数"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        """取走一个令牌（调用前应确认 wait_time 为0）"""
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass
+class OutboundMessage:
+    """待发送的消息"""
+    target: Target
+    content: MessageContent
+    priority: int
+    enqueued_at: float
+    future: asyncio.Future
+
+
+def _content_length(content: MessageContent) -> int:
+    """计算消息中文本部分的长度"""
+    if isinstance(content, str):
+        return len(content)
+    return sum(len(seg.get("data", {}).get("text", ""))
+               for seg in content if seg.get("type") == "text")
+
+
+def _merge_contents(contents: List[MessageContent]) -> MessageContent:
+    """将多条消息合并为一条，消息之间以空行分隔"""
+    if all(isinstance(c, str) for c in contents):
+        return "\n\n".join(contents)
+
+    merged: List[Dict[str, Any]] = []
+    for content in contents:
+        if merged:
+            merged.append({"type": "text", "data": {"text": "\n\n"}})
+        if isinstance(content, str):
+            merged.append({"type": "text", "data": {"text": content}})
+        else:
+            merged.extend(content)
+    return merged
+
+
+def _retrieve_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+class OutboundScheduler:
+    """出站消息调度器"""
+
+    def __init__(
+        self,
+        send_func: Callable[[Target, MessageContent], Awaitable[Any]],
+        max_length: int = 1000,
+        target_rate: float = 1.0,
+        target_burst: float = 3,
+        global_rate: float = 5.0,
+        global_burst: float = 10,
+        coalesce_window: float = 0.3,
+        latency_samples: int = 1000
+    ):
+        """
+        初始化调度器
+
+        Args:
+            send_func: 实际发送函数，参数为 (目标, 消息内容)
+            max_length: 合并后消息的最大文本长度（与适配器的长度限制一致）
+            target_rate: 单个群/私聊每秒可发送的消息数
+            target_burst: 单个群/私聊允许的突发消息数
+            global_rate: 全局每秒可发送的消息数
+            global_burst: 全局允许的突发消息数
+            coalesce_window: 合并窗口（秒），消息入队后至少等待该时长以便合并
+            latency_samples: 保留用于统计分位数的排队延迟样本数
+        """
+        self.send_func = send_func
+        self.max_length = max_length
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.coalesce_window = coalesce_window
+
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.target_buckets: Dict[Target, TokenBucket] = {}
+        self.queues: Dict[Target, Deque[OutboundMessage]] = {}
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._send_tasks: set = set()
+        # 有一批消息正在发送的目标
+        self._in_flight: set = set()
+        self._last_prune = time.monotonic()
+
+        # 统计
+        self.sent_messages = 0
+        self.sent_batches = 0
+        self.failed_batches = 0
+        self.measured_messages = 0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.latencies: Deque[float] = deque(maxlen=latency_samples)
+
+        self.logger = logging.getLogger(__name__)
+
+    # ==================== 生命周期 ====================
+
+    def start(self):
+        """启动发送任务（需在事件循环中调用）"""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止发送任务，未发送的消息以取消结束"""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for queue in self.queues.values():
+            for item in queue:
+                if not item.future.done():
+                    item.future.cancel()
+        self.queues.clear()
+
+    # ==================== 入队 ====================
+
+    def submit(self, target: Target, content: MessageContent,
+               priority: int = PRIORITY_REPLY) -> asyncio.Future:
+        """
+        提交一条待发送消息
+
+        Returns:
+            发送完成（或失败）时结束的 Future
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        # 调用方通常不等待结果，发送失败的异常在此取走，避免 "exception was never retrieved"
+        future.add_done_callback(_retrieve_exception)
+        item = OutboundMessage(target, content, priority, time.monotonic(), future)
+        queue = self.queues.setdefault(target, deque())
+
+        # 同一目标内按优先级插队，同优先级保持先后顺序
+        position = len(queue)
+        while position > 0 and queue[position - 1].priority > priority:
+            position -= 1
+        queue.insert(position, item)
+        self._wakeup.set()
+        return future
+
+    def queue_depth(self) -> int:
+        """当前排队中的消息数"""
+        return sum(len(q) for q in self.queues.values())
+
+    # ==================== 调度 ====================
+
+    # 清理空闲令牌桶的间隔（秒）
+    PRUNE_INTERVAL = 60.0
+
+    def _bucket_for(self, target: Target) -> TokenBucket:
+        bucket = self.target_buckets.get(target)
+        if bucket is None:
+            bucket = TokenBucket(self.target_rate, self.target_burst)
+            self.target_buckets[target] = bucket
+        return bucket
+
+    def _prune_buckets(self, now: float):
+        """移除已回满且无待发消息的目标令牌桶（满桶与新建的桶等价）"""
+        self._last_prune = now
+        for target in list(self.target_buckets):
+            if target in self.queues or target in self._in_flight:
+                continue
+            bucket = self.target_buckets[target]
+            if bucket.wait_time(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self.target_buckets[target]
+
+    def _pick(self, now: float) -> Tuple[Optional[Target], float]:
+        """
+        选出下一个可发送的目标
+
+        Returns:
+            (目标, 0) 或 (None, 需等待的秒数)；无待发消息时等待时间为 None
+        """
+        best_key = None
+        best_target = None
+        wait: Optional[float] = None
+
+        for target, queue in self.queues.items():
+            if not queue or target in self._in_flight:
+                continue
+            head = queue[0]
+            ready_in = max(head.enqueued_at + self.coalesce_window - now,
+                           self._bucket_for(target).wait_time(now))
+            if ready_in > 0:
+                wait = ready_in if wait is None else min(wait, ready_in)
+                continue
+            key = (head.priority, head.enqueued_at)
+            if best_key is None or key < best_key:
+                best_key, best_target = key, target
+
+        if best_target is not None:
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                return None, global_wait
+            return best_target, 0.0
+        return None, wait
+
+    def _take_batch(self, target: Target) -> List[OutboundMessage]:
+        """从目标队列取出可合并的一批消息（同优先级、总长度不超限）"""
+        queue = self.queues[target]
+        batch = [queue.popleft()]
+        length = _content_length(batch[0].content)
+        while queue and queue[0].priority == batch[0].priority:
+            next_length = length + 2 + _content_length(queue[0].content)
+            if next_length > self.max_length:
+                break
+            batch.append(queue.popleft())
+            length = next_length
+        if not queue:
+            del self.queues[target]
+        return batch
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            if now - self._last_prune >= self.PRUNE_INTERVAL:
+                self._prune_buckets(now)
+            target, wait = self._pick(now)
+
+            if target is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.global_bucket.consume(now)
+            self._bucket_for(target).consume(now)
+            batch = self._take_batch(target)
+
+            # 发送不阻塞调度循环，不同目标可同时在途，同一目标等上一批完成
+            self._in_flight.add(target)
+            task = asyncio.create_task(self._send_batch(target, batch))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+
+    async def _send_batch(self, target: Target, batch: List[OutboundMessage]):
+        try:
+            await self._deliver(target, batch)
+        finally:
+            self._in_flight.discard(target)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _deliver(self, target: Target, batch: List[OutboundMessage]):
+        started = time.monotonic()
+        for item in batch:
+            latency = started - item.enqueued_at
+            self.latencies.append(latency)
+            self.measured_messages += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+        content = batch[0].content if len(batch) == 1 else _merge_contents(
+            [item.content for item in batch])
+        try:
+            result = await self.send_func(target, content)
+        except Exception as e:
+            self.failed_batches += 1
+            self.logger.error(f"[ERROR] 发送到 {target[0]}:{target[1]} 失败: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.sent_batches += 1
+        self.sent_messages += len(batch)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(result)
+
+    # ==================== 统计 ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取发送队列统计信息（延迟单位：毫秒）"""
+        samples = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        return {
+            "queue_depth": self.queue_depth(),
+            "sent_messages": self.sent_messages,
+            "sent_batches": self.sent_batches,
+            "failed_batches": self.failed_batches,
+            "avg_latency_ms": (self.total_latency / self.measured_messages * 1000
+                               if self.measured_messages else 0.0),
+            "p50_latency_ms": percentile(0.5),
+            "p95_latency_ms": percentile(0.95),
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        stats = self.get_stats()
+        return (
+            f"发送队列: {stats['queue_depth']} 条待发\n"
+            f"已发送: {stats['sent_messages']} 条 / {stats['sent_batches']} 批"
+            f"（失败 {stats['failed_batches']} 批）\n"
+            f"排队延迟: 平均 {stats['avg_latency_ms']:.0f}ms, "
+            f"P50 {stats['p50_latency_ms']:.0f}ms, "
+            f"P95 {stats['p95_latency_ms']:.0f}ms, "
+            f"最大 {stats['max_latency_ms']:.0f}ms"
+        )
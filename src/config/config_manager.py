@@ -1,20 +1,94 @@
 """
 配置管理器
 统一管理所有游戏配置
+
+读取走不可变的扁平化快照：每次加载或修改都会生成新快照并递增版本号，
+"game.dice_cost" 这样的点分路径在快照中是一次字典查找。依赖配置的缓存
+可以记录 version，版本变化时再重建。
 """
 
+import atexit
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+
+# set() 之后延迟写盘的时间（秒），窗口内的多次修改合并为一次写入
+DEFAULT_SAVE_DELAY = 0.5
+# 热重载轮询间隔（秒）
+DEFAULT_WATCH_INTERVAL = 1.0
+
+
+def _flatten(config_name: str, node: Any, prefix: str, values: Dict[Tuple[str, Optional[str]], Any]):
+    """把嵌套字典展开为 (配置名, 点分路径) -> 值，中间层字典同样可查"""
+    for key, value in node.items():
+        # 含 "." 的键无法通过点分路径访问，与逐层查找的行为保持一致
+        if not isinstance(key, str) or '.' in key:
+            continue
+        path = f"{prefix}.{key}" if prefix else key
+        values[(config_name, path)] = value
+        if isinstance(value, dict):
+            _flatten(config_name, value, path, values)
+
+
+class ConfigSnapshot:
+    """不可变的扁平化配置快照（返回的字典/列表属于快照，调用方不应修改）"""
+
+    __slots__ = ("version", "configs", "_values")
+
+    def __init__(self, version: int, configs: Dict[str, Any]):
+        self.version = version
+        self.configs = MappingProxyType(configs)
+        values: Dict[Tuple[str, Optional[str]], Any] = {}
+        for config_name, config in configs.items():
+            values[(config_name, None)] = config
+            if isinstance(config, dict):
+                _flatten(config_name, config, "", values)
+        self._values = values
+
+    def get(self, config_name: str, key_path: str = None, default=None):
+        """O(1) 查找配置值"""
+        return self._values.get((config_name, key_path), default)
 
 
 class ConfigManager:
     """配置管理器"""
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(self, config_dir: str = "config", save_delay: float = DEFAULT_SAVE_DELAY):
+        """
+        初始化配置管理器
+
+        Args:
+            config_dir: 配置目录
+            save_delay: set() 后延迟写盘的时间（秒），0 表示立即写入
+        """
         self.config_dir = config_dir
+        self.save_delay = save_delay
         self._configs = {}
+        self._lock = threading.RLock()
+        self._version = 0
+        self._snapshot = ConfigSnapshot(0, {})
+        # 文件指纹 (mtime_ns, size)，用于热重载检测
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        self._dirty = set()
+        self._save_timer: Optional[threading.Timer] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
         self._load_all_configs()
+        self._publish()
+        atexit.register(self.flush)
+
+    @property
+    def version(self) -> int:
+        """配置版本号（单调递增）"""
+        return self._snapshot.version
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照"""
+        return self._snapshot
 
     def _load_all_configs(self):
         """加载所有配置文件"""
@@ -24,14 +98,50 @@ class ConfigManager:
 
         for filename in os.listdir(self.config_dir):
             if filename.endswith('.json'):
-                config_name = filename[:-5]  # 移除 .json 扩展名
-                file_path = os.path.join(self.config_dir, filename)
+                self._load_config_file(filename)
 
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        self._configs[config_name] = json.load(f)
-                except Exception as e:
-                    print(f"警告：无法加载配置文件 {filename}: {e}")
+    def _load_config_file(self, filename: str):
+        config_name = filename[:-5]  # 移除 .json 扩展名
+        file_path = os.path.join(self.config_dir, filename)
+        try:
+            self._file_stats[filename] = self._stat(file_path)
+            self._configs[config_name] = self._read_json(file_path)
+        except Exception as e:
+            print(f"警告：无法加载配置文件 {filename}: {e}")
+
+    @staticmethod
+    def _stat(file_path: str) -> Tuple[int, int]:
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _read_json(file_path: str):
+        """读取配置文件，优先使用编译后的内容包"""
+        try:
+            from ..core.content_pack import load_json_config
+        except ImportError:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return load_json_config(file_path)
+
+    def _publish(self, changed: Optional[str] = None):
+        """
+        发布新快照
+
+        Args:
+            changed: 只有该配置发生变化时传入配置名，其余配置复用上一快照的对象
+        """
+        with self._lock:
+            if changed is None:
+                configs = copy.deepcopy(self._configs)
+            else:
+                configs = dict(self._snapshot.configs)
+                if changed in self._configs:
+                    configs[changed] = copy.deepcopy(self._configs[changed])
+                else:
+                    configs.pop(changed, None)
+            self._version += 1
+            self._snapshot = ConfigSnapshot(self._version, configs)
 
     def get(self, config_name: str, key_path: str = None, default=None):
         """
@@ -42,74 +152,157 @@ class ConfigManager:
             key_path: 配置键路径，用.分隔（如 "database.url"）
             default: 默认值
         """
-        if config_name not in self._configs:
-            return default
-
-        config = self._configs[config_name]
-
-        if key_path is None:
-            return config
-
-        keys = key_path.split('.')
-        current = config
-
-        for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
-                return default
-
-        return current
+        return self._snapshot.get(config_name, key_path, default)
 
     def set(self, config_name: str, key_path: str, value: Any):
         """
         设置配置值并保存到文件
 
+        新值立即对读取可见；写盘延迟 save_delay 秒，窗口内的多次修改合并为一次原子写入。
+
         Args:
             config_name: 配置文件名（不含.json）
             key_path: 配置键路径，用.分隔
             value: 配置值
         """
-        if config_name not in self._configs:
-            self._configs[config_name] = {}
+        with self._lock:
+            if config_name not in self._configs:
+                self._configs[config_name] = {}
 
-        config = self._configs[config_name]
-        keys = key_path.split('.')
-        current = config
+            config = self._configs[config_name]
+            keys = key_path.split('.')
+            current = config
 
-        # 导航到目标位置，创建中间字典
-        for key in keys[:-1]:
-            if key not in current:
-                current[key] = {}
-            current = current[key]
+            # 导航到目标位置，创建中间字典
+            for key in keys[:-1]:
+                if key not in current:
+                    current[key] = {}
+                current = current[key]
 
-        # 设置最终值
-        current[keys[-1]] = value
+            # 设置最终值
+            current[keys[-1]] = value
 
-        # 保存到文件
-        self._save_config(config_name)
+            self._publish(config_name)
+
+            # 保存到文件
+            self._dirty.add(config_name)
+            self._schedule_save()
+
+    def _schedule_save(self):
+        """（重新）开始延迟写盘计时"""
+        if self.save_delay <= 0:
+            self.flush()
+            return
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(self.save_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """立即写入所有待保存的配置"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            dirty, self._dirty = self._dirty, set()
+            for config_name in dirty:
+                self._save_config(config_name)
 
     def _save_config(self, config_name: str):
-        """保存配置到文件"""
+        """保存配置到文件（写临时文件后原子替换）"""
         if config_name not in self._configs:
             return
 
-        file_path = os.path.join(self.config_dir, f"{config_name}.json")
+        filename = f"{config_name}.json"
+        file_path = os.path.join(self.config_dir, filename)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
 
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(self._configs[config_name], f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, file_path)
+            # 记录自己写入后的指纹，避免热重载把刚保存的文件再读一遍
+            self._file_stats[filename] = self._stat(file_path)
         except Exception as e:
             print(f"错误：无法保存配置文件 {config_name}.json: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
     def reload(self):
         """重新加载所有配置"""
-        self._configs.clear()
-        self._load_all_configs()
+        with self._lock:
+            self._configs.clear()
+            self._file_stats.clear()
+            self._load_all_configs()
+            self._publish()
+
+    # ==================== 热重载 ====================
+
+    def check_for_changes(self) -> bool:
+        """
+        检查配置文件是否被外部修改，变化的文件重新加载并发布新快照
+
+        Returns:
+            是否有配置发生变化
+        """
+        if not os.path.isdir(self.config_dir):
+            return False
+
+        current = {}
+        for filename in os.listdir(self.config_dir):
+            if filename.endswith('.json'):
+                try:
+                    current[filename] = self._stat(os.path.join(self.config_dir, filename))
+                except OSError:
+                    continue
+
+        with self._lock:
+            changed = [name for name, stat in current.items() if self._file_stats.get(name) != stat]
+            removed = [name for name in self._file_stats if name not in current]
+            if not changed and not removed:
+                return False
+
+            for filename in removed:
+                self._file_stats.pop(filename, None)
+                self._configs.pop(filename[:-5], None)
+                self._dirty.discard(filename[:-5])
+            for filename in changed:
+                # 外部修改优先于尚未写盘的本地修改
+                self._dirty.discard(filename[:-5])
+                self._load_config_file(filename)
+            self._publish()
+            print(f"配置已热重载: {', '.join(sorted(changed + removed))}（版本 {self._version}）")
+            return True
+
+    def start_watching(self, interval: float = DEFAULT_WATCH_INTERVAL):
+        """启动后台线程按修改时间轮询配置目录"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="config-watcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        """停止热重载轮询"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    def _watch_loop(self, interval: float):
+        while not self._watch_stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"警告：配置热重载失败: {e}")
 
     def get_all_configs(self) -> Dict[str, Any]:
         """获取所有配置"""
-        return self._configs.copy()
+        return dict(self._snapshot.configs)
 
 
 # 全局配置管理器实例
@@ -126,4 +319,9 @@ def get_config_manager() -> ConfigManager:
 
 def get_config(config_name: str, key_path: str = None, default=None):
     """快速获取配置值"""
-    return get_config_manager().get(config_name, key_path, default)
\ No newline at end of file
+    return get_config_manager().get(config_name, key_path, default)
+
+
+def get_config_version() -> int:
+    """获取当前配置版本号，依赖配置的缓存可据此判断是否需要重建"""
+    return get_config_manager().version
@@ -0,0 +1,202 @@
+"""
+批量骰子 - 模拟与统计用的向量化掷骰和结果判定
+
+交互对局仍由 GameEngine.roll_dice 逐次掷骰。大批量模拟时，本模块一次生成 (N, 6) 的骰子矩阵，
+用广播计算全部 20 种 3+3 分组（含两组互换）的两组点数和 (N, 20, 2)，再把每次结果化为"可组合出的列"位掩码；
+局面同样化为"可推进一格的列"位掩码，两者按位与为 0 即爆掉，一批局面只需一次数组运算。
+
+位掩码: 第 (列号 - 3) 位表示该列，16 列共 16 位。
+
+安装 NumPy 时使用向量化实现（骰子矩阵为 int8，掩码为 uint32 数组）；
+未安装时退回纯 Python 实现，接口相同但返回列表。
+"""
+
+import random
+from collections import Counter
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+from ..models.game_models import (
+    DiceRoll, PlayerProgress, TemporaryMarker, MIN_COLUMN, MAX_COLUMN, _DICE_SPLITS, get_column_length
+)
+
+MAX_TEMPORARY_MARKERS = 3
+DEFAULT_BLOCK_SIZE = 4096
+
+# 分组下标 (20, 2, 3)：rolls[:, _SPLIT_INDEX] 的形状为 (N, 20, 2, 3)
+_SPLIT_INDEX = np.array([[group1, group2] for group1, group2 in _DICE_SPLITS], dtype=np.intp) if HAS_NUMPY else None
+
+# 单次结果的掩码只取决于点数多重集，按排序后的点数缓存
+_ROLL_MASK_CACHE: Dict[Tuple[int, ...], int] = {}
+
+
+# ==================== 单次（标量）判定 ====================
+
+def column_bit(column: int) -> int:
+    """列号对应的掩码位"""
+    return 1 << (column - MIN_COLUMN)
+
+
+def roll_mask(results: Iterable[int]) -> int:
+    """一次掷骰能组合出的所有列的掩码"""
+    key = tuple(sorted(results))
+    mask = _ROLL_MASK_CACHE.get(key)
+    if mask is None:
+        mask = 0
+        for first, second in DiceRoll(list(key)).get_possible_combinations():
+            mask |= column_bit(first) | column_bit(second)
+        _ROLL_MASK_CACHE[key] = mask
+    return mask
+
+
+def available_mask(progress: PlayerProgress, markers: Iterable[TemporaryMarker]) -> int:
+    """
+    局面中可推进一格的列的掩码
+
+    列未登顶且还有空位；临时标记已放满 3 个时只能推进已有标记的列。
+    """
+    markers = list(markers)
+    positions = {marker.column: marker.position for marker in markers}
+    if len(markers) >= MAX_TEMPORARY_MARKERS:
+        columns = positions
+    else:
+        columns = range(MIN_COLUMN, MAX_COLUMN + 1)
+
+    mask = 0
+    for column in columns:
+        if progress.get_progress(column) + positions.get(column, 0) < get_column_length(column):
+            mask |= column_bit(column)
+    return mask
+
+
+def is_bust(results: Iterable[int], progress: PlayerProgress, markers: Iterable[TemporaryMarker]) -> bool:
+    """
+    掷出 results 后是否没有任何合法移动
+
+    非首轮时与逐个检查 GameEngine.can_move_markers 的结论完全一致；
+    首轮必须移动两列，此处返回 False 时仍可能因没有合法的双列移动而爆掉。
+    """
+    return roll_mask(results) & available_mask(progress, markers) == 0
+
+
+# ==================== 批量判定 ====================
+
+def roll_batch(count: int, rng=None):
+    """
+    一次生成 count 次掷骰
+
+    Args:
+        count: 掷骰次数
+        rng: NumPy 时为 numpy.random.Generator，否则为 random.Random（默认新建）
+
+    Returns:
+        (count, 6) 的 int8 数组；无 NumPy 时为 count 个长度 6 的列表
+    """
+    if HAS_NUMPY:
+        rng = rng if rng is not None else np.random.default_rng()
+        return rng.integers(1, 7, size=(count, 6), dtype=np.int8)
+
+    rng = rng if rng is not None else random.Random()
+    flat = rng.choices(range(1, 7), k=6 * count)
+    return [flat[i:i + 6] for i in range(0, 6 * count, 6)]
+
+
+def all_outcomes():
+    """全部 6^6 种掷骰结果（字典序）"""
+    if HAS_NUMPY:
+        return np.array(list(product(range(1, 7), repeat=6)), dtype=np.int8)
+    return [list(results) for results in product(range(1, 7), repeat=6)]
+
+
+def split_sums(rolls):
+    """
+    每次掷骰 20 种 3+3 分组的两组点数和
+
+    Returns:
+        (N, 20, 2) 的数组；无 NumPy 时为嵌套列表
+    """
+    if HAS_NUMPY:
+        return np.asarray(rolls, dtype=np.int8)[:, _SPLIT_INDEX].sum(axis=-1, dtype=np.int8)
+
+    return [
+        [(r[a] + r[b] + r[c], r[d] + r[e] + r[f]) for (a, b, c), (d, e, f) in _DICE_SPLITS]
+        for r in rolls
+    ]
+
+
+def reach_masks(rolls):
+    """每次掷骰能组合出的列的掩码，形状 (N,)"""
+    if HAS_NUMPY:
+        sums = split_sums(rolls).reshape(len(rolls), -1)
+        bits = np.left_shift(np.uint32(1), (sums - MIN_COLUMN).astype(np.uint32))
+        return np.bitwise_or.reduce(bits, axis=1)
+    return [roll_mask(r) for r in rolls]
+
+
+def bust_flags(roll_masks, board_masks):
+    """
+    逐对判定爆掉：第 i 次掷骰落在第 i 个局面上
+
+    board_masks 也可以是单个整数（所有掷骰共用一个局面）。
+    """
+    if HAS_NUMPY:
+        return (np.asarray(roll_masks, dtype=np.uint32) & np.asarray(board_masks, dtype=np.uint32)) == 0
+    if isinstance(board_masks, int):
+        return [mask & board_masks == 0 for mask in roll_masks]
+    return [mask & board == 0 for mask, board in zip(roll_masks, board_masks)]
+
+
+def bust_matrix(roll_masks, board_masks):
+    """每次掷骰对每个局面是否爆掉，形状 (掷骰数, 局面数)"""
+    if HAS_NUMPY:
+        rolls = np.asarray(roll_masks, dtype=np.uint32)
+        boards = np.asarray(board_masks, dtype=np.uint32)
+        return (rolls[:, None] & boards[None, :]) == 0
+    boards = list(board_masks)
+    return [[mask & board == 0 for board in boards] for mask in roll_masks]
+
+
+def mask_histogram(rolls) -> Counter:
+    """按可组合列掩码统计掷骰次数"""
+    masks = reach_masks(rolls)
+    if HAS_NUMPY:
+        values, counts = np.unique(masks, return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+    return Counter(masks)
+
+
+# ==================== 骰子流 ====================
+
+class DiceStream:
+    """
+    按块预生成的骰子流
+
+    每次调用返回一次掷骰的 6 个点数（列表）。用作 GameEngine.dice_source 时，
+    大批量模拟不再为每颗骰子调用一次 random.randint。
+    """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None):
+        """重新播种并丢弃已生成的骰子"""
+        self._rng = np.random.default_rng(seed) if HAS_NUMPY else random.Random(seed)
+        self._block: List[List[int]] = []
+        self._next = 0
+
+    def __call__(self) -> List[int]:
+        if self._next >= len(self._block):
+            block = roll_batch(self.block_size, self._rng)
+            self._block = block.tolist() if HAS_NUMPY else block
+            self._next = 0
+        results = self._block[self._next]
+        self._next += 1
+        return results
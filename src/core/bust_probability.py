@@ -0,0 +1,174 @@
+"""
+掷骰风险表 - "还要继续掷吗？"的精确概率
+
+三个临时标记都已放下后，下一次掷骰只要组合不出任何一个标记所在的列就会被动停止（爆掉）。
+本模块预先枚举 6d6 全部 46656 种结果，按本变体的 3+3 分组规则
+（DiceRoll.get_possible_combinations）统计任意三列（允许重复，共 816 种无序组合）
+至少有一列可推进的结果数，写入随代码发布的二进制表，运行时以 mmap 只读映射，查表即为一次下标访问。
+
+表文件格式:
+    8 字节魔数 b"CSBUST01"
+    16×16×16 个 uint16（小端），下标 (a-3)*256 + (b-3)*16 + (c-3)
+    值 = 46656 种结果中至少能组合出 a、b、c 之一的结果数
+三列的所有排列都写入，查表前无需排序。
+
+重新生成: python -m src.core.bust_probability
+"""
+
+import mmap
+import os
+import sys
+from array import array
+from itertools import combinations_with_replacement, permutations
+from typing import Iterable, List, Optional, Sequence
+
+from ..models.game_models import (
+    PlayerProgress, TemporaryMarker, MIN_COLUMN, MAX_COLUMN, get_column_length
+)
+
+TABLE_MAGIC = b"CSBUST01"
+TOTAL_OUTCOMES = 6 ** 6
+COLUMN_COUNT = MAX_COLUMN - MIN_COLUMN + 1
+TABLE_SIZE = COLUMN_COUNT ** 3
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bust_table.bin")
+
+
+def _table_index(a: int, b: int, c: int) -> int:
+    return (a - MIN_COLUMN) * COLUMN_COUNT * COLUMN_COUNT + (b - MIN_COLUMN) * COLUMN_COUNT + (c - MIN_COLUMN)
+
+
+def build_table() -> array:
+    """
+    枚举全部骰子结果生成可推进计数表
+
+    先把每种结果化为"可组合出的列"的 16 位掩码并按掩码计数（不同掩码远少于结果数），
+    再对每个三列组合累加与其相交的掩码计数。
+    """
+    from .batch_dice import all_outcomes, mask_histogram
+    mask_counts = mask_histogram(all_outcomes())
+
+    table = array("H", bytes(2 * TABLE_SIZE))
+    for columns in combinations_with_replacement(range(MIN_COLUMN, MAX_COLUMN + 1), 3):
+        target = 0
+        for column in columns:
+            target |= 1 << (column - MIN_COLUMN)
+        count = sum(n for mask, n in mask_counts.items() if mask & target)
+        for a, b, c in set(permutations(columns)):
+            table[_table_index(a, b, c)] = count
+    return table
+
+
+def write_table(path: str = TABLE_PATH) -> array:
+    """生成并写入表文件（原子替换），返回生成的表"""
+    table = build_table()
+    data = array("H", table)
+    if sys.byteorder != "little":
+        data.byteswap()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(data.tobytes())
+    os.replace(tmp_path, path)
+    return table
+
+
+class BustTable:
+    """内存映射的掷骰风险表"""
+
+    def __init__(self, path: str = TABLE_PATH):
+        self.path = path
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._counts = None
+        self._counts = self._open()
+
+    def _open(self):
+        try:
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mmap) != len(TABLE_MAGIC) + 2 * TABLE_SIZE or self._mmap[:len(TABLE_MAGIC)] != TABLE_MAGIC:
+                raise ValueError("表文件格式不匹配")
+            if sys.byteorder == "little":
+                return memoryview(self._mmap)[len(TABLE_MAGIC):].cast("H")
+            counts = array("H", self._mmap[len(TABLE_MAGIC):])
+            counts.byteswap()
+            return counts
+        except (OSError, ValueError) as e:
+            self.close()
+            print(f"警告：无法加载掷骰风险表 {self.path}（{e}），重新生成")
+            try:
+                return write_table(self.path)
+            except OSError:
+                return build_table()
+
+    def close(self):
+        """释放映射"""
+        if isinstance(self._counts, memoryview):
+            self._counts.release()
+            self._counts = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def reach_count(self, a: int, b: int, c: int) -> int:
+        """46656 种结果中至少能组合出 a、b、c 之一的结果数（列号须在 3-18，不做校验）"""
+        return self._counts[_table_index(a, b, c)]
+
+    def reach_probability(self, columns: Iterable[int]) -> float:
+        """
+        下一次掷骰至少能组合出其中一列的概率
+
+        Args:
+            columns: 1-3 个列号（可重复）
+
+        Returns:
+            概率；没有任何列时为 0
+        """
+        columns = list(columns)
+        if not columns:
+            return 0.0
+        if len(columns) > 3:
+            raise ValueError(f"最多查询 3 列: {columns}")
+        for column in columns:
+            if not MIN_COLUMN <= column <= MAX_COLUMN:
+                raise ValueError(f"无效的列号: {column}")
+        while len(columns) < 3:
+            columns.append(columns[0])
+        return self._counts[_table_index(*columns)] / TOTAL_OUTCOMES
+
+    def bust_probability(self, columns: Sequence[int]) -> float:
+        """三个标记所在（且仍可推进）的列为 columns 时，下一次掷骰爆掉的概率"""
+        return 1.0 - self.reach_probability(columns)
+
+
+def advancing_columns(progress: PlayerProgress, markers: Iterable[TemporaryMarker]) -> List[int]:
+    """临时标记中仍可推进（未到顶）的列"""
+    return [
+        marker.column for marker in markers
+        if progress.get_progress(marker.column) + marker.position < get_column_length(marker.column)
+    ]
+
+
+# 全局实例
+_bust_table: Optional[BustTable] = None
+
+
+def get_bust_table() -> BustTable:
+    """获取全局掷骰风险表"""
+    global _bust_table
+    if _bust_table is None:
+        _bust_table = BustTable()
+    return _bust_table
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    write_table()
+    print(f"掷骰风险表已生成: {TABLE_PATH}（{(time.perf_counter() - start) * 1000:.0f} ms）")
@@ -0,0 +1,390 @@
+"""
+内容包编译缓存 - 把 config/ 下的 JSON 内容源编译为单个二进制缓存
+
+启动时机器人、GUI、命令行会从多处重复读取并解析相同的配置：
+ConfigManager 读取全部 JSON，EncounterManager 读取 encounters.json，
+陷阱插件系统读取 trap_plugins.json 等。内容编译器一次性校验所有内容源，
+写入一个带版本号、以源文件哈希为键的缓存文件；之后各加载器只需一次读取。
+
+缓存格式（marshal，加载时无需导入 pickle）:
+    {
+        "format": 格式版本 + Python 版本,
+        "sources": {文件名: (mtime_ns, size, sha256)},
+        "payloads": {文件名: marshal 序列化的解析结果},
+        "failed": {文件名: (mtime_ns, size, 解析错误)},
+    }
+
+每个内容源单独 marshal，get_json 每次返回全新的对象，调用方可以随意修改。
+源文件发生变化（修改时间/大小不同且哈希不同）或格式版本不匹配时自动重新编译。
+"""
+
+import json
+import marshal
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# 缓存格式版本，修改缓存结构或校验规则时递增
+CONTENT_PACK_VERSION = 1
+
+DEFAULT_CONFIG_DIR = "config"
+DEFAULT_PACK_PATH = os.path.join("cache", "content_pack.bin")
+
+# 源文件指纹: (mtime_ns, size, sha256)
+SourceFingerprint = Tuple[int, int, str]
+
+_MISSING = object()
+
+
+def _pack_format() -> Tuple[int, int, int]:
+    """marshal 格式随 Python 版本变化，缓存只在同一解释器版本下复用"""
+    return (CONTENT_PACK_VERSION, sys.version_info[0], sys.version_info[1])
+
+
+def _sha256(data: bytes) -> str:
+    # 只在编译或指纹不一致时才需要哈希，延迟导入以减少冷启动开销
+    import hashlib
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fingerprint(path: str, data: bytes) -> SourceFingerprint:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, _sha256(data))
+
+
+def _require(errors: List[str], mapping: Any, keys: Tuple[str, ...], where: str):
+    if not isinstance(mapping, dict):
+        errors.append(f"{where} 应为对象")
+        return
+    missing = [key for key in keys if key not in mapping]
+    if missing:
+        errors.append(f"{where} 缺少字段: {', '.join(missing)}")
+
+
+def _validate_encounters(data: Any) -> List[str]:
+    errors: List[str] = []
+    for name, config in data.get("encounters", {}).items():
+        _require(errors, config, ("id", "name", "description"), f"遭遇 {name}")
+        for index, choice in enumerate(config.get("choices", []) if isinstance(config, dict) else []):
+            _require(errors, choice, ("name", "type", "effect", "message"), f"遭遇 {name} 选项 {index + 1}")
+    return errors
+
+
+def _validate_trap_plugins(data: Any) -> List[str]:
+    errors: List[str] = []
+    for name, config in data.get("plugins", {}).items():
+        _require(errors, config, ("plugin_class", "name", "description", "character_quote",
+                                  "penalty_description", "position_config"), f"陷阱插件 {name}")
+    return errors
+
+
+def _validate_achievements(data: Any) -> List[str]:
+    errors: List[str] = []
+    achievements = data.get("achievements", {})
+    if not isinstance(achievements, dict):
+        errors.append("achievements 应为对象")
+    return errors
+
+
+# 已知内容源的结构校验
+VALIDATORS = {
+    "encounters.json": _validate_encounters,
+    "encounters_debug.json": _validate_encounters,
+    "trap_plugins.json": _validate_trap_plugins,
+    "achievements.json": _validate_achievements,
+}
+
+
+class ContentPackStats:
+    """内容包加载统计（普通类，避免 dataclass 生成代码拖慢冷启动导入）"""
+
+    def __init__(self):
+        self.from_cache = False
+        self.compiled = False
+        self.load_ms = 0.0
+        self.sources = 0
+        self.errors: Dict[str, List[str]] = {}
+        self.fallback_reads = 0
+
+
+class ContentPack:
+    """编译后的内容包"""
+
+    def __init__(self, config_dir: str = DEFAULT_CONFIG_DIR, pack_path: str = DEFAULT_PACK_PATH):
+        """
+        初始化内容包（不会立即加载）
+
+        Args:
+            config_dir: 内容源目录
+            pack_path: 编译缓存文件路径
+        """
+        self.config_dir = config_dir
+        self.pack_path = pack_path
+        self.sources: Dict[str, SourceFingerprint] = {}
+        self.payloads: Dict[str, bytes] = {}
+        # 编译失败的内容源: {文件名: (mtime_ns, size, 解析错误或None)}，未修复前不必重新编译
+        self.failed: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        self.stats = ContentPackStats()
+        self._touched = False
+        self._paths: Dict[str, str] = {}
+        self._lookup: Dict[str, Optional[str]] = {}
+
+    # ==================== 加载与编译 ====================
+
+    def load(self, force: bool = False) -> "ContentPack":
+        """
+        加载缓存，缓存缺失、版本不符或内容源变化时重新编译
+
+        Args:
+            force: 忽略现有缓存强制重新编译
+        """
+        start = time.perf_counter()
+        pack = None if force else self._read_pack()
+        if pack is not None and self._is_fresh(pack):
+            self.sources = pack["sources"]
+            self.payloads = pack["payloads"]
+            self.failed = pack["failed"]
+            self.stats.from_cache = True
+            if self._touched:
+                self._write_pack()
+        else:
+            self.compile()
+            self._write_pack()
+        self._index_paths()
+        self.stats.sources = len(self.sources)
+        self.stats.load_ms = (time.perf_counter() - start) * 1000
+        return self
+
+    def compile(self) -> Dict[str, List[str]]:
+        """
+        编译并校验全部内容源
+
+        解析失败或结构校验不通过的源不会进入缓存，加载器对其回退到直接读取文件，
+        保持原有的告警行为。
+
+        Returns:
+            {文件名: 错误列表}
+        """
+        self.sources = {}
+        self.payloads = {}
+        self.failed = {}
+        errors: Dict[str, List[str]] = {}
+        parse_errors: Dict[str, str] = {}
+
+        for filename in self._list_sources():
+            path = os.path.join(self.config_dir, filename)
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                data = json.loads(raw.decode('utf-8'))
+            except Exception as e:
+                parse_errors[filename] = str(e)
+                errors[filename] = [f"解析失败: {e}"]
+                continue
+
+            validator = VALIDATORS.get(filename)
+            problems = validator(data) if validator and isinstance(data, dict) else []
+            if problems:
+                errors[filename] = problems
+                continue
+
+            self.sources[filename] = _fingerprint(path, raw)
+            self.payloads[filename] = marshal.dumps(data)
+
+        for filename, problems in errors.items():
+            try:
+                stat = os.stat(os.path.join(self.config_dir, filename))
+                self.failed[filename] = (stat.st_mtime_ns, stat.st_size, parse_errors.get(filename))
+            except OSError:
+                pass
+            for problem in problems:
+                print(f"警告：内容源 {filename} 校验失败: {problem}")
+
+        self.stats.compiled = True
+        self.stats.errors = errors
+        return errors
+
+    def _list_sources(self) -> List[str]:
+        if not os.path.isdir(self.config_dir):
+            return []
+        return sorted(name for name in os.listdir(self.config_dir) if name.endswith('.json'))
+
+    def _read_pack(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.pack_path, 'rb') as f:
+                pack = marshal.loads(f.read())
+        except Exception:
+            return None
+        if not isinstance(pack, dict) or pack.get("format") != _pack_format():
+            return None
+        return pack
+
+    def _is_fresh(self, pack: Dict[str, Any]) -> bool:
+        """内容源集合与指纹均未变化时缓存有效（修改时间和大小一致则跳过哈希）"""
+        sources: Dict[str, SourceFingerprint] = pack["sources"]
+        failed: Dict[str, Tuple[int, int, Optional[str]]] = pack["failed"]
+        current = self._list_sources()
+        # 编译失败的源不在缓存中，但依然属于内容源集合
+        if set(current) != set(sources) | set(failed):
+            return False
+
+        for filename in current:
+            path = os.path.join(self.config_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if filename in failed:
+                if (stat.st_mtime_ns, stat.st_size) != tuple(failed[filename][:2]):
+                    return False
+                continue
+            mtime_ns, size, digest = sources[filename]
+            if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                continue
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if _sha256(raw) != digest:
+                return False
+            # 内容未变只是被touch过，更新指纹并回写，避免下次再哈希
+            sources[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._touched = True
+        return True
+
+    def _write_pack(self):
+        """原子写入缓存文件（写临时文件后替换）"""
+        pack = {
+            "format": _pack_format(),
+            "sources": self.sources,
+            "payloads": self.payloads,
+            "failed": self.failed,
+        }
+        tmp_path = f"{self.pack_path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.pack_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps(pack))
+            os.replace(tmp_path, self.pack_path)
+        except OSError as e:
+            print(f"警告：无法写入内容包缓存 {self.pack_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _index_paths(self):
+        self._lookup = {}
+        self._paths = {
+            os.path.normcase(os.path.abspath(os.path.join(self.config_dir, filename))): filename
+            for filename in list(self.sources) + list(self.failed)
+        }
+
+    # ==================== 查询 ====================
+
+    def get_json(self, path: str, default: Any = _MISSING) -> Any:
+        """
+        获取内容源的解析结果
+
+        文件在进程运行期间被改写（如陷阱配置保存）时直接读取文件，
+        保证读到最新内容；不在缓存中的文件同样回退到直接读取。
+        编译时解析失败且未被修改的文件直接抛出 ValueError，不再重复解析。
+
+        Args:
+            path: 内容源路径（如 "config/encounters.json"）
+            default: 文件不存在时返回的默认值，未指定时抛出 FileNotFoundError
+
+        Returns:
+            解析后的 JSON 数据（每次调用返回新对象）
+        """
+        key = str(path)
+        try:
+            filename = self._lookup[key]
+        except KeyError:
+            filename = self._lookup[key] = self._paths.get(os.path.normcase(os.path.abspath(key)))
+        if filename is not None:
+            try:
+                stat = os.stat(path)
+                current = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                current = None
+            source = self.sources.get(filename)
+            if source is not None and current == source[:2]:
+                return marshal.loads(self.payloads[filename])
+            failure = self.failed.get(filename)
+            if failure is not None and failure[2] is not None and current == failure[:2]:
+                raise ValueError(failure[2])
+
+        self.stats.fallback_reads += 1
+        if default is not _MISSING and not os.path.exists(path):
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.sources
+
+    def format_stats(self) -> str:
+        """格式化加载统计"""
+        source = "缓存" if self.stats.from_cache else "重新编译"
+        text = (f"内容包: {self.stats.sources} 个内容源，来源: {source}，"
+                f"耗时 {self.stats.load_ms:.2f} ms，回退读取 {self.stats.fallback_reads} 次")
+        if self.failed:
+            text += f"，校验失败: {', '.join(sorted(self.failed))}"
+        return text
+
+
+# 全局实例
+_content_pack: Optional[ContentPack] = None
+
+
+def get_content_pack() -> ContentPack:
+    """获取全局内容包实例（首次访问时加载）"""
+    global _content_pack
+    if _content_pack is None:
+        _content_pack = ContentPack().load()
+    return _content_pack
+
+
+def reset_content_pack():
+    """丢弃全局内容包，下次访问时重新加载"""
+    global _content_pack
+    _content_pack = None
+
+
+def load_json_config(path: Any, default: Any = _MISSING) -> Any:
+    """
+    读取 JSON 配置，优先使用编译后的内容包
+
+    与 json.load 行为一致：文件不存在时抛出 FileNotFoundError（指定 default 时返回默认值），
+    解析失败时抛出异常。
+    """
+    try:
+        pack = get_content_pack()
+    except Exception as e:
+        print(f"警告：内容包不可用，直接读取配置: {e}")
+        if default is not _MISSING and not os.path.exists(path):
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return pack.get_json(path, default)
+
+
+def main():
+    """命令行：编译内容包并输出统计"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="编译游戏内容包缓存")
+    parser.add_argument("--config-dir", default=DEFAULT_CONFIG_DIR, help="内容源目录")
+    parser.add_argument("--output", default=DEFAULT_PACK_PATH, help="缓存文件路径")
+    parser.add_argument("--force", action="store_true", help="忽略现有缓存强制重新编译")
+    args = parser.parse_args()
+
+    pack = ContentPack(args.config_dir, args.output).load(force=args.force)
+    print(pack.format_stats())
+    return 1 if pack.stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
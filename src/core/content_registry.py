@@ -0,0 +1,203 @@
+"""
+游戏内容注册表 - 道具、陷阱、遭遇的统一多键索引
+
+启动时一次性构建以下索引，名称解析为 O(1) 查表或基于 n-gram 的亚线性模糊匹配：
+- ID
+- 原始名称
+- 规范化名称（去除阵营后缀、全角/半角折叠、去除引号和空白、忽略大小写）
+- 别名
+- 二元组（bigram）倒排索引，用于模糊匹配
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+CONTENT_ITEM = "item"
+CONTENT_TRAP = "trap"
+CONTENT_ENCOUNTER = "encounter"
+
+# 阵营后缀（NFKC 折叠后全角括号已变为半角）
+_FACTION_SUFFIX = re.compile(r'\((?:通用|ae专用|收养人专用)\)\s*$')
+# 规范化时忽略的字符：空白、各类引号和书名号
+_IGNORED_CHARS = re.compile(r'[\s"\'“”‘’「」『』《》]+')
+
+# 模糊匹配的最低相似度（Dice 系数）
+DEFAULT_FUZZY_THRESHOLD = 0.4
+
+
+def normalize_name(name: str) -> str:
+    """规范化名称：全角/半角折叠、去除阵营后缀、去除引号与空白、转小写"""
+    folded = unicodedata.normalize("NFKC", name).lower().strip()
+    folded = _FACTION_SUFFIX.sub("", folded)
+    return _IGNORED_CHARS.sub("", folded)
+
+
+def name_ngrams(normalized: str) -> Set[str]:
+    """生成带边界标记的二元组，单字名称也能参与匹配"""
+    padded = f"^{normalized}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+@dataclass(frozen=True)
+class ContentEntry:
+    """注册表条目"""
+    kind: str
+    id: int
+    name: str
+    definition: Any = field(compare=False, hash=False)
+
+
+class ContentRegistry:
+    """游戏内容注册表"""
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict[int, ContentEntry]] = defaultdict(dict)
+        self._by_name: Dict[str, Dict[str, ContentEntry]] = defaultdict(dict)
+        self._by_normalized: Dict[str, Dict[str, ContentEntry]] = defaultdict(dict)
+        self._by_alias: Dict[str, Dict[str, ContentEntry]] = defaultdict(dict)
+        self._ngram_index: Dict[str, Dict[str, List[Tuple[ContentEntry, str]]]] = defaultdict(
+            lambda: defaultdict(list))
+        self._ngram_counts: Dict[Tuple[str, str], int] = {}
+
+    # ==================== 构建 ====================
+
+    def register(self, kind: str, entry_id: int, name: str, definition: Any,
+                 aliases: Iterable[str] = ()) -> ContentEntry:
+        """注册一个内容条目"""
+        entry = ContentEntry(kind, entry_id, name, definition)
+        self._by_id[kind][entry_id] = entry
+        self._by_name[kind][name] = entry
+        self._index_key(kind, normalize_name(name), entry, self._by_normalized)
+        for alias in aliases:
+            self.register_alias(kind, alias, entry)
+        return entry
+
+    def register_alias(self, kind: str, alias: str, target: Any) -> bool:
+        """
+        注册别名
+
+        Args:
+            kind: 内容类型
+            alias: 别名
+            target: 目标条目，或目标的原始名称
+
+        Returns:
+            是否注册成功（目标不存在时返回 False）
+        """
+        entry = target if isinstance(target, ContentEntry) else self._by_name[kind].get(target)
+        if entry is None:
+            return False
+        self._index_key(kind, normalize_name(alias), entry, self._by_alias)
+        return True
+
+    def _index_key(self, kind: str, key: str, entry: ContentEntry,
+                   table: Dict[str, Dict[str, ContentEntry]]):
+        if not key:
+            return
+        # 同名冲突时保留先注册的条目
+        table[kind].setdefault(key, entry)
+        grams = name_ngrams(key)
+        self._ngram_counts[(kind, key)] = len(grams)
+        for gram in grams:
+            self._ngram_index[kind][gram].append((entry, key))
+
+    # ==================== 查询 ====================
+
+    def get_by_id(self, kind: str, entry_id: int) -> Optional[Any]:
+        """通过ID获取定义"""
+        entry = self._by_id[kind].get(entry_id)
+        return entry.definition if entry else None
+
+    def get_by_name(self, kind: str, name: str) -> Optional[Any]:
+        """通过名称精确获取定义（依次尝试原始名称、规范化名称、别名）"""
+        entry = self.resolve(kind, name)
+        return entry.definition if entry else None
+
+    def resolve(self, kind: str, name: str) -> Optional[ContentEntry]:
+        """精确解析名称为条目"""
+        if not name:
+            return None
+        entry = self._by_name[kind].get(name)
+        if entry is not None:
+            return entry
+        key = normalize_name(name)
+        return self._by_normalized[kind].get(key) or self._by_alias[kind].get(key)
+
+    def find(self, kind: str, name: str, fuzzy: bool = True,
+             threshold: float = DEFAULT_FUZZY_THRESHOLD) -> Optional[ContentEntry]:
+        """解析名称，精确匹配失败时使用 n-gram 模糊匹配"""
+        entry = self.resolve(kind, name)
+        if entry is not None or not fuzzy or not name:
+            return entry
+        matches = self.fuzzy_matches(kind, name, limit=1, threshold=threshold)
+        return matches[0][0] if matches else None
+
+    def fuzzy_matches(self, kind: str, name: str, limit: int = 5,
+                      threshold: float = DEFAULT_FUZZY_THRESHOLD) -> List[Tuple[ContentEntry, float]]:
+        """
+        基于二元组倒排索引的模糊匹配
+
+        Returns:
+            按相似度降序排列的 (条目, 相似度) 列表
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+        query = name_ngrams(key)
+        index = self._ngram_index[kind]
+
+        # 只统计与查询共享至少一个二元组的候选
+        shared: Dict[Tuple[ContentEntry, str], int] = defaultdict(int)
+        for gram in query:
+            for candidate in index.get(gram, ()):
+                shared[candidate] += 1
+
+        best: Dict[ContentEntry, float] = {}
+        for (entry, candidate_key), overlap in shared.items():
+            score = 2 * overlap / (len(query) + self._ngram_counts[(kind, candidate_key)])
+            if score >= threshold and score > best.get(entry, 0.0):
+                best[entry] = score
+
+        ranked = sorted(best.items(), key=lambda pair: (-pair[1], pair[0].id))
+        return ranked[:limit]
+
+    def all_entries(self, kind: str) -> List[ContentEntry]:
+        """获取某类内容的全部条目（按ID排序）"""
+        return [self._by_id[kind][k] for k in sorted(self._by_id[kind])]
+
+
+def build_content_registry() -> ContentRegistry:
+    """从道具、陷阱、遭遇定义构建注册表"""
+    from .item_definitions import ALL_ITEMS
+    from .trap_definitions import ALL_TRAPS
+    from .encounter_definitions import ALL_ENCOUNTERS
+
+    registry = ContentRegistry()
+    for item in ALL_ITEMS.values():
+        registry.register(CONTENT_ITEM, item.id, item.name, item)
+    for trap in ALL_TRAPS.values():
+        registry.register(CONTENT_TRAP, trap.id, trap.name, trap)
+    for encounter in ALL_ENCOUNTERS.values():
+        registry.register(CONTENT_ENCOUNTER, encounter.id, encounter.name, encounter)
+    return registry
+
+
+# 全局实例
+_content_registry: Optional[ContentRegistry] = None
+
+
+def get_content_registry() -> ContentRegistry:
+    """获取全局内容注册表实例"""
+    global _content_registry
+    if _content_registry is None:
+        _content_registry = build_content_registry()
+    return _content_registry
+
+
+def reset_content_registry():
+    """内容定义变化后（如从JSON重新加载遭遇）丢弃注册表，下次访问时重建"""
+    global _content_registry
+    _content_registry = None
@@ -0,0 +1,127 @@
+"""
+掷骰随机数服务 - 每个会话独立、可复现的骰子流
+
+以前骰子来自全局 random 模块，出现争议时无法复现当时的结果。现在每个会话创建时分配一个种子，
+会话记录已掷骰次数（计数器），第 n 次掷骰的结果只由 (种子, n) 决定：
+
+    第 n 次掷骰位于第 n // BLOCK_ROLLS 块的第 n % BLOCK_ROLLS 个位置
+    每块用 random.Random((种子 << 32) | 块序号) 生成随机字节，
+    字节 0-251 映射为 b % 6 + 1（252-255 丢弃以保证均匀），取前 6 × BLOCK_ROLLS 个
+
+整块预生成后缓存在内存中，逐次掷骰只是一次切片。使用标准库 random.Random（MT19937），
+结果不依赖是否安装 NumPy，任何部署都能复现历史掷骰。
+
+模式（game_config.json 的 game.dice_rng）:
+    seeded  按会话种子生成（默认）
+    secure  每次掷骰直接读取 os.urandom，不可复现（会话仍记录掷骰计数）
+
+复现历史掷骰: python -m src.core.dice_rng <种子> <计数器> [次数]
+"""
+
+import os
+import random
+from collections import OrderedDict
+from typing import List, Tuple
+
+from ..models.game_models import GameSession
+
+DICE_RNG_MODES = ("seeded", "secure")
+BLOCK_ROLLS = 256
+DEFAULT_MAX_CACHED_BLOCKS = 4096
+
+# 随机字节 -> 骰子点数；252-255 丢弃（252 = 6 × 42，保证 6 个点数等概率）
+_DICE_TABLE = bytes(b % 6 + 1 if b < 252 else 0 for b in range(256))
+_REJECTED = bytes(range(252, 256))
+
+
+def new_seed() -> int:
+    """生成新的会话种子（63 位，可存入 SQLite INTEGER）"""
+    return int.from_bytes(os.urandom(8), "little") >> 1
+
+
+def _bytes_to_dice(data: bytes) -> bytes:
+    return data.translate(_DICE_TABLE, _REJECTED)
+
+
+def generate_block(seed: int, block: int) -> bytes:
+    """生成种子的第 block 块骰子（6 × BLOCK_ROLLS 个点数）"""
+    rng = random.Random((seed << 32) | block)
+    need = 6 * BLOCK_ROLLS
+    dice = b""
+    while len(dice) < need:
+        # 约 1.6% 的字节被丢弃，多取一些通常一次即可
+        dice += _bytes_to_dice(rng.randbytes(need + need // 32))
+    return dice[:need]
+
+
+def reproduce_roll(seed: int, counter: int) -> List[int]:
+    """复现 (种子, 计数器) 对应的一次掷骰"""
+    block, offset = divmod(counter, BLOCK_ROLLS)
+    return list(generate_block(seed, block)[6 * offset:6 * offset + 6])
+
+
+def secure_roll() -> List[int]:
+    """由 os.urandom 生成一次掷骰"""
+    dice = b""
+    while len(dice) < 6:
+        dice += _bytes_to_dice(os.urandom(8))
+    return list(dice[:6])
+
+
+class DiceRngService:
+    """按会话提供骰子（GameEngine 持有一个实例）"""
+
+    def __init__(self, mode: str = "seeded", max_cached_blocks: int = DEFAULT_MAX_CACHED_BLOCKS):
+        if mode not in DICE_RNG_MODES:
+            print(f"警告：未知的掷骰随机数模式 {mode}，使用 seeded")
+            mode = "seeded"
+        self.mode = mode
+        self.max_cached_blocks = max_cached_blocks
+        # (种子, 块序号) -> 骰子字节，按最近使用淘汰
+        self._blocks: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+
+    @property
+    def secure(self) -> bool:
+        return self.mode == "secure"
+
+    def assign(self, session: GameSession):
+        """为新会话分配种子（secure 模式不分配）"""
+        if not self.secure and session.rng_seed is None:
+            session.rng_seed = new_seed()
+
+    def next_roll(self, session: GameSession) -> List[int]:
+        """会话的下一次掷骰，并推进会话的掷骰计数"""
+        if self.secure:
+            results = secure_roll()
+        else:
+            # 迁移前创建的会话没有种子，从当前计数开始使用新种子
+            self.assign(session)
+            results = self.roll_at(session.rng_seed, session.rng_counter)
+        session.rng_counter += 1
+        return results
+
+    def roll_at(self, seed: int, counter: int) -> List[int]:
+        """(种子, 计数器) 对应的掷骰，使用块缓存"""
+        block, offset = divmod(counter, BLOCK_ROLLS)
+        key = (seed, block)
+        dice = self._blocks.get(key)
+        if dice is None:
+            dice = self._blocks[key] = generate_block(seed, block)
+            if len(self._blocks) > self.max_cached_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(key)
+        return list(dice[6 * offset:6 * offset + 6])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="复现会话的历史掷骰")
+    parser.add_argument("seed", type=int, help="会话种子（game_sessions.rng_seed）")
+    parser.add_argument("counter", type=int, help="第几次掷骰（从 0 开始）")
+    parser.add_argument("count", type=int, nargs="?", default=1, help="连续复现的次数")
+    args = parser.parse_args()
+
+    for n in range(args.counter, args.counter + args.count):
+        print(f"#{n}: {reproduce_roll(args.seed, n)}")
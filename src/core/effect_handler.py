@@ -681,8 +681,8 @@ class EffectHandler:
         description = effect_data.get("description", "")
 
         try:
-            from ..database.database import DatabaseManager
-            db_manager = DatabaseManager()
+            from ..database.database import get_db_manager
+            db_manager = get_db_manager()
             player = db_manager.get_player(player_id)
 
             if not player:
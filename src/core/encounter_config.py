@@ -6,6 +6,8 @@ import json
 import os
 from typing import Dict, Optional
 
+from .content_pack import load_json_config
+
 
 class EncounterConfigManager:
     """遭遇配置管理器"""
@@ -19,9 +21,8 @@ class EncounterConfigManager:
         """从文件加载配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.generated_encounters = data.get("generated_encounters", {})
+                data = load_json_config(self.config_file)
+                self.generated_encounters = data.get("generated_encounters", {})
             except Exception as e:
                 print(f"加载遭遇配置失败: {e}")
 
@@ -46,7 +46,7 @@ def _init_encounters():
     ALL_ENCOUNTERS[1] = EncounterDef(
         id=1,
         name="喵",
-        description="喵突然从灌木中窜了出来。喵"喵"地一声吃掉了你的骰子。",
+        description="喵突然从灌木中窜了出来。喵“喵”地一声吃掉了你的骰子。",
         choices=[
             EncounterChoice(
                 choice_name='"吓死我了!"',
@@ -155,7 +155,7 @@ def _init_encounters():
         choices=[
             EncounterChoice(
                 choice_name="靠近小花",
-                effect_description="你被巨大的"花"包围...你停止一回合(消耗一回合积分)",
+                effect_description="你被巨大的“花”包围...你停止一回合(消耗一回合积分)",
                 effect_type="pause_turn",
                 effect_value=1
             ),
@@ -214,10 +214,8 @@ def get_encounter_by_id(encounter_id: int) -> Optional[EncounterDef]:
 
 def get_encounter_by_name(name: str) -> Optional[EncounterDef]:
     """通过名称获取遭遇定义"""
-    for enc in ALL_ENCOUNTERS.values():
-        if enc.name == name:
-            return enc
-    return None
+    from .content_registry import get_content_registry, CONTENT_ENCOUNTER
+    return get_content_registry().get_by_name(CONTENT_ENCOUNTER, name)
 
 
 def format_encounter_info(encounter_id: int) -> str:
@@ -379,6 +377,8 @@ def load_encounters_from_json(json_file_path: str):
                 faction_specific=enc_data.get('faction_specific', '')
             )
 
+        from .content_registry import reset_content_registry
+        reset_content_registry()
         return True
     except Exception as e:
         print(f"加载遭遇数据失败: {e}")
@@ -6,9 +6,9 @@
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
-import json
 import random
 from pathlib import Path
+from .content_pack import load_json_config
 
 
 @dataclass
@@ -65,8 +65,7 @@ class EncounterManager:
                 print(f"遭遇配置文件不存在: {self.config_path}")
                 return
 
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json_config(self.config_path)
 
             for name, config in data.get("encounters", {}).items():
                 choices = []
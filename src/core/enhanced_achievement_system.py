@@ -11,6 +11,7 @@ from dataclasses import dataclass
 
 from .achievement_system import AchievementSystem, Achievement, AchievementCategory
 from .event_system import GameEventSystem, GameEvent, GameEventType, get_event_system
+from .content_pack import load_json_config
 
 
 @dataclass
@@ -50,8 +51,7 @@ class EnhancedAchievementSystem(AchievementSystem):
             return
 
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = load_json_config(self.config_file)
 
             for achievement_id, achievement_data in config.get("achievements", {}).items():
                 # 如果成就已存在（硬编码的），跳过
@@ -164,8 +164,7 @@ class EnhancedAchievementSystem(AchievementSystem):
             return {}
 
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = load_json_config(self.config_file)
             return config.get("achievements", {})
         except:
             return {}
@@ -331,8 +330,8 @@ class EnhancedAchievementSystem(AchievementSystem):
         exact_match = condition.get("exact", False)
 
         # 从数据库获取玩家的完成次数
-        from ..database.database import DatabaseManager
-        db_manager = DatabaseManager()
+        from ..database.database import get_db_manager
+        db_manager = get_db_manager()
         player = db_manager.get_player(event.player_id)
 
         if not player:
@@ -351,8 +350,8 @@ class EnhancedAchievementSystem(AchievementSystem):
             return False
 
         # 从数据库检查这是否是玩家的第一次列完成
-        from ..database.database import DatabaseManager
-        db_manager = DatabaseManager()
+        from ..database.database import get_db_manager
+        db_manager = get_db_manager()
 
         # 检查first_completions表
         # 如果这是第一次完成任意列，这个事件应该是触发点
@@ -470,8 +469,8 @@ class EnhancedAchievementSystem(AchievementSystem):
         items_required = condition.get("items_required", [])
 
         # 这需要从数据库或游戏状态检查玩家是否收集了所有必需项目
-        from ..database.database import DatabaseManager
-        db_manager = DatabaseManager()
+        from ..database.database import get_db_manager
+        db_manager = get_db_manager()
 
         player_id = event.player_id
 
@@ -525,8 +524,8 @@ class EnhancedAchievementSystem(AchievementSystem):
             # 处理混合奖励（游戏内 + 现实奖励）
             # 游戏内奖励
             if "score" in reward_data:
-                from ..database.database import DatabaseManager
-                db_manager = DatabaseManager()
+                from ..database.database import get_db_manager
+                db_manager = get_db_manager()
                 player = db_manager.get_player(player_id)
                 if player:
                     db_manager.update_player_score(player_id, reward_data["score"], f"成就奖励：{achievement_data['name']}")
@@ -543,8 +542,8 @@ class EnhancedAchievementSystem(AchievementSystem):
 
         elif reward_type == "score":
             # 纯积分奖励
-            from ..database.database import DatabaseManager
-            db_manager = DatabaseManager()
+            from ..database.database import get_db_manager
+            db_manager = get_db_manager()
             score_amount = reward_data.get("score", 0)
             db_manager.update_player_score(player_id, score_amount, f"成就奖励：{achievement_data['name']}")
             result["messages"].append(f"✨ 获得 {score_amount} 积分")
@@ -5,7 +5,7 @@
 from typing import Dict, List, Optional, Tuple, Any
 from .fixed_map_config import FixedMapConfigLoader, MapElementType
 from .item_definitions import (
-    get_item_by_id, get_item_by_name, get_shop_items,
+    get_item_by_id, get_shop_items,
     format_shop_display, ItemDef, ItemFaction
 )
 from .trap_definitions import (
@@ -16,6 +16,7 @@ from .encounter_definitions import (
     get_encounter_by_id, get_encounter_by_name, format_encounter_info,
     EncounterDef, EncounterEffectExecutor
 )
+from .content_registry import get_content_registry, CONTENT_ITEM
 from ..models.game_models import Faction
 
 
@@ -118,8 +119,9 @@ class GameContentManager:
         return get_item_by_id(item_id)
 
     def get_item_by_name_fuzzy(self, name: str) -> Optional[ItemDef]:
-        """通过名称模糊查找道具"""
-        return get_item_by_name(name)
+        """通过名称模糊查找道具（精确/规范化/别名匹配失败时使用n-gram相似度）"""
+        entry = get_content_registry().find(CONTENT_ITEM, name)
+        return entry.definition if entry else None
 
     def get_shop_display(self, faction: str) -> str:
         """获取商店显示内容"""
@@ -2,8 +2,7 @@
 Can't Stop游戏引擎 - 核心游戏逻辑实现
 """
 
-import random
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Callable, Dict, List, Optional, Tuple, Set
 from datetime import datetime
 
 from ..models.game_models import (
@@ -11,9 +10,21 @@ from ..models.game_models import (
     GameState, TurnState, Faction, EventType, MapEvent
 )
 from .trap_config import TrapConfigManager
+from .dice_rng import DiceRngService
+from .session_history import (
+    SessionHistory, restore_checkpoint, CHECKPOINT_ROLL, CHECKPOINT_MOVE, DEFAULT_UNDO_DEPTH
+)
+from .turn_log import (
+    TurnLog, EVENT_START, EVENT_ROLL, EVENT_MOVE, EVENT_SUMMIT, EVENT_END_TURN,
+    EVENT_CONTINUE, EVENT_CHECKIN, EVENT_BUST, EVENT_UNDO
+)
 from .encounter_config import EncounterConfigManager
 from ..config.config_manager import get_config
 from .event_system import GameEventType, emit_game_event
+from .working_set import (
+    LRUWorkingSet, SessionWorkingSet,
+    DEFAULT_MAX_PLAYERS, DEFAULT_MAX_SESSIONS, DEFAULT_IDLE_TTL
+)
 
 
 class GameEngine:
@@ -21,13 +32,55 @@ class GameEngine:
 
     def __init__(self):
         self.map_config = MapConfig()
-        self.game_sessions: Dict[str, GameSession] = {}
-        self.players: Dict[str, Player] = {}
+        # 有界工作集：长期运行时只保留最近活跃的玩家和会话，淘汰的条目下次从数据库加载
+        idle_ttl = get_config("game_config", "engine.idle_ttl", DEFAULT_IDLE_TTL)
+        self.game_sessions: SessionWorkingSet = SessionWorkingSet(
+            get_config("game_config", "engine.max_sessions", DEFAULT_MAX_SESSIONS),
+            idle_ttl)
+        self.players: LRUWorkingSet = LRUWorkingSet(
+            get_config("game_config", "engine.max_players", DEFAULT_MAX_PLAYERS),
+            idle_ttl)
+        self._player_directory: Optional[Callable[[], Tuple[bool, List[Dict]]]] = None
+        # 每次移动前重新读取陷阱/遭遇配置（无界面模拟时关闭，使用固定布局）
+        self.reload_events_on_move = True
+        # 每个会话独立、可复现的骰子流
+        self.dice_rng = DiceRngService(get_config("game_config", "game.dice_rng", "seeded"))
+        # 骰子来源（返回 6 个点数），为空时使用会话骰子流；批量模拟时设为 DiceStream
+        self.dice_source: Optional[Callable[[], List[int]]] = None
+        # 会话事件日志（由服务层注入，未设置时不记录）
+        self.turn_log: Optional[TurnLog] = None
+        # 掷骰、移动前的检查点（后悔券、重试回合使用）
+        self.history = SessionHistory(get_config("game_config", "game.undo_depth", DEFAULT_UNDO_DEPTH))
         self.map_events: Dict[str, List[MapEvent]] = {}  # column_position -> events
         self.trap_config = TrapConfigManager()
         self.encounter_config = EncounterConfigManager()
         self._init_map_events()
 
+    def set_player_directory(self, list_players: Callable[[], Tuple[bool, List[Dict]]]):
+        """设置"花言巧语"陷阱使用的玩家列表来源（默认使用游戏服务，模拟器注入本地列表）"""
+        self._player_directory = list_players
+
+    def set_turn_log(self, turn_log: Optional[TurnLog]):
+        """设置会话事件日志（None 关闭记录）"""
+        self.turn_log = turn_log
+
+    def _record_turn(self, session_id: str, kind: str, detail: Optional[str] = None):
+        """记录会话事件（状态没有变化时不记录；日志读写失败不影响游戏操作）"""
+        if self.turn_log is None:
+            return
+        session = self.get_game_session(session_id)
+        player = self.get_player(session.player_id) if session else None
+        if player is None:
+            return
+        try:
+            self.turn_log.record(session, player, kind, detail)
+        except Exception as e:
+            print(f"记录会话事件失败: {e}")
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """获取玩家和会话工作集的统计"""
+        return {"players": self.players.get_stats(), "sessions": self.game_sessions.get_stats()}
+
     def _init_map_events(self):
         """初始化地图事件"""
         # 从配置文件加载现有陷阱（不生成新的随机陷阱）
@@ -174,7 +227,10 @@ class GameEngine:
 
         session_id = f"{player_id}_{datetime.now().timestamp()}"
         session = GameSession(session_id=session_id, player_id=player_id)
+        self.dice_rng.assign(session)
         self.game_sessions[session_id] = session
+        self.history.mark_turn_start(session)
+        self._record_turn(session_id, EVENT_START)
         return session
 
     def get_game_session(self, session_id: str) -> Optional[GameSession]:
@@ -183,10 +239,7 @@ class GameEngine:
 
     def get_player_active_session(self, player_id: str) -> Optional[GameSession]:
         """获取玩家的活跃会话"""
-        for session in self.game_sessions.values():
-            if session.player_id == player_id and session.state == GameState.ACTIVE:
-                return session
-        return None
+        return self.game_sessions.active_session(player_id)
 
     def roll_dice(self, session_id: str) -> DiceRoll:
         """掷骰子"""
@@ -240,16 +293,24 @@ class GameEngine:
         base_dice_cost = get_config("game_config", "game.dice_cost", 10)
         dice_cost = max(0, base_dice_cost - total_cost_reduction)  # 确保不为负
 
+        self.history.checkpoint(session, CHECKPOINT_ROLL, cost=dice_cost)
         if not player.spend_score(dice_cost, "掷骰消耗"):
+            self.history.pop(session_id)
             raise ValueError("积分不足，无法掷骰")
 
+        # 本次掷骰在会话骰子流中的序号（强制结果和外部骰子来源不占用骰子流）
+        rng_counter = None
+
         # 检查是否有强制骰子结果
         if session.forced_dice_result:
             dice_results = session.forced_dice_result
             session.forced_dice_result = None  # 使用后清空
+        elif self.dice_source is not None:
+            dice_results = list(self.dice_source())
         else:
-            # 生成6个1-6的随机数
-            dice_results = [random.randint(1, 6) for _ in range(6)]
+            # 会话骰子流的下一次掷骰（由种子和计数可复现）
+            rng_counter = session.rng_counter
+            dice_results = self.dice_rng.next_roll(session)
 
         # 应用骰子修正buff（+1或-1）
         dice_modifier = buff_manager.get_dice_modifier(player.player_id)
@@ -264,13 +325,16 @@ class GameEngine:
         session.current_dice = dice_roll
         session.turn_state = TurnState.MOVE_MARKERS
         session.updated_at = datetime.now()
+        self._record_turn(session_id, EVENT_ROLL, ",".join(map(str, dice_results)))
 
         # 发布骰子事件
         emit_game_event(GameEventType.DICE_ROLLED, session.player_id, {
             "dice_results": dice_results,
             "session_id": session_id,
             "turn_number": session.turn_number,
-            "combinations": dice_roll.get_possible_combinations()
+            "combinations": dice_roll.get_possible_combinations(),
+            "rng_seed": session.rng_seed,
+            "rng_counter": rng_counter
         }, session_id)
 
         return dice_roll
@@ -376,6 +440,7 @@ class GameEngine:
                     # 强制结束轮次，需要打卡
                     session.needs_checkin = True
                     session.turn_state = TurnState.WAITING_FOR_CHECKIN
+                    self._record_turn(session_id, EVENT_BUST, ",".join(map(str, target_columns)))
 
                     return False, "❌ 临时标记数量不能超过3个！\n⚠️ 已清空所有临时标记\n💔 本轮进度丢失\n📝 请完成打卡后继续游戏"
 
@@ -383,6 +448,7 @@ class GameEngine:
 
         session = self.get_game_session(session_id)
         player = self.get_player(session.player_id)
+        self.history.checkpoint(session, CHECKPOINT_MOVE)
 
         moved_columns = []
 
@@ -407,6 +473,7 @@ class GameEngine:
 
         # 检查是否有登顶
         self._check_column_completions(session_id)
+        self._record_turn(session_id, EVENT_MOVE, ",".join(map(str, target_columns)))
 
         # 检查并触发地图事件
         event_messages = self._check_and_trigger_events(session_id, moved_columns)
@@ -448,7 +515,7 @@ class GameEngine:
         return pending_completions
 
     def _clear_column_temporary_markers(self, column: int):
-        """清空指定列的所有临时标记"""
+        """清空指定列的所有临时标记（只涉及工作集中的会话，其余会话在数据库中）"""
         for session in self.game_sessions.values():
             session.remove_temporary_marker(column)
 
@@ -559,10 +626,12 @@ class GameEngine:
         if len(session.pending_summit_columns) == 0:
             # 所有列都已确认，恢复到决策状态
             session.turn_state = TurnState.DECISION
+            self._record_turn(session_id, EVENT_SUMMIT, str(column))
             final_message = f"{reward_message}\n\n✅ 所有登顶已确认，可以继续游戏！"
             return True, final_message
         else:
             # 还有其他列待确认
+            self._record_turn(session_id, EVENT_SUMMIT, str(column))
             next_column = session.pending_summit_columns[0]
             final_message = f"{reward_message}\n\n⚠️ 请继续确认：数列{next_column}登顶"
             return True, final_message
@@ -570,7 +639,8 @@ class GameEngine:
     def _check_and_trigger_events(self, session_id: str, moved_columns: List[int]) -> str:
         """检查并触发地图事件"""
         # 重新加载陷阱配置（确保获取最新的陷阱数据）
-        self.reload_traps_from_config()
+        if self.reload_events_on_move:
+            self.reload_traps_from_config()
 
         session = self.get_game_session(session_id)
         player = self.get_player(session.player_id)
@@ -600,14 +670,16 @@ class GameEngine:
 
         event.trigger(player.player_id)
 
+        message = ""
         if event.event_type == EventType.TRAP:
-            return self._handle_trap_event(session_id, event, trigger_column)
+            message = self._handle_trap_event(session_id, event, trigger_column)
         elif event.event_type == EventType.ITEM:
-            return self._handle_item_event(session_id, event)
+            message = self._handle_item_event(session_id, event)
         elif event.event_type == EventType.ENCOUNTER:
-            return self._handle_encounter_event(session_id, event)
+            message = self._handle_encounter_event(session_id, event)
 
-        return ""
+        self._record_turn(session_id, event.event_type.value, event.name)
+        return message
 
     def _handle_trap_event(self, session_id: str, event: MapEvent, trigger_column: int = None) -> str:
         """处理陷阱事件"""
@@ -649,9 +721,11 @@ class GameEngine:
 
         elif event.name == "花言巧语":
             # 获取所有玩家列表用于选择
-            from ..services.game_service import GameService
-            service = GameService()
-            success, players = service.get_all_players()
+            if self._player_directory is not None:
+                success, players = self._player_directory()
+            else:
+                from ..services.service_registry import get_game_service
+                success, players = get_game_service().get_all_players()
 
             player_list_str = ""
             if success and players:
@@ -703,6 +777,7 @@ class GameEngine:
         session.turn_state = TurnState.DICE_ROLL
         session.turn_number += 1
         session.current_dice = None
+        self._record_turn(session_id, EVENT_CONTINUE)
         return True
 
     def end_turn_actively(self, session_id: str) -> Tuple[bool, str]:
@@ -734,6 +809,7 @@ class GameEngine:
         if player.progress.is_winner():
             session.state = GameState.COMPLETED
             player.games_won += 1
+            self._record_turn(session_id, EVENT_END_TURN)
             return True, "恭喜获胜！已在3列登顶！"
 
         # 减少buff持续时间
@@ -749,6 +825,7 @@ class GameEngine:
         # 需要打卡后才能开始下轮
         session.needs_checkin = True
         session.turn_state = TurnState.WAITING_FOR_CHECKIN
+        self._record_turn(session_id, EVENT_END_TURN)
 
         return True, "轮次结束，请完成打卡后继续游戏"
 
@@ -782,6 +859,7 @@ class GameEngine:
         session.clear_temporary_markers()
         session.state = GameState.FAILED
         session.turn_state = TurnState.ENDED
+        self._record_turn(session_id, EVENT_BUST)
 
     def complete_checkin(self, session_id: str) -> bool:
         """完成打卡，恢复游戏功能"""
@@ -792,8 +870,58 @@ class GameEngine:
         session.needs_checkin = False
         session.turn_state = TurnState.DICE_ROLL
         session.first_turn = True  # 新轮次开始
+        self.history.mark_turn_start(session)
+        self._record_turn(session_id, EVENT_CHECKIN)
         return True
 
+    def undo_last_roll(self, session_id: str) -> Tuple[bool, str]:
+        """
+        撤销最近一次掷骰（掷骰后、移动前可用），恢复掷骰前的会话并退还本次掷骰消耗
+
+        只退还掷骰扣除的积分，掷骰之后的购买、奖励等积分变化保留
+        """
+        session = self.get_game_session(session_id)
+        if not session:
+            return False, "会话不存在"
+        player = self.get_player(session.player_id)
+        if not player:
+            return False, "玩家不存在"
+
+        if session.turn_state != TurnState.MOVE_MARKERS:
+            return False, "只能在掷骰之后、移动标记之前撤销掷骰"
+        checkpoint = self.history.last(session_id)
+        if checkpoint is None or checkpoint.label != CHECKPOINT_ROLL:
+            return False, "没有可以撤销的掷骰"
+
+        self.history.pop(session_id)
+        restore_checkpoint(checkpoint, session)
+        # 退款不计入历史总获得积分
+        player.current_score += checkpoint.cost
+        session.updated_at = datetime.now()
+        self._record_turn(session_id, EVENT_UNDO, CHECKPOINT_ROLL)
+        return True, "已撤销本次掷骰"
+
+    def retry_turn(self, session_id: str) -> Tuple[bool, str]:
+        """重试本轮：丢弃本轮的临时进度，回到本轮开始时的状态（已登顶的列保留）"""
+        session = self.get_game_session(session_id)
+        if not session:
+            return False, "会话不存在"
+        player = self.get_player(session.player_id)
+        if not player:
+            return False, "玩家不存在"
+
+        if session.state == GameState.COMPLETED or session.turn_state == TurnState.WAITING_FOR_CHECKIN:
+            return False, "本轮已结束，无法重试"
+        checkpoint = self.history.turn_start(session_id)
+        if checkpoint is None:
+            return False, "没有本轮开始时的记录，无法重试"
+
+        restore_checkpoint(checkpoint, session)
+        session.updated_at = datetime.now()
+        self.history.mark_turn_start(session)
+        self._record_turn(session_id, EVENT_UNDO, "turn")
+        return True, "已回到本轮开始"
+
     def get_game_status(self, player_id: str) -> Dict:
         """获取游戏状态"""
         player = self.get_player(player_id)
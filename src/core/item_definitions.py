@@ -264,14 +264,9 @@ def get_item_by_id(item_id: int) -> Optional[ItemDef]:
 
 
 def get_item_by_name(name: str) -> Optional[ItemDef]:
-    """通过名称获取道具定义"""
-    # 移除可能的后缀
-    clean_name = name.replace("（通用）", "").replace("（ae专用）", "").replace("（收养人专用）", "").strip()
-
-    for item in ALL_ITEMS.values():
-        if item.name == clean_name or item.name == name:
-            return item
-    return None
+    """通过名称获取道具定义（支持阵营后缀、全角/半角等变体）"""
+    from .content_registry import get_content_registry, CONTENT_ITEM
+    return get_content_registry().get_by_name(CONTENT_ITEM, name)
 
 
 def get_shop_items(faction: str) -> List[ItemDef]:
@@ -0,0 +1,149 @@
+"""
+会话检查点 - 撤销类道具（后悔券、重试回合）使用的结构共享快照
+
+每次掷骰、移动前引擎记录一个检查点。检查点由若干不可变部分组成：
+    head     会话状态、轮次状态、轮次、首轮、需要打卡
+    markers  临时标记 ((列, 位置), ...)
+    dice     当前骰子
+    pending  待确认登顶列
+另记录该操作扣除的积分 cost（掷骰消耗），撤销时只退还这部分。
+
+新检查点中与上一个检查点相同的部分直接引用上一个检查点的对象（结构共享），
+一次掷骰通常只新建 head 和 dice，其余部分与历史检查点共用。
+每个会话保留最近 depth 个检查点，另外固定保留本轮开始时的检查点（重试回合用）；
+最多跟踪 max_sessions 个会话，按最近使用淘汰。
+
+恢复检查点只把这些部分写回会话对象，不读取数据库。玩家的积分和永久进度不整体回退：
+掷骰之后购买道具、领取奖励等变化必须保留，撤销掷骰只退还 cost。
+骰子流计数不回退，撤销后重新掷骰得到的是骰子流中的下一次结果，而不是同一结果。
+登顶清空其他会话同列标记等跨会话变化不在检查点范围内。
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from ..models.game_models import DiceRoll, GameSession
+
+DEFAULT_UNDO_DEPTH = 8
+DEFAULT_MAX_SESSIONS = 10000
+
+# 检查点标签
+CHECKPOINT_ROLL = "roll"
+CHECKPOINT_MOVE = "move"
+CHECKPOINT_TURN_START = "turn_start"
+
+
+@dataclass(frozen=True, slots=True)
+class SessionCheckpoint:
+    """会话在某次操作之前的状态（各部分均不可变，可在检查点之间共享）"""
+    label: str
+    head: tuple
+    markers: Tuple[Tuple[int, int], ...]
+    dice: Optional[Tuple[int, ...]]
+    pending: Tuple[int, ...]
+    cost: int = 0
+
+
+def _share(value, previous):
+    """与上一个检查点相同的部分直接引用旧对象"""
+    return previous if previous == value else value
+
+
+def take_checkpoint(session: GameSession, label: str,
+                    previous: Optional[SessionCheckpoint] = None, cost: int = 0) -> SessionCheckpoint:
+    """记录检查点（previous 为同一会话的上一个检查点，相同部分与其共享；cost 为该操作扣除的积分）"""
+    head = (session.state, session.turn_state, session.turn_number,
+            session.first_turn, session.needs_checkin)
+    markers = tuple((m.column, m.position) for m in session.temporary_markers)
+    dice = tuple(session.current_dice.results) if session.current_dice else None
+    pending = tuple(session.pending_summit_columns)
+    if previous is not None:
+        head = _share(head, previous.head)
+        markers = _share(markers, previous.markers)
+        dice = _share(dice, previous.dice)
+        pending = _share(pending, previous.pending)
+    return SessionCheckpoint(label, head, markers, dice, pending, cost)
+
+
+def restore_checkpoint(checkpoint: SessionCheckpoint, session: GameSession):
+    """
+    把检查点写回会话（积分退还由调用方按 checkpoint.cost 处理）
+
+    骰子流计数和强制骰子结果保持不变。
+    """
+    (session.state, session.turn_state, session.turn_number,
+     session.first_turn, session.needs_checkin) = checkpoint.head
+    session.clear_temporary_markers()
+    for column, position in checkpoint.markers:
+        session.add_temporary_marker(column, position)
+    session.current_dice = DiceRoll(list(checkpoint.dice)) if checkpoint.dice else None
+    session.pending_summit_columns = list(checkpoint.pending)
+
+
+class _SessionCheckpoints:
+    __slots__ = ("recent", "turn_start")
+
+    def __init__(self, depth: int):
+        self.recent: Deque[SessionCheckpoint] = deque(maxlen=depth)
+        self.turn_start: Optional[SessionCheckpoint] = None
+
+
+class SessionHistory:
+    """按会话保存最近的检查点（GameEngine 持有一个实例）"""
+
+    def __init__(self, depth: int = DEFAULT_UNDO_DEPTH, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.depth = max(1, depth)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _SessionCheckpoints]" = OrderedDict()
+
+    def _entry(self, session_id: str) -> _SessionCheckpoints:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = _SessionCheckpoints(self.depth)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return entry
+
+    def checkpoint(self, session: GameSession, label: str, cost: int = 0) -> SessionCheckpoint:
+        """在操作之前记录检查点（cost 为该操作将扣除的积分）"""
+        entry = self._entry(session.session_id)
+        previous = entry.recent[-1] if entry.recent else entry.turn_start
+        checkpoint = take_checkpoint(session, label, previous, cost)
+        entry.recent.append(checkpoint)
+        return checkpoint
+
+    def mark_turn_start(self, session: GameSession):
+        """记录本轮开始时的检查点（并清空上一轮的检查点）"""
+        entry = self._entry(session.session_id)
+        previous = entry.recent[-1] if entry.recent else entry.turn_start
+        entry.turn_start = take_checkpoint(session, CHECKPOINT_TURN_START, previous)
+        entry.recent.clear()
+
+    def last(self, session_id: str) -> Optional[SessionCheckpoint]:
+        """最近的检查点"""
+        entry = self._sessions.get(session_id)
+        return entry.recent[-1] if entry and entry.recent else None
+
+    def pop(self, session_id: str) -> Optional[SessionCheckpoint]:
+        """取出最近的检查点（撤销最近一次操作）"""
+        entry = self._sessions.get(session_id)
+        return entry.recent.pop() if entry and entry.recent else None
+
+    def turn_start(self, session_id: str) -> Optional[SessionCheckpoint]:
+        """本轮开始时的检查点"""
+        entry = self._sessions.get(session_id)
+        return entry.turn_start if entry else None
+
+    def forget(self, session_id: str):
+        """删除会话的所有检查点"""
+        self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """跟踪的会话数和检查点数"""
+        return {
+            "sessions": len(self._sessions),
+            "checkpoints": sum(len(e.recent) + (e.turn_start is not None) for e in self._sessions.values()),
+        }
@@ -7,6 +7,7 @@ import os
 from typing import Dict, List, Optional, Set
 from dataclasses import dataclass
 from ..core.trap_system import TrapType
+from .content_pack import load_json_config
 
 
 @dataclass
@@ -71,18 +72,17 @@ class TrapConfigManager:
         """从文件加载配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                    # 支持新格式和旧格式的配置文件
-                    if "trap_configs" in data:
-                        # 新格式
-                        self.generated_traps = data.get("generated_traps", {})
-                        # 可以在这里加载trap_configs如果需要
-                    else:
-                        # 旧格式，保持向后兼容
-                        # 暂时不处理旧格式的配置加载
-                        pass
+                data = load_json_config(self.config_file)
+
+                # 支持新格式和旧格式的配置文件
+                if "trap_configs" in data:
+                    # 新格式
+                    self.generated_traps = data.get("generated_traps", {})
+                    # 可以在这里加载trap_configs如果需要
+                else:
+                    # 旧格式，保持向后兼容
+                    # 暂时不处理旧格式的配置加载
+                    pass
 
             except Exception as e:
                 print(f"加载陷阱配置失败: {e}")
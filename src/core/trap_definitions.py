@@ -65,7 +65,7 @@ ALL_TRAPS: Dict[int, TrapDef] = {
     5: TrapDef(
         id=5,
         name="紧闭的大门",
-        description=""门不能从这一侧打开" 面对这个突然竖在面前的大门你有些摸不着头脑。",
+        description="“门不能从这一侧打开” 面对这个突然竖在面前的大门你有些摸不着头脑。",
         effect_description="立即将当前临时标记移动到旁边两列的任意一列的进度上（即清空本轮在该列的进度）。如果当前轮次相邻列均已放置临时标记或登顶，则直接清空本列本轮次进度并在该轮次禁用此临时标记",
         achievement="探索家",
     ),
@@ -73,7 +73,7 @@ ALL_TRAPS: Dict[int, TrapDef] = {
     6: TrapDef(
         id=6,
         name="奇变偶不变",
-        description=""这是什么神秘的暗号吗？"",
+        description="“这是什么神秘的暗号吗？”",
         effect_description="下回合投掷结果中奇数>3个：额外获得一个d6骰可以随意加到你得到的两个加值的任意一个中。下回合投掷结果中奇数≤3个：本回合作废（如果该回合触发[失败被动停止]，则惩罚改为下轮次停止一回合）",
         achievement="数学大王/数学0蛋",
         has_choice=True,
@@ -108,7 +108,7 @@ ALL_TRAPS: Dict[int, TrapDef] = {
     10: TrapDef(
         id=10,
         name="刺儿扎扎",
-        description=""考验技术的时刻到了"地上突然冒出一排排尖刺…",
+        description="“考验技术的时刻到了”地上突然冒出一排排尖刺…",
         effect_description="投掷d20出目>18：灵巧地规避掉了，获得新鲜三文鱼一条。投掷d20出目≤18：被扎到，丢失20积分",
         achievement="技术大师/新手噩梦",
         has_choice=True,
@@ -149,7 +149,7 @@ ALL_TRAPS: Dict[int, TrapDef] = {
     15: TrapDef(
         id=15,
         name="魔女的小屋",
-        description=""哎呀...好忙，好忙啊...要是能有人来搭把手就好了..." 厨房中悬浮的厨刀不断处理着各种食材，就像是有隐形的人在操控着一样。透明的厨师似乎察觉到了你的靠近。 "哎呀，有人来了...你能来帮帮忙吗？"",
+        description="“哎呀...好忙，好忙啊...要是能有人来搭把手就好了...” 厨房中悬浮的厨刀不断处理着各种食材，就像是有隐形的人在操控着一样。透明的厨师似乎察觉到了你的靠近。 “哎呀，有人来了...你能来帮帮忙吗？”",
         effect_description="当然啦，凑上前帮忙：当前纵列的临时标记被清除。拒绝，沉默地离开：下次移动标记时，必须移动该纵列的临时标记，否则清除当前纵列的临时标记",
         achievement="留了一手/冷漠无情",
         has_choice=True,
@@ -176,7 +176,7 @@ ALL_TRAPS: Dict[int, TrapDef] = {
     19: TrapDef(
         id=19,
         name="没有空军",
-        description="当你回神时已经和一位胡子花白的老人对着膝盖坐在一艘渔船上，他胡子底下掩映的笑意来自于手里紧绷的鱼线。"看她多有劲！"他絮絮叨叨着，而你无法阻止他收起那枚使你的潜意识警铃大作的鱼钩。漆黑的影子迅速抬升在小船底下蔓延开来，与头顶漆黑的天空互相倾轧，你们的小船在其中大小只不过一枚粟米……终于，祂露出了海面。",
+        description="当你回神时已经和一位胡子花白的老人对着膝盖坐在一艘渔船上，他胡子底下掩映的笑意来自于手里紧绷的鱼线。“看她多有劲！”他絮絮叨叨着，而你无法阻止他收起那枚使你的潜意识警铃大作的鱼钩。漆黑的影子迅速抬升在小船底下蔓延开来，与头顶漆黑的天空互相倾轧，你们的小船在其中大小只不过一枚粟米……终于，祂露出了海面。",
         effect_description="你的理智流失，陷入不定性疯狂。失去控制两回合（消耗20积分）并随机倒退一格临时棋子",
     ),
 
@@ -196,10 +196,8 @@ def get_trap_by_id(trap_id: int) -> Optional[TrapDef]:
 
 def get_trap_by_name(name: str) -> Optional[TrapDef]:
     """通过名称获取陷阱定义"""
-    for trap in ALL_TRAPS.values():
-        if trap.name == name:
-            return trap
-    return None
+    from .content_registry import get_content_registry, CONTENT_TRAP
+    return get_content_registry().get_by_name(CONTENT_TRAP, name)
 
 
 def format_trap_info(trap_id: int) -> str:
@@ -298,7 +296,7 @@ class TrapEffectExecutor:
     @staticmethod
     def _effect_dont_look_back(context: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
         """"不要回头"效果"""
-        return True, "触发"不要回头"！当前列进度清空，回到上一个永久棋子位置或初始位置", {
+        return True, "触发“不要回头”！当前列进度清空，回到上一个永久棋子位置或初始位置", {
             "clear_column_progress": True,
             "achievement": "好奇心害死猫"
         }
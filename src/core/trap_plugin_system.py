@@ -78,9 +78,8 @@ class EnhancedTrapSystem(TrapSystem):
         config_file = "config/trap_plugins.json"
         if os.path.exists(config_file):
             try:
-                import json
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                from .content_pack import load_json_config
+                config = load_json_config(config_file)
 
                 for plugin_name, plugin_data in config.get("plugins", {}).items():
                     self.plugin_configs[plugin_name] = TrapPluginConfig(
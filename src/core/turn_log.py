@@ -0,0 +1,294 @@
+"""
+轮次事件日志 - 只追加的会话事件流，可回放重建任意时刻的会话
+
+会话状态原本只在 save_game_session 中原地覆盖，无法得知玩家如何走到当前局面，
+数据行损坏后也只能手工修复。引擎在每次掷骰、移动、触发陷阱/遭遇、登顶、结束轮次、打卡、
+被动停止、撤销之后记录一条事件，游戏服务保存前再记录一次（捕获道具和遭遇效果造成的其余变化）。
+
+编码:
+    会话的可回放部分（轮次状态、临时标记、骰子、骰子流计数、积分、永久进度）编码为
+    定长 STATE_SIZE 字节的状态记录；每条事件只存与上一状态不同的字节段（补丁），
+    通常只有几个到十几个字节。每 SNAPSHOT_INTERVAL 条事件存一次完整状态（快照）。
+
+    补丁格式: 若干段 (偏移 uint8, 长度 uint8, 新字节)
+
+回放: 取目标序号之前最近的快照，依次应用其后的补丁，最多 SNAPSHOT_INTERVAL - 1 条。
+
+存储后端需实现 turn_log_last_seq / append_turn_log / load_turn_log：
+DatabaseManager（session_events / session_snapshots 表）或 MemoryTurnLogStore。
+
+只记录状态变化；没有变化的事件（如校验失败的操作）不写入。
+登顶清空其他会话同列标记等跨会话变化，在该会话下一条事件中一并记录。
+"""
+
+import struct
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..models.game_models import (
+    DiceRoll, GameSession, GameState, Player, PlayerProgress, TemporaryMarker, TurnState
+)
+
+SNAPSHOT_INTERVAL = 64
+DEFAULT_MAX_TRACKED_SESSIONS = 10000
+
+# 事件类型
+EVENT_START = "start"
+EVENT_ROLL = "roll"
+EVENT_MOVE = "move"
+EVENT_SUMMIT = "summit"
+EVENT_END_TURN = "end_turn"
+EVENT_CONTINUE = "continue"
+EVENT_CHECKIN = "checkin"
+EVENT_BUST = "bust"
+EVENT_EFFECT = "effect"
+EVENT_UNDO = "undo"
+# 地图事件使用 EventType 的值: trap / item / encounter
+
+# 种子, 轮次, 会话状态, 轮次状态, 标志, 骰子流计数, 积分, 骰子, 标记数, 标记(列,位置)×3,
+# 待确认登顶数, 待确认登顶列×3, 永久进度, 已设置列掩码, 已完成列掩码
+_STATE = struct.Struct("<QHBBBIi6sB6sB3s16sHH")
+STATE_SIZE = _STATE.size
+
+_FLAG_FIRST_TURN = 1
+_FLAG_NEEDS_CHECKIN = 2
+_FLAG_HAS_SEED = 4
+_FLAG_HAS_DICE = 8
+
+_GAME_STATES = list(GameState)
+_TURN_STATES = list(TurnState)
+
+
+def encode_state(session: GameSession, player: Player) -> bytes:
+    """把会话和玩家的可回放部分编码为定长状态记录"""
+    flags = 0
+    if session.first_turn:
+        flags |= _FLAG_FIRST_TURN
+    if session.needs_checkin:
+        flags |= _FLAG_NEEDS_CHECKIN
+    if session.rng_seed is not None:
+        flags |= _FLAG_HAS_SEED
+    dice = b""
+    if session.current_dice:
+        flags |= _FLAG_HAS_DICE
+        dice = bytes(session.current_dice.results)
+
+    markers = bytearray()
+    for marker in session.temporary_markers[:3]:
+        markers += bytes((marker.column, marker.position))
+    pending = bytes(session.pending_summit_columns[:3])
+    positions, present, completed = player.progress.pack()
+
+    return _STATE.pack(
+        session.rng_seed or 0, session.turn_number,
+        _GAME_STATES.index(session.state), _TURN_STATES.index(session.turn_state), flags,
+        session.rng_counter, player.current_score, dice,
+        len(markers) // 2, bytes(markers), len(pending), pending,
+        positions, present, completed
+    )
+
+
+@dataclass
+class ReplayState:
+    """回放结果：重建的会话、玩家永久进度和积分"""
+    session: GameSession
+    progress: PlayerProgress
+    current_score: int
+    seq: int
+
+
+def decode_state(state: bytes, session_id: str, player_id: str, seq: int = 0) -> ReplayState:
+    """从状态记录重建会话"""
+    (seed, turn_number, game_state, turn_state, flags, rng_counter, score, dice,
+     marker_count, markers, pending_count, pending, positions, present, completed) = _STATE.unpack(state)
+
+    session = GameSession(
+        session_id=session_id,
+        player_id=player_id,
+        state=_GAME_STATES[game_state],
+        turn_state=_TURN_STATES[turn_state],
+        turn_number=turn_number,
+        temporary_markers=[TemporaryMarker(markers[2 * i], markers[2 * i + 1]) for i in range(marker_count)],
+        current_dice=DiceRoll(list(dice)) if flags & _FLAG_HAS_DICE else None,
+        first_turn=bool(flags & _FLAG_FIRST_TURN),
+        needs_checkin=bool(flags & _FLAG_NEEDS_CHECKIN),
+        pending_summit_columns=list(pending[:pending_count]),
+        rng_seed=seed if flags & _FLAG_HAS_SEED else None,
+        rng_counter=rng_counter,
+    )
+    return ReplayState(session, PlayerProgress.unpack(positions, present, completed), score, seq)
+
+
+def diff_state(old: bytes, new: bytes) -> bytes:
+    """两个状态记录之间的补丁（相距不超过 2 字节的改动合并为一段）"""
+    patch = bytearray()
+    i = 0
+    size = len(new)
+    while i < size:
+        if old[i] == new[i]:
+            i += 1
+            continue
+        start = end = i
+        i += 1
+        while i < size and i - end <= 3:
+            if old[i] != new[i]:
+                end = i
+            i += 1
+        end += 1
+        patch += bytes((start, end - start)) + new[start:end]
+        i = end
+    return bytes(patch)
+
+
+def apply_patch(state: bytearray, patch: bytes):
+    """把补丁应用到状态记录（原地修改）"""
+    i = 0
+    while i < len(patch):
+        offset, length = patch[i], patch[i + 1]
+        state[offset:offset + length] = patch[i + 2:i + 2 + length]
+        i += 2 + length
+
+
+@dataclass(slots=True)
+class TurnEvent:
+    """一条会话事件"""
+    session_id: str
+    seq: int
+    kind: str
+    patch: bytes
+    detail: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+@dataclass(slots=True)
+class TurnSnapshot:
+    """会话在某条事件之后的完整状态"""
+    session_id: str
+    seq: int
+    player_id: str
+    state: bytes
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+class MemoryTurnLogStore:
+    """内存存储（模拟、基准测试和无数据库时使用）"""
+
+    def __init__(self):
+        self.events: Dict[str, List[TurnEvent]] = {}
+        self.snapshots: Dict[str, List[TurnSnapshot]] = {}
+
+    def turn_log_last_seq(self, session_id: str) -> int:
+        events = self.events.get(session_id)
+        return events[-1].seq if events else 0
+
+    def append_turn_log(self, events: List[TurnEvent], snapshots: List[TurnSnapshot]):
+        for event in events:
+            self.events.setdefault(event.session_id, []).append(event)
+        for snapshot in snapshots:
+            self.snapshots.setdefault(snapshot.session_id, []).append(snapshot)
+
+    def load_turn_log(self, session_id: str,
+                      seq: Optional[int] = None) -> Tuple[Optional[TurnSnapshot], List[TurnEvent]]:
+        snapshots = self.snapshots.get(session_id, [])
+        events = self.events.get(session_id, [])
+        if seq is None:
+            seq = events[-1].seq if events else 0
+        index = bisect_right([s.seq for s in snapshots], seq) - 1
+        if index < 0:
+            return None, []
+        snapshot = snapshots[index]
+        seqs = [e.seq for e in events]
+        return snapshot, events[bisect_right(seqs, snapshot.seq):bisect_right(seqs, seq)]
+
+
+class TurnLog:
+    """会话事件日志（引擎持有一个实例，事件先缓冲，flush 时批量写入存储）"""
+
+    def __init__(self, store, snapshot_interval: int = SNAPSHOT_INTERVAL,
+                 max_tracked_sessions: int = DEFAULT_MAX_TRACKED_SESSIONS):
+        self.store = store
+        self.snapshot_interval = snapshot_interval
+        self.max_tracked_sessions = max_tracked_sessions
+        # 会话 -> (最后序号, 最后状态)；淘汰后下次记录时从存储读取序号并写入快照
+        self._last: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._pending_events: List[TurnEvent] = []
+        self._pending_snapshots: List[TurnSnapshot] = []
+
+    def record(self, session: GameSession, player: Player, kind: str,
+               detail: Optional[str] = None) -> Optional[TurnEvent]:
+        """
+        记录一条事件
+
+        Returns:
+            新事件；状态没有变化时不记录，返回 None
+        """
+        session_id = session.session_id
+        state = encode_state(session, player)
+        last = self._last.get(session_id)
+        if last is None:
+            # 重启或淘汰后首次记录：接续存储中的序号，并写入完整快照
+            self.flush()
+            seq = self.store.turn_log_last_seq(session_id) + 1
+            patch = b""
+            snapshot = True
+        else:
+            last_seq, last_state = last
+            if state == last_state:
+                self._last.move_to_end(session_id)
+                return None
+            seq = last_seq + 1
+            patch = diff_state(last_state, state)
+            snapshot = bool(self.snapshot_interval) and seq % self.snapshot_interval == 0
+
+        event = TurnEvent(session_id, seq, kind, patch, detail)
+        self._pending_events.append(event)
+        if snapshot:
+            self._pending_snapshots.append(TurnSnapshot(session_id, seq, session.player_id, state))
+
+        self._last[session_id] = (seq, state)
+        self._last.move_to_end(session_id)
+        if len(self._last) > self.max_tracked_sessions:
+            self._last.popitem(last=False)
+        return event
+
+    def flush(self):
+        """
+        把缓冲的事件和快照写入存储
+
+        写入失败时丢弃这批事件并停止跟踪涉及的会话：补丁是相对未落库的状态计算的，
+        下次记录时接续存储中的序号重新写入完整快照，回放结果仍然正确。异常继续抛出。
+        """
+        if not self._pending_events and not self._pending_snapshots:
+            return
+        events, snapshots = self._pending_events, self._pending_snapshots
+        self._pending_events, self._pending_snapshots = [], []
+        try:
+            self.store.append_turn_log(events, snapshots)
+        except Exception:
+            for session_id in {item.session_id for item in events + snapshots}:
+                self.forget(session_id)
+            raise
+
+    def forget(self, session_id: str):
+        """不再跟踪会话（下次记录时重新写入快照）"""
+        self._last.pop(session_id, None)
+
+    def rebuild(self, session_id: str, seq: Optional[int] = None) -> Optional[ReplayState]:
+        """
+        重建会话在第 seq 条事件之后的状态（默认最新）
+
+        Returns:
+            回放结果；没有日志时为 None
+        """
+        self.flush()
+        snapshot, events = self.store.load_turn_log(session_id, seq)
+        if snapshot is None:
+            return None
+        state = bytearray(snapshot.state)
+        for event in events:
+            apply_patch(state, event.patch)
+        last_seq = events[-1].seq if events else snapshot.seq
+        return decode_state(bytes(state), session_id, snapshot.player_id, last_seq)
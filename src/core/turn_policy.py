@@ -0,0 +1,342 @@
+"""
+停手策略表 - "该继续还是该停手？"的最优解
+
+三个临时标记都放下后，每次掷骰都可能爆掉。本模块离线求解这一阶段的单人最优停止问题，
+把结果写入紧凑的二进制表，机器人运行时以 mmap 只读映射，查询只需几次下标访问。
+
+模型:
+    状态 = 三个标记所在列（升序）+ 各列剩余格数（列长 - 永久进度 - 临时位置）
+           + 本轮尚未入账的格数 A（临时标记位置之和）
+    目标 = 本轮最终入账格数的期望（停手时 A 全部入账，爆掉时全部丢失）
+    转移 = 按本变体的 3+3 分组规则（DiceRoll.get_possible_combinations）枚举 462 种点数多重集，
+           每种结果可选一个数值或两个数值推进，取最优
+    近似 = 登顶的列视为不可再推进（不计登顶时立即入账和释放标记）
+
+本轮未入账格数不会超过三列总长减去剩余格数（MAX_AT_RISK 为其上界），只有这些 A 可达，
+表中只存可达的 A。
+
+继续的价值 C(s, A) 对 A 的斜率等于不爆掉的概率（< 1），因此最优策略是阈值形式：
+A < T(s) 时继续，否则停手。表中每个状态存阈值 T(s)（不超过最大可达 A + 1）
+和 A < T(s) 时的期望值。
+
+表文件格式（小端）:
+    头部 "<8sHHI": 魔数 b"CSPOLY01"、MAX_AT_RISK、VALUE_SCALE、状态数 N
+    uint8[N]    阈值 T(s)
+    （补齐到 4 字节）
+    uint32[N+1] 各状态期望值的起始下标
+    uint16[...] 期望值 × VALUE_SCALE，每个状态 T(s) 个（A = 0 .. T(s)-1）
+状态下标: 三列组合按字典序排列，每个组合占 (La+1)(Lb+1)(Lc+1) 个下标，
+组合内下标 = (ra × (Lb+1) + rb) × (Lc+1) + rc。
+
+生成（需要 NumPy，约 15 秒）: python -m src.core.turn_policy
+"""
+
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import combinations, combinations_with_replacement
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from ..models.game_models import (
+    COLUMN_LENGTHS, DiceRoll, PlayerProgress, TemporaryMarker, MIN_COLUMN, MAX_COLUMN, get_column_length
+)
+
+TABLE_MAGIC = b"CSPOLY01"
+DEFAULT_TABLE_PATH = os.path.join("cache", "turn_policy.bin")
+# 三列最长时本轮最多推进的格数
+MAX_AT_RISK = sum(sorted(COLUMN_LENGTHS.values())[-3:])
+VALUE_SCALE = 1000
+_HEADER = struct.Struct("<8sHHI")
+
+Step = Tuple[int, int, int]
+
+
+def _build_layout() -> Tuple[Dict[Tuple[int, int, int], int], int]:
+    """三列组合 -> 状态下标基址，以及状态总数"""
+    bases = {}
+    total = 0
+    for triple in combinations(range(MIN_COLUMN, MAX_COLUMN + 1), 3):
+        bases[triple] = total
+        a, b, c = (get_column_length(column) + 1 for column in triple)
+        total += a * b * c
+    return bases, total
+
+
+_TRIPLE_BASES, STATE_COUNT = _build_layout()
+
+
+def state_index(columns: Sequence[int], rooms: Sequence[int]) -> int:
+    """状态下标（columns 须为升序的三个不同列，rooms 为对应的剩余格数）"""
+    base = _TRIPLE_BASES[tuple(columns)]
+    _, lb, lc = (get_column_length(column) for column in columns)
+    return base + (rooms[0] * (lb + 1) + rooms[1]) * (lc + 1) + rooms[2]
+
+
+def turn_state(progress: PlayerProgress,
+               markers: Iterable[TemporaryMarker]) -> Optional[Tuple[Tuple[int, ...], Tuple[int, ...], int]]:
+    """
+    把当前局面化为表中的状态
+
+    Returns:
+        (升序的三列, 各列剩余格数, 本轮未入账格数)；临时标记不足 3 个时为 None
+    """
+    markers = sorted(markers, key=lambda marker: marker.column)
+    if len(markers) != 3:
+        return None
+    columns = tuple(marker.column for marker in markers)
+    rooms = tuple(
+        max(0, get_column_length(marker.column) - progress.get_progress(marker.column) - marker.position)
+        for marker in markers
+    )
+    return columns, rooms, sum(marker.position for marker in markers)
+
+
+# ==================== 离线求解 ====================
+
+def _roll_distribution() -> List[Tuple[List[Tuple[int, int]], float]]:
+    """462 种点数多重集的 (可组合数值对, 概率)"""
+    distribution = []
+    for results in combinations_with_replacement(range(1, 7), 6):
+        count = math.factorial(6)
+        for n in Counter(results).values():
+            count //= math.factorial(n)
+        distribution.append((DiceRoll(list(results)).get_possible_combinations(), count / 6 ** 6))
+    return distribution
+
+
+def _outcome_classes(triple: Tuple[int, int, int],
+                     distribution) -> Dict[FrozenSet[Step], float]:
+    """按"可选推进方式的集合"合并掷骰结果，推进方式为三列各推进的格数"""
+    classes: Counter = Counter()
+    for pairs, probability in distribution:
+        steps = set()
+        for pair in pairs:
+            indices = [triple.index(column) for column in pair if column in triple]
+            for index in indices:
+                single = [0, 0, 0]
+                single[index] = 1
+                steps.add(tuple(single))
+            if len(indices) == 2:
+                double = [0, 0, 0]
+                for index in indices:
+                    double[index] += 1
+                steps.add(tuple(double))
+        classes[frozenset(steps)] += probability
+    return classes
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("生成停手策略表需要 NumPy: pip install numpy")
+    return numpy
+
+
+def solve_triple(triple: Tuple[int, int, int], distribution=None):
+    """
+    对一组三列做值迭代
+
+    Returns:
+        形状 (La+1, Lb+1, Lc+1, MAX_AT_RISK+1) 的数组：在该状态再掷一次并按最优策略继续时，
+        本轮最终入账格数的期望 C(s, A)
+    """
+    np = _require_numpy()
+    distribution = distribution or _roll_distribution()
+    classes = [(steps, p) for steps, p in _outcome_classes(triple, distribution).items() if steps]
+    moves = set().union(*(steps for steps, _ in classes))
+
+    la, lb, lc = (get_column_length(column) for column in triple)
+    shape = (la + 1, lb + 1, lc + 1)
+    n = MAX_AT_RISK + 1
+    at_risk = np.arange(n + 2, dtype=np.float64)
+    # 多留两格：A 超过上限的状态按停手计值
+    values = np.broadcast_to(at_risk, shape + (n + 2,)).copy()
+
+    # 每次推进至少少一格余量，迭代次数不超过三列总长
+    for _ in range(la + lb + lc + 1):
+        successors = {}
+        for step in moves:
+            da, db, dc = step
+            k = da + db + dc
+            successor = np.full(shape + (n,), -1.0)
+            successor[da:, db:, dc:, :] = values[:la + 1 - da, :lb + 1 - db, :lc + 1 - dc, k:k + n]
+            successors[step] = successor
+
+        continuation = np.zeros(shape + (n,))
+        for steps, probability in classes:
+            steps = iter(steps)
+            best = successors[next(steps)]
+            for step in steps:
+                best = np.maximum(best, successors[step])
+            # 没有合法推进（-1）即爆掉，本轮入账为 0
+            continuation += probability * np.maximum(best, 0.0)
+
+        updated = np.maximum(continuation, at_risk[:n])
+        if np.array_equal(updated, values[..., :n]):
+            break
+        values[..., :n] = updated
+    return continuation
+
+
+def build_table(path: str = DEFAULT_TABLE_PATH) -> int:
+    """求解全部 560 组三列并写入表文件（原子替换），返回文件字节数"""
+    np = _require_numpy()
+    distribution = _roll_distribution()
+    thresholds = np.zeros(STATE_COUNT, dtype=np.uint8)
+    chunks = []
+    at_risk = np.arange(MAX_AT_RISK + 1)
+
+    for triple, base in _TRIPLE_BASES.items():
+        continuation = solve_triple(triple, distribution)
+        # 可达的 A 不超过三列总长减去剩余格数
+        la, lb, lc = continuation.shape[:3]
+        reachable = (la + lb + lc - 3) - np.indices((la, lb, lc)).sum(axis=0).reshape(-1)
+        flat = continuation.reshape(-1, MAX_AT_RISK + 1)
+        keep = (flat > at_risk) & (at_risk <= reachable[:, None])
+        counts = keep.sum(axis=1)
+        thresholds[base:base + len(counts)] = counts
+        chunks.append(np.round(flat[keep] * VALUE_SCALE).astype("<u2"))
+
+    offsets = np.zeros(STATE_COUNT + 1, dtype="<u4")
+    np.cumsum(thresholds, out=offsets[1:])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(TABLE_MAGIC, MAX_AT_RISK, VALUE_SCALE, STATE_COUNT))
+        f.write(thresholds.tobytes())
+        f.write(bytes(-(_HEADER.size + STATE_COUNT) % 4))
+        f.write(offsets.tobytes())
+        for chunk in chunks:
+            f.write(chunk.tobytes())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+# ==================== 运行时查询 ====================
+
+class TurnPolicyTable:
+    """内存映射的停手策略表"""
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, max_at_risk, scale, count = _HEADER.unpack_from(self._mmap)
+            if magic != TABLE_MAGIC or count != STATE_COUNT:
+                raise ValueError("表文件格式不匹配")
+            self.max_at_risk = max_at_risk
+            self.scale = scale
+
+            view = memoryview(self._mmap)
+            offsets_start = _HEADER.size + count + (-(_HEADER.size + count) % 4)
+            values_start = offsets_start + 4 * (count + 1)
+            self._thresholds = view[_HEADER.size:_HEADER.size + count]
+            offsets = view[offsets_start:values_start]
+            values = view[values_start:]
+            if sys.byteorder == "little":
+                self._offsets = offsets.cast("I")
+                self._values = values.cast("H")
+            else:
+                self._offsets = array("I", offsets)
+                self._offsets.byteswap()
+                self._values = array("H", values)
+                self._values.byteswap()
+            if self._offsets[count] != len(self._values):
+                raise ValueError("表文件长度不匹配")
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """释放映射"""
+        for name in ("_thresholds", "_offsets", "_values"):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+            setattr(self, name, None)
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stop_threshold(self, columns: Sequence[int], rooms: Sequence[int]) -> int:
+        """本轮未入账格数达到该值时应停手（超过最大可达值时表示该状态下始终继续）"""
+        return self._thresholds[state_index(columns, rooms)]
+
+    def continue_value(self, columns: Sequence[int], rooms: Sequence[int], at_risk: int) -> Optional[float]:
+        """继续掷骰（之后按最优策略）时本轮最终入账格数的期望；应停手时为 None"""
+        index = state_index(columns, rooms)
+        if at_risk >= self._thresholds[index]:
+            return None
+        return self._values[self._offsets[index] + at_risk] / self.scale
+
+    def value(self, columns: Sequence[int], rooms: Sequence[int], at_risk: int) -> float:
+        """按最优策略本轮最终入账格数的期望"""
+        continuation = self.continue_value(columns, rooms, at_risk)
+        return at_risk if continuation is None else continuation
+
+    def move_value(self, columns: Sequence[int], rooms: Sequence[int], at_risk: int,
+                   move: Sequence[int]) -> Optional[float]:
+        """
+        选择推进 move（一个或两个数值）后的期望
+
+        Returns:
+            期望值；move 中有不属于三个标记的列或超出剩余格数时为 None
+        """
+        new_rooms = list(rooms)
+        for column in move:
+            if column not in columns:
+                return None
+            index = columns.index(column)
+            new_rooms[index] -= 1
+            if new_rooms[index] < 0:
+                return None
+        return self.value(columns, new_rooms, at_risk + len(move))
+
+    def rank_moves(self, columns: Sequence[int], rooms: Sequence[int], at_risk: int,
+                   moves: Iterable[Sequence[int]]) -> List[Tuple[List[int], float]]:
+        """按期望从高到低排列可评估的推进方式"""
+        ranked = []
+        for move in moves:
+            value = self.move_value(columns, rooms, at_risk, move)
+            if value is not None:
+                ranked.append((list(move), value))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+
+# 全局实例（表文件缺失时为 None，不自动生成）
+_turn_policy_table: Optional[TurnPolicyTable] = None
+
+
+def get_turn_policy_table(path: str = DEFAULT_TABLE_PATH) -> Optional[TurnPolicyTable]:
+    """获取全局停手策略表；未生成时返回 None"""
+    global _turn_policy_table
+    if _turn_policy_table is None:
+        try:
+            _turn_policy_table = TurnPolicyTable(path)
+        except FileNotFoundError:
+            return None
+    return _turn_policy_table
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="生成停手策略表")
+    parser.add_argument("--out", default=DEFAULT_TABLE_PATH, help="输出路径")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    size = build_table(args.out)
+    print(f"停手策略表已生成: {args.out}（{size / 1024:.0f} KB，{time.perf_counter() - start:.1f} s）")
@@ -0,0 +1,165 @@
+"""
+有界内存工作集 - GameEngine 的玩家和会话缓存
+
+机器人长期运行时玩家和会话只增不减。工作集按 LRU 顺序保存最近访问的条目，
+超过容量或闲置超时的条目被直接丢弃；下次访问时再从数据库加载。
+
+不做淘汰回写：引擎的每次修改都已经由服务层的 update_player / save_game_session 落库，
+而批量加分、GM 修改、成就奖励等路径直接写数据库，缓存副本可能已经过时，回写会覆盖这些修改。
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, MutableMapping, Optional
+
+from ..models.game_models import GameSession, GameState
+
+# 默认容量与闲置超时（秒）
+DEFAULT_MAX_PLAYERS = 2048
+DEFAULT_MAX_SESSIONS = 2048
+DEFAULT_IDLE_TTL = 6 * 3600
+
+
+class LRUWorkingSet(MutableMapping):
+    """
+    LRU + 闲置超时的有界字典
+
+    读取（[]、get）会刷新条目的访问时间；遍历、values()/items() 和 in 检查不会。
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        """
+        初始化工作集
+
+        Args:
+            max_size: 最多保存的条目数
+            ttl: 闲置超时（秒），None 表示不按时间淘汰
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._data:
+            return self[key]
+        self.misses += 1
+        return default
+
+    def __setitem__(self, key: str, value: Any):
+        self._data[key] = value
+        self._touch(key)
+        self._evict()
+
+    def __delitem__(self, key: str):
+        del self._data[key]
+        del self._touched[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def values(self):
+        return list(self._data.values())
+
+    def items(self):
+        return list(self._data.items())
+
+    def clear(self):
+        """清空（用于重置游戏数据）"""
+        self._data.clear()
+        self._touched.clear()
+
+    def _touch(self, key: str):
+        self._data.move_to_end(key)
+        self._touched[key] = time.monotonic()
+
+    def _evict(self):
+        """淘汰超出容量和闲置超时的条目（从最久未访问的一端开始）"""
+        cutoff = time.monotonic() - self.ttl if self.ttl is not None else None
+        while self._data:
+            key = next(iter(self._data))
+            over_capacity = len(self._data) > self.max_size
+            expired = cutoff is not None and self._touched[key] < cutoff
+            if not over_capacity and not expired:
+                break
+            value = self._data.pop(key)
+            del self._touched[key]
+            self.evictions += 1
+            self._on_evicted(key, value)
+
+    def _on_evicted(self, key: str, value: Any):
+        """条目被淘汰后的钩子（子类维护附加索引）"""
+
+    def expire(self):
+        """主动清理闲置超时的条目"""
+        self._evict()
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        return {
+            "size": len(self._data),
+            "capacity": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SessionWorkingSet(LRUWorkingSet):
+    """会话工作集，额外维护 玩家 -> 活跃会话 索引"""
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        super().__init__(max_size, ttl)
+        self._active_by_player: Dict[str, str] = {}
+
+    def __setitem__(self, key: str, value: GameSession):
+        if value.state == GameState.ACTIVE:
+            self._active_by_player[value.player_id] = key
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str):
+        session = self._data[key]
+        super().__delitem__(key)
+        self._drop_index(session.player_id, key)
+
+    def clear(self):
+        super().clear()
+        self._active_by_player.clear()
+
+    def _on_evicted(self, key: str, value: GameSession):
+        self._drop_index(value.player_id, key)
+        super()._on_evicted(key, value)
+
+    def _drop_index(self, player_id: str, session_id: str):
+        if self._active_by_player.get(player_id) == session_id:
+            del self._active_by_player[player_id]
+
+    def active_session(self, player_id: str) -> Optional[GameSession]:
+        """O(1) 获取玩家的活跃会话（会话已结束时同步清理索引）"""
+        session_id = self._active_by_player.get(player_id)
+        if session_id is None:
+            return None
+        session = self.get(session_id)
+        if session is None or session.state != GameState.ACTIVE:
+            self._active_by_player.pop(player_id, None)
+            return None
+        return session
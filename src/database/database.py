@@ -3,19 +3,38 @@
 """
 
 import asyncio
-from typing import Optional, List, Dict, Any
-from sqlalchemy import create_engine, select
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from contextlib import contextmanager, asynccontextmanager
 
 from .models import Base, PlayerDB, GameSessionDB, PlayerProgressDB, TemporaryMarkerDB
-from ..models.game_models import Player, GameSession, Faction, GameState
+from ..models.game_models import Player, PlayerProgress, GameSession, Faction, GameState
 from ..config.config_manager import get_config
 
 
+# 玩家进度存储方式：rows = 每列一行 player_progress；packed = players 表单行打包列
+PROGRESS_STORAGE_MODES = ("rows", "packed")
+EMPTY_PACKED_PROGRESS = bytes(16)
+
+# 旧数据库上需要补齐的列：表名 -> 列名（create_all 只建新表，不修改已有表）
+# 对应 migrations/ 中只加列的迁移，启动时自动补齐，无需手动运行迁移脚本
+UPGRADE_COLUMNS = {
+    "players": ("packed_progress", "progress_mask", "completed_mask"),  # 003
+    "game_sessions": ("rng_seed", "rng_counter"),  # 004
+}
+
+
 class DatabaseManager:
-    """数据库管理器"""
+    """
+    数据库管理器
+
+    玩家进度的读取由数据自身决定：packed_progress 非空时以打包列为准，否则读取 player_progress 行；
+    progress_storage 只决定写入方式。旧数据库在 create_tables 时自动补齐打包列（值为空，
+    仍读取 player_progress 行），玩家在首次保存时自动打包；也可运行迁移 003 一次性回填。
+    """
 
     def __init__(self, database_url: str = None):
         if database_url is None:
@@ -28,9 +47,50 @@ class DatabaseManager:
         self.engine = create_engine(database_url, echo=echo)
         self.session_factory = sessionmaker(bind=self.engine)
 
+        self.progress_storage = get_config("game_config", "database.progress_storage", "packed")
+        if self.progress_storage not in PROGRESS_STORAGE_MODES:
+            print(f"警告：未知的进度存储方式 {self.progress_storage}，使用 rows")
+            self.progress_storage = "rows"
+
+    @property
+    def packed_progress(self) -> bool:
+        """是否以打包列写入玩家进度"""
+        return self.progress_storage == "packed"
+
     def create_tables(self):
-        """创建数据库表"""
+        """创建数据库表，并为旧数据库补齐新增的列"""
         Base.metadata.create_all(self.engine)
+        self.upgrade_schema()
+
+    def upgrade_schema(self) -> List[str]:
+        """
+        为已有表补齐 UPGRADE_COLUMNS 中缺少的列（可重复执行）
+
+        Returns:
+            新增的列（表名.列名）
+        """
+        from sqlalchemy.schema import CreateColumn
+
+        existing_tables = set(inspect(self.engine).get_table_names())
+        added = []
+        with self.engine.begin() as conn:
+            for table_name, column_names in UPGRADE_COLUMNS.items():
+                if table_name not in existing_tables:
+                    continue
+                existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+                table = Base.metadata.tables[table_name]
+                for column_name in column_names:
+                    if column_name in existing:
+                        continue
+                    column = table.c[column_name]
+                    ddl = str(CreateColumn(column).compile(dialect=self.engine.dialect))
+                    if column.default is not None and column.default.is_scalar:
+                        ddl += f" DEFAULT {column.default.arg!r}"
+                    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+                    added.append(f"{table_name}.{column_name}")
+        if added:
+            print(f"数据库结构已升级，新增列: {', '.join(added)}")
+        return added
 
     def drop_tables(self):
         """删除数据库表"""
@@ -58,6 +118,9 @@ class DatabaseManager:
                 player.total_dice_rolls = 0
                 player.total_turns = 0
                 player.is_active = True
+                player.packed_progress = EMPTY_PACKED_PROGRESS
+                player.progress_mask = 0
+                player.completed_mask = 0
 
             session.commit()
             return True
@@ -86,11 +149,46 @@ class DatabaseManager:
             player_db = PlayerDB(
                 player_id=player_id,
                 username=username,
-                faction=faction
+                faction=faction,
+                packed_progress=EMPTY_PACKED_PROGRESS if self.packed_progress else None
             )
             session.add(player_db)
             return True
 
+    @staticmethod
+    def _to_player(player_db: PlayerDB, progress_records: Optional[List[PlayerProgressDB]]) -> Player:
+        """数据库记录转换为业务模型（progress_records 为 None 时使用打包进度列）"""
+        player = Player(
+            player_id=player_db.player_id,
+            username=player_db.username,
+            faction=player_db.faction,
+            current_score=player_db.current_score,
+            total_score=player_db.total_score,
+            games_played=player_db.games_played,
+            games_won=player_db.games_won,
+            total_dice_rolls=getattr(player_db, 'total_dice_rolls', 0),
+            total_turns=getattr(player_db, 'total_turns', 0),
+            is_active=player_db.is_active,
+            created_at=player_db.created_at,
+            last_active=player_db.last_active
+        )
+
+        # 设置进度
+        if progress_records is None:
+            player.progress = PlayerProgress.unpack(
+                player_db.packed_progress, player_db.progress_mask, player_db.completed_mask)
+            return player
+
+        for progress in progress_records:
+            player.progress.set_progress(
+                progress.column_number,
+                progress.permanent_progress
+            )
+            if progress.is_completed:
+                player.progress.completed_columns.add(progress.column_number)
+
+        return player
+
     def get_player(self, player_id: str) -> Optional[Player]:
         """获取玩家"""
         with self.get_session() as session:
@@ -98,78 +196,34 @@ class DatabaseManager:
             if not player_db:
                 return None
 
-            # 获取玩家进度
-            progress_records = session.query(PlayerProgressDB).filter_by(
-                player_id=player_id
-            ).all()
-
-            # 转换为业务模型
-            player = Player(
-                player_id=player_db.player_id,
-                username=player_db.username,
-                faction=player_db.faction,
-                current_score=player_db.current_score,
-                total_score=player_db.total_score,
-                games_played=player_db.games_played,
-                games_won=player_db.games_won,
-                total_dice_rolls=getattr(player_db, 'total_dice_rolls', 0),
-                total_turns=getattr(player_db, 'total_turns', 0),
-                is_active=player_db.is_active,
-                created_at=player_db.created_at,
-                last_active=player_db.last_active
-            )
-
-            # 设置进度
-            for progress in progress_records:
-                player.progress.set_progress(
-                    progress.column_number,
-                    progress.permanent_progress
-                )
-                if progress.is_completed:
-                    player.progress.completed_columns.add(progress.column_number)
-
-            return player
+            # 已打包的玩家无需再查询进度行
+            progress_by_player = self._query_progress_rows(session, [player_db])
+            return self._build_player(player_db, progress_by_player)
 
     def get_all_active_players(self) -> List[Player]:
         """获取所有活跃玩家"""
         with self.get_session() as session:
             player_dbs = session.query(PlayerDB).filter_by(is_active=True).all()
-            players = []
-
-            for player_db in player_dbs:
-                # 获取玩家进度
-                progress_records = session.query(PlayerProgressDB).filter_by(
-                    player_id=player_db.player_id
-                ).all()
-
-                # 转换为业务模型
-                player = Player(
-                    player_id=player_db.player_id,
-                    username=player_db.username,
-                    faction=player_db.faction,
-                    current_score=player_db.current_score,
-                    total_score=player_db.total_score,
-                    games_played=player_db.games_played,
-                    games_won=player_db.games_won,
-                    total_dice_rolls=getattr(player_db, 'total_dice_rolls', 0),
-                    total_turns=getattr(player_db, 'total_turns', 0),
-                    is_active=player_db.is_active,
-                    created_at=player_db.created_at,
-                    last_active=player_db.last_active
-                )
-
-                # 设置进度
-                for progress in progress_records:
-                    player.progress.set_progress(
-                        progress.column_number,
-                        progress.permanent_progress
-                    )
-                    if progress.is_completed:
-                        player.progress.completed_columns.add(progress.column_number)
-
-                players.append(player)
-
-            return players
+            progress_by_player = self._query_progress_rows(session, player_dbs)
+            return [self._build_player(player_db, progress_by_player) for player_db in player_dbs]
+
+    @staticmethod
+    def _query_progress_rows(session: Session, player_dbs: List[PlayerDB],
+                             chunk_size: int = 500) -> Dict[str, List[PlayerProgressDB]]:
+        """按玩家分组查询进度行，只查询没有打包进度的玩家（IN 列表按 chunk_size 分批）"""
+        player_ids = [p.player_id for p in player_dbs if p.packed_progress is None]
+        progress_by_player: Dict[str, List[PlayerProgressDB]] = {player_id: [] for player_id in player_ids}
+        for start in range(0, len(player_ids), chunk_size):
+            chunk = player_ids[start:start + chunk_size]
+            for progress in session.query(PlayerProgressDB).filter(
+                    PlayerProgressDB.player_id.in_(chunk)).all():
+                progress_by_player[progress.player_id].append(progress)
+        return progress_by_player
+
+    def _build_player(self, player_db: PlayerDB,
+                      progress_by_player: Dict[str, List[PlayerProgressDB]]) -> Player:
+        """使用 _query_progress_rows 的结果构建玩家（不在结果中的玩家使用打包进度）"""
+        return self._to_player(player_db, progress_by_player.get(player_db.player_id))
 
     def update_player(self, player: Player) -> bool:
         """更新玩家信息"""
@@ -192,6 +246,15 @@ class DatabaseManager:
             player_db.is_active = player.is_active
             player_db.last_active = player.last_active
 
+            if self.packed_progress:
+                # 打包存储：进度和完成情况随玩家行一次写入
+                (player_db.packed_progress, player_db.progress_mask,
+                 player_db.completed_mask) = player.progress.pack()
+                return True
+
+            # 行存储：清空打包列，读取时以 player_progress 行为准
+            player_db.packed_progress = None
+
             # 更新进度
             for column, progress in player.progress.permanent_progress.items():
                 progress_db = session.query(PlayerProgressDB).filter_by(
@@ -234,6 +297,8 @@ class DatabaseManager:
                 session_db.turn_number = session_obj.turn_number
                 session_db.dice_results = dice_results
                 session_db.forced_dice_result = session_obj.forced_dice_result
+                session_db.rng_seed = session_obj.rng_seed
+                session_db.rng_counter = session_obj.rng_counter
                 session_db.first_turn = session_obj.first_turn
                 session_db.needs_checkin = session_obj.needs_checkin
                 session_db.updated_at = session_obj.updated_at
@@ -249,6 +314,8 @@ class DatabaseManager:
                     turn_number=session_obj.turn_number,
                     dice_results=dice_results,
                     forced_dice_result=session_obj.forced_dice_result,
+                    rng_seed=session_obj.rng_seed,
+                    rng_counter=session_obj.rng_counter,
                     first_turn=session_obj.first_turn,
                     needs_checkin=session_obj.needs_checkin,
                     created_at=session_obj.created_at,
@@ -272,6 +339,41 @@ class DatabaseManager:
 
             return True
 
+    @staticmethod
+    def _to_game_session(session_db: GameSessionDB, markers_db: List[TemporaryMarkerDB]) -> GameSession:
+        """数据库记录转换为业务模型"""
+        game_session = GameSession(
+            session_id=session_db.session_id,
+            player_id=session_db.player_id,
+            state=session_db.session_state,
+            turn_state=session_db.turn_state,
+            turn_number=session_db.turn_number,
+            first_turn=session_db.first_turn,
+            needs_checkin=session_db.needs_checkin,
+            rng_seed=session_db.rng_seed,
+            rng_counter=session_db.rng_counter or 0,
+            created_at=session_db.created_at,
+            updated_at=session_db.updated_at
+        )
+
+        # 添加临时标记
+        for marker_db in markers_db:
+            game_session.add_temporary_marker(
+                marker_db.column_number,
+                marker_db.current_position
+            )
+
+        # 恢复骰子结果
+        if session_db.dice_results:
+            from ..models.game_models import DiceRoll
+            game_session.current_dice = DiceRoll(results=session_db.dice_results)
+
+        # 恢复强制骰子结果
+        if session_db.forced_dice_result:
+            game_session.forced_dice_result = session_db.forced_dice_result
+
+        return game_session
+
     def get_game_session(self, session_id: str) -> Optional[GameSession]:
         """获取游戏会话"""
         with self.get_session() as session:
@@ -286,36 +388,7 @@ class DatabaseManager:
                 session_id=session_id
             ).all()
 
-            # 转换为业务模型
-            game_session = GameSession(
-                session_id=session_db.session_id,
-                player_id=session_db.player_id,
-                state=session_db.session_state,
-                turn_state=session_db.turn_state,
-                turn_number=session_db.turn_number,
-                first_turn=session_db.first_turn,
-                needs_checkin=session_db.needs_checkin,
-                created_at=session_db.created_at,
-                updated_at=session_db.updated_at
-            )
-
-            # 添加临时标记
-            for marker_db in markers_db:
-                game_session.add_temporary_marker(
-                    marker_db.column_number,
-                    marker_db.current_position
-                )
-
-            # 恢复骰子结果
-            if session_db.dice_results:
-                from ..models.game_models import DiceRoll
-                game_session.current_dice = DiceRoll(results=session_db.dice_results)
-
-            # 恢复强制骰子结果
-            if session_db.forced_dice_result:
-                game_session.forced_dice_result = session_db.forced_dice_result
-
-            return game_session
+            return self._to_game_session(session_db, markers_db)
 
     def get_player_active_session(self, player_id: str) -> Optional[GameSession]:
         """获取玩家活跃会话"""
@@ -339,7 +412,9 @@ class DatabaseManager:
                 PlayerDB.faction,
                 PlayerDB.current_score,
                 PlayerDB.games_won,
-                PlayerDB.games_played
+                PlayerDB.games_played,
+                PlayerDB.packed_progress,
+                PlayerDB.completed_mask
             ).filter(PlayerDB.is_active == True)
 
             players = query.all()
@@ -347,10 +422,13 @@ class DatabaseManager:
 
             for player in players:
                 # 获取完成的列数
-                completed_count = session.query(PlayerProgressDB).filter_by(
-                    player_id=player.player_id,
-                    is_completed=True
-                ).count()
+                if player.packed_progress is not None:
+                    completed_count = (player.completed_mask or 0).bit_count()
+                else:
+                    completed_count = session.query(PlayerProgressDB).filter_by(
+                        player_id=player.player_id,
+                        is_completed=True
+                    ).count()
 
                 win_rate = (player.games_won / player.games_played * 100) if player.games_played > 0 else 0
 
@@ -394,6 +472,122 @@ class DatabaseManager:
                 # 删除会话
                 session.delete(old_session)
 
+                # 删除会话事件日志
+                self._delete_turn_log(session, old_session.session_id)
+
+            # 清理过期的指令幂等记录
+            from .models import ProcessedCommandDB
+            session.query(ProcessedCommandDB).filter(
+                ProcessedCommandDB.processed_at < cutoff_date
+            ).delete()
+
+    def claim_command_key(self, idempotency_key: str, player_id: str, command: str) -> bool:
+        """登记指令幂等键，返回是否首次登记（False 表示该指令已处理过）"""
+        from .models import ProcessedCommandDB
+
+        try:
+            with self.get_session() as session:
+                session.add(ProcessedCommandDB(
+                    idempotency_key=idempotency_key,
+                    player_id=player_id,
+                    command=command[:200]
+                ))
+            return True
+        except IntegrityError as e:
+            # 只有幂等键已存在才算重复投递；外键等其他约束失败照常抛出
+            with self.get_session() as session:
+                if session.get(ProcessedCommandDB, idempotency_key) is not None:
+                    return False
+            print(f"登记指令幂等键失败: {e}")
+            raise
+
+    def release_command_key(self, idempotency_key: str) -> bool:
+        """删除指令幂等键（指令执行失败时调用，允许重新投递的消息再次执行）"""
+        from .models import ProcessedCommandDB
+
+        with self.get_session() as session:
+            return session.query(ProcessedCommandDB).filter_by(
+                idempotency_key=idempotency_key).delete() > 0
+
+    # ========== 会话事件日志 ==========
+
+    def turn_log_last_seq(self, session_id: str) -> int:
+        """获取会话最后一条事件的序号（没有事件时为 0）"""
+        from sqlalchemy import func
+        from .models import SessionEventDB
+
+        with self.get_session() as session:
+            last = session.query(func.max(SessionEventDB.seq)).filter(
+                SessionEventDB.session_id == session_id
+            ).scalar()
+            return last or 0
+
+    def append_turn_log(self, events: list, snapshots: list) -> bool:
+        """批量追加会话事件和快照（TurnEvent / TurnSnapshot）"""
+        from .models import SessionEventDB, SessionSnapshotDB
+
+        with self.get_session() as session:
+            session.add_all([
+                SessionEventDB(
+                    session_id=event.session_id,
+                    seq=event.seq,
+                    kind=event.kind,
+                    detail=event.detail[:100] if event.detail else None,
+                    patch=event.patch,
+                    created_at=event.created_at
+                )
+                for event in events
+            ])
+            for snapshot in snapshots:
+                session.merge(SessionSnapshotDB(
+                    session_id=snapshot.session_id,
+                    seq=snapshot.seq,
+                    player_id=snapshot.player_id,
+                    state=snapshot.state,
+                    created_at=snapshot.created_at
+                ))
+            return True
+
+    def load_turn_log(self, session_id: str, seq: Optional[int] = None) -> Tuple[Optional[Any], List[Any]]:
+        """
+        读取回放第 seq 条事件所需的日志（默认最新）
+
+        Returns:
+            (不晚于 seq 的最近快照, 快照之后到 seq 为止的事件)；没有快照时为 (None, [])
+        """
+        from ..core.turn_log import TurnEvent, TurnSnapshot
+        from .models import SessionEventDB, SessionSnapshotDB
+
+        with self.get_session() as session:
+            query = session.query(SessionSnapshotDB).filter(SessionSnapshotDB.session_id == session_id)
+            if seq is not None:
+                query = query.filter(SessionSnapshotDB.seq <= seq)
+            snapshot_db = query.order_by(SessionSnapshotDB.seq.desc()).first()
+            if not snapshot_db:
+                return None, []
+
+            query = session.query(SessionEventDB).filter(
+                SessionEventDB.session_id == session_id,
+                SessionEventDB.seq > snapshot_db.seq
+            )
+            if seq is not None:
+                query = query.filter(SessionEventDB.seq <= seq)
+            events = [
+                TurnEvent(e.session_id, e.seq, e.kind, e.patch, e.detail, e.created_at)
+                for e in query.order_by(SessionEventDB.seq).all()
+            ]
+            snapshot = TurnSnapshot(snapshot_db.session_id, snapshot_db.seq, snapshot_db.player_id,
+                                    snapshot_db.state, snapshot_db.created_at)
+            return snapshot, events
+
+    @staticmethod
+    def _delete_turn_log(session: Session, session_id: str):
+        """删除会话的事件和快照"""
+        from .models import SessionEventDB, SessionSnapshotDB
+
+        session.query(SessionEventDB).filter_by(session_id=session_id).delete()
+        session.query(SessionSnapshotDB).filter_by(session_id=session_id).delete()
+
     # ========== 道具系统CRUD操作 ==========
 
     def add_item_to_inventory(self, player_id: str, item_name: str, item_type: str = "consumable", quantity: int = 1) -> bool:
@@ -3,7 +3,7 @@
 """
 
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, Text, JSON,
+    Column, Integer, BigInteger, String, Boolean, DateTime, Text, JSON, LargeBinary,
     ForeignKey, UniqueConstraint, CheckConstraint, Enum
 )
 from sqlalchemy.ext.declarative import declarative_base
@@ -34,6 +34,11 @@ class PlayerDB(Base):
     last_active = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
 
+    # 打包进度（progress_storage = packed 时使用，见 PlayerProgress.pack）
+    packed_progress = Column(LargeBinary(16), nullable=True)  # 第 i 字节 = 第 i+3 列的进度
+    progress_mask = Column(Integer, default=0)                 # 已设置列掩码
+    completed_mask = Column(Integer, default=0)                # 已完成列掩码
+
     # 关联关系
     sessions = relationship("GameSessionDB", back_populates="player")
     progress = relationship("PlayerProgressDB", back_populates="player")
@@ -62,6 +67,8 @@ class GameSessionDB(Base):
     turn_number = Column(Integer, default=1)
     dice_results = Column(JSON)  # [1,2,3,4,5,6]
     forced_dice_result = Column(JSON, nullable=True)  # 强制骰子结果 [4,5,5,5,6,6]
+    rng_seed = Column(BigInteger, nullable=True)  # 骰子流种子
+    rng_counter = Column(Integer, default=0)  # 已掷次数，(rng_seed, rng_counter) 复现下一次掷骰
     first_turn = Column(Boolean, default=True)
     needs_checkin = Column(Boolean, default=False)
     created_at = Column(DateTime, default=func.now())
@@ -370,4 +377,39 @@ class MapElementTriggerDB(Base):
         CheckConstraint('column_number >= 3 AND column_number <= 18', name='check_trigger_column_range'),
         CheckConstraint('position >= 1', name='check_trigger_position_positive'),
         CheckConstraint("element_type IN ('trap', 'item', 'encounter')", name='check_element_type'),
-    )
\ No newline at end of file
+    )
+
+class ProcessedCommandDB(Base):
+    """已处理指令数据库模型（积分变动类指令的幂等记录）"""
+    __tablename__ = 'processed_commands'
+
+    idempotency_key = Column(String(100), primary_key=True)  # self_id:message_id
+    player_id = Column(String(50), ForeignKey('players.player_id'), nullable=False)
+    command = Column(String(200), nullable=False)
+    processed_at = Column(DateTime, default=func.now(), index=True)
+
+class SessionEventDB(Base):
+    """会话事件数据库模型（只追加，patch 为相对上一事件的状态补丁，见 core/turn_log.py）"""
+    __tablename__ = 'session_events'
+
+    event_id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(50), nullable=False, index=True)
+    seq = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False)
+    detail = Column(String(100))
+    patch = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('session_id', 'seq', name='unique_session_event_seq'),
+    )
+
+class SessionSnapshotDB(Base):
+    """会话快照数据库模型（第 seq 条事件之后的完整状态记录）"""
+    __tablename__ = 'session_snapshots'
+
+    session_id = Column(String(50), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    player_id = Column(String(50), nullable=False)
+    state = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=func.now())
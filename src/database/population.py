@@ -0,0 +1,459 @@
+"""
+合成玩家群体生成器 - 向新数据库批量写入可复现的大规模测试数据
+
+按种子生成 N 名玩家及其关联数据：
+    players              两个阵营各半；经验值 ~ Beta(2, 5) 决定对局数、积分和进度
+    永久进度             中间列（7-14）更常见，经验越高推进越多、登顶越多，获胜者 3 列登顶
+    game_sessions        active_session_rate 的玩家有进行中的会话（含 0-3 个临时标记和骰子流种子）
+    temporary_markers    只放在未登顶的列
+    player_inventory     道具名来自道具定义
+    player_achievements  成就名和分类来自 achievements 配置
+    score_transactions   掷骰消耗、作品奖励、购买道具、地图奖励等
+    shop_transactions    与购买道具的积分记录对应
+    trap_history / encounter_history  陷阱名和遭遇名来自内容注册表
+    first_completions    每列最先登顶的玩家
+
+每 chunk_size 名玩家为一批，每批用 (种子, 批序号) 独立播种，可由多个进程并行生成，
+结果与进程数无关；主进程在一个连接上逐批 executemany 写入（SQLite 时关闭同步写盘）。
+同一种子、参数和 base_time 生成的数据完全相同。
+
+用法:
+    python -m src.database.population --players 100000 --db sqlite:///cache/population.db --reset
+"""
+
+import itertools
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from .models import (
+    EncounterHistoryDB, FirstCompletionDB, GameSessionDB, PlayerAchievementDB, PlayerDB,
+    PlayerInventoryDB, PlayerProgressDB, ScoreTransactionDB, ShopTransactionDB,
+    TemporaryMarkerDB, TrapHistoryDB
+)
+from ..models.game_models import (
+    COLUMN_LENGTHS, Faction, GameState, PlayerProgress, TurnState, WINNING_COLUMN_COUNT
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# 列被选中推进的相对权重（与两组三骰之和的出现频率大致相同，中间列最常见）
+_COLUMN_WEIGHTS = {column: min(column - 2, 19 - column) for column in COLUMN_LENGTHS}
+
+# 进行中会话的轮次状态分布
+_TURN_STATES = (
+    (TurnState.DICE_ROLL, 0.5),
+    (TurnState.MOVE_MARKERS, 0.2),
+    (TurnState.DECISION, 0.2),
+    (TurnState.WAITING_FOR_CHECKIN, 0.1),
+)
+
+_EARN_SOURCES = ("artwork", "map_reward", "achievement")
+_SPEND_SOURCES = ("dice_cost", "item_purchase")
+
+
+@dataclass
+class PopulationSpec:
+    """生成参数（各项数量为每名玩家的平均值）"""
+    players: int = 1000
+    seed: int = 0
+    id_prefix: str = "p"
+    active_session_rate: float = 0.3
+    inventory_items: float = 2.0
+    achievements: float = 1.5
+    transactions: float = 6.0
+    history: float = 2.0
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    workers: int = 1
+    # 时间戳的基准时间（默认当前时间）；固定后同一种子生成的数据逐字节相同
+    base_time: Optional[datetime] = None
+
+
+@dataclass
+class _Catalog:
+    """生成时使用的内容名称"""
+    items: List[tuple]          # (名称, 价格)
+    achievements: List[tuple]   # (名称, 分类)
+    traps: List[str]
+    encounters: List[str]
+
+
+def _load_catalog() -> _Catalog:
+    from ..config.config_manager import get_config
+    from ..core.content_registry import (
+        get_content_registry, CONTENT_ITEM, CONTENT_TRAP, CONTENT_ENCOUNTER
+    )
+
+    registry = get_content_registry()
+    items = [(e.name, getattr(e.definition, "price", 0)) for e in registry.all_entries(CONTENT_ITEM)]
+    achievements = [(a.get("name", key), a.get("category", "SPECIAL"))
+                    for key, a in get_config("achievements", "achievements", {}).items()]
+    return _Catalog(
+        items=items or [("丑喵玩偶", 150)],
+        achievements=achievements or [("首次登顶", "SPECIAL")],
+        traps=[e.name for e in registry.all_entries(CONTENT_TRAP)] or ["小小火球术"],
+        encounters=[e.name for e in registry.all_entries(CONTENT_ENCOUNTER)] or ["喵"],
+    )
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    """均值为 mean 的非负整数（几何分布，少数玩家数据很多）"""
+    if mean <= 0:
+        return 0
+    return int(rng.expovariate(1 / mean))
+
+
+class _Generator:
+    """逐名玩家生成行，按表累积到当前批次"""
+
+    def __init__(self, spec: PopulationSpec, catalog: _Catalog, packed: bool, now: datetime):
+        self.spec = spec
+        self.catalog = catalog
+        self.packed = packed
+        self.now = now
+        self.rng = random.Random()
+        self.columns = list(COLUMN_LENGTHS)
+        self.weights = [_COLUMN_WEIGHTS[c] for c in self.columns]
+        self.cum_weights = list(itertools.accumulate(self.weights))
+        self.first_completions: Dict[int, tuple] = {}
+        self.rows: Dict[type, List[dict]] = {}
+
+    def _add(self, model, row: dict):
+        self.rows.setdefault(model, []).append(row)
+
+    def _progress(self, experience: float, winner: bool) -> PlayerProgress:
+        rng = self.rng
+        progress = PlayerProgress()
+        touched = int(experience * 12) + rng.randint(0, 3)
+        # 按权重抽列（重复的列只算一次，推进的列数略少于 touched）
+        chosen = dict.fromkeys(rng.choices(self.columns, cum_weights=self.cum_weights, k=touched))
+        exponent = 1 / (1 + 4 * experience)
+        completed = 0
+        for column in chosen:
+            length = COLUMN_LENGTHS[column]
+            # 经验越高越接近顶端；未获胜的玩家最多登顶 2 列
+            steps = max(1, round(length * rng.random() ** exponent))
+            if steps >= length:
+                if completed >= WINNING_COLUMN_COUNT - 1:
+                    steps = length - 1
+                else:
+                    completed += 1
+            progress.set_progress(column, steps)
+        if winner:
+            for column in rng.sample(self.columns, WINNING_COLUMN_COUNT):
+                progress.set_progress(column, COLUMN_LENGTHS[column])
+        return progress
+
+    def player(self, index: int):
+        spec, rng, now = self.spec, self.rng, self.now
+        player_id = f"{spec.id_prefix}{index:07d}"
+        experience = rng.betavariate(2, 5)
+        games_played = int(experience * 40 * rng.random())
+        games_won = sum(1 for _ in range(games_played) if rng.random() < experience * 0.4)
+        winner = games_won > 0 and rng.random() < 0.5
+        progress = self._progress(experience, winner)
+        created_at = now - timedelta(days=rng.uniform(0, 180))
+        last_active = created_at + (now - created_at) * rng.random()
+        dice_rolls = int(games_played * rng.uniform(10, 40))
+        score = int(rng.lognormvariate(5 + experience * 2, 0.8))
+
+        row = {
+            "player_id": player_id,
+            "username": f"玩家{index}",
+            "faction": Faction.ADOPTER if rng.random() < 0.5 else Faction.AONRETH,
+            "current_score": score,
+            "total_score": score + dice_rolls * 10,
+            "games_played": games_played,
+            "games_won": games_won,
+            "total_dice_rolls": dice_rolls,
+            "total_turns": dice_rolls // 3,
+            "created_at": created_at,
+            "last_active": last_active,
+            "is_active": True,
+            "packed_progress": None,
+            "progress_mask": 0,
+            "completed_mask": 0,
+        }
+        if self.packed:
+            row["packed_progress"], row["progress_mask"], row["completed_mask"] = progress.pack()
+        else:
+            for column, steps in progress.permanent_progress.items():
+                completed = column in progress.completed_columns
+                self._add(PlayerProgressDB, {
+                    "player_id": player_id, "column_number": column, "permanent_progress": steps,
+                    "is_completed": completed, "completed_at": last_active if completed else None,
+                    "created_at": created_at, "updated_at": last_active,
+                })
+        self._add(PlayerDB, row)
+
+        for column in progress.completed_columns:
+            first = self.first_completions.get(column)
+            if first is None or last_active < first[1]:
+                self.first_completions[column] = (player_id, last_active)
+
+        if rng.random() < spec.active_session_rate:
+            self._session(player_id, progress, dice_rolls, last_active)
+        self._inventory(player_id, last_active)
+        self._achievements(player_id, last_active)
+        self._transactions(player_id, created_at, last_active)
+        self._history(player_id, created_at, last_active)
+
+    def _session(self, player_id: str, progress: PlayerProgress, dice_rolls: int, updated_at: datetime):
+        rng = self.rng
+        session_id = f"s_{player_id}"
+        turn_state = rng.choices([s for s, _ in _TURN_STATES], [w for _, w in _TURN_STATES])[0]
+        open_columns = [c for c in self.columns if c not in progress.completed_columns]
+        self._add(GameSessionDB, {
+            "session_id": session_id,
+            "player_id": player_id,
+            "session_state": GameState.ACTIVE,
+            "turn_state": turn_state,
+            "turn_number": rng.randint(1, 60),
+            "dice_results": ([rng.randint(1, 6) for _ in range(6)]
+                             if turn_state in (TurnState.MOVE_MARKERS, TurnState.DECISION) else None),
+            "rng_seed": rng.getrandbits(63),
+            "rng_counter": dice_rolls,
+            "first_turn": turn_state == TurnState.DICE_ROLL,
+            "needs_checkin": turn_state == TurnState.WAITING_FOR_CHECKIN,
+            "created_at": updated_at - timedelta(hours=rng.uniform(0, 72)),
+            "updated_at": updated_at,
+        })
+        if turn_state == TurnState.WAITING_FOR_CHECKIN:
+            return
+        for column in rng.sample(open_columns, min(len(open_columns), rng.randint(0, 3))):
+            remaining = COLUMN_LENGTHS[column] - progress.get_progress(column)
+            self._add(TemporaryMarkerDB, {
+                "session_id": session_id, "column_number": column,
+                "current_position": rng.randint(1, max(1, min(3, remaining))),
+                "created_at": updated_at,
+            })
+
+    def _inventory(self, player_id: str, acquired_at: datetime):
+        rng = self.rng
+        count = min(len(self.catalog.items), _count(rng, self.spec.inventory_items))
+        for name, _ in rng.sample(self.catalog.items, count):
+            self._add(PlayerInventoryDB, {
+                "player_id": player_id, "item_name": name, "item_type": "consumable",
+                "quantity": rng.randint(1, 3), "acquired_at": acquired_at, "used_count": rng.randint(0, 2),
+            })
+
+    def _achievements(self, player_id: str, unlocked_at: datetime):
+        rng = self.rng
+        count = min(len(self.catalog.achievements), _count(rng, self.spec.achievements))
+        for name, category in rng.sample(self.catalog.achievements, count):
+            self._add(PlayerAchievementDB, {
+                "player_id": player_id, "achievement_name": name, "achievement_category": category[:20],
+                "unlocked_at": unlocked_at, "reward_claimed": rng.random() < 0.7,
+            })
+
+    def _transactions(self, player_id: str, start: datetime, end: datetime):
+        rng = self.rng
+        span = (end - start).total_seconds()
+        for _ in range(_count(rng, self.spec.transactions)):
+            timestamp = start + timedelta(seconds=span * rng.random())
+            if rng.random() < 0.6:
+                source = rng.choice(_SPEND_SOURCES)
+                if source == "item_purchase":
+                    name, price = rng.choice(self.catalog.items)
+                    price = price or 50
+                    self._add(ShopTransactionDB, {
+                        "player_id": player_id, "transaction_type": "buy", "item_name": name,
+                        "price": price, "discount_applied": False, "timestamp": timestamp,
+                    })
+                    amount, description = -price, f"购买{name}"
+                else:
+                    amount, description = -10, "掷骰消耗"
+                kind = "spend"
+            else:
+                source = rng.choice(_EARN_SOURCES)
+                amount = rng.choice((20, 30, 80, 100, 150)) if source == "artwork" else rng.randint(5, 100)
+                kind, description = "earn", source
+            self._add(ScoreTransactionDB, {
+                "player_id": player_id, "transaction_type": kind, "amount": amount,
+                "source": source, "description": description, "timestamp": timestamp,
+            })
+
+    def _history(self, player_id: str, start: datetime, end: datetime):
+        rng = self.rng
+        span = (end - start).total_seconds()
+        for _ in range(_count(rng, self.spec.history)):
+            timestamp = start + timedelta(seconds=span * rng.random())
+            if rng.random() < 0.5:
+                column = rng.choices(self.columns, cum_weights=self.cum_weights)[0]
+                self._add(TrapHistoryDB, {
+                    "player_id": player_id, "trap_name": rng.choice(self.catalog.traps),
+                    "column_number": column, "position": rng.randint(1, COLUMN_LENGTHS[column]),
+                    "triggered_at": timestamp,
+                })
+            else:
+                self._add(EncounterHistoryDB, {
+                    "player_id": player_id, "encounter_name": rng.choice(self.catalog.encounters),
+                    "triggered_at": timestamp,
+                })
+
+    def chunk(self, index: int) -> tuple:
+        """生成第 index 批玩家，返回 (按表的行, 本批各列最早登顶)；每批独立播种，结果与进程数无关"""
+        self.rng.seed(f"{self.spec.seed}:{index}")
+        self.rows, self.first_completions = {}, {}
+        start = index * self.spec.chunk_size
+        for player_index in range(start, min(start + self.spec.chunk_size, self.spec.players)):
+            self.player(player_index)
+        return self.rows, self.first_completions
+
+
+# 工作进程中的生成器（由进程池初始化）
+_worker_generator: Optional[_Generator] = None
+
+
+def _init_worker(spec: PopulationSpec, catalog: _Catalog, packed: bool, now: datetime):
+    global _worker_generator
+    _worker_generator = _Generator(spec, catalog, packed, now)
+
+
+def _generate_chunk(index: int) -> tuple:
+    return _worker_generator.chunk(index)
+
+
+def _prefetch(pool, chunks: range, depth: int):
+    """按顺序产出各批结果，最多提前生成 depth 批，避免写入跟不上时结果堆积在内存中"""
+    pending = deque()
+    for index in chunks:
+        pending.append(pool.submit(_generate_chunk, index))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _bulk_insert(conn, table, rows: List[dict]):
+    """
+    批量插入同构的行
+
+    位置参数风格的驱动（sqlite3、pymysql 等）直接用编译好的语句和列类型的绑定处理器
+    生成参数元组后 executemany，省去逐行构造参数的开销；其他驱动使用 Core 的 executemany。
+    """
+    dialect = conn.dialect
+    if not dialect.positional:
+        conn.execute(table.insert(), rows)
+        return
+    compiled = table.insert().compile(dialect=dialect, column_keys=list(rows[0]))
+    keys = compiled.positiontup
+    processors = [table.c[key].type.dialect_impl(dialect).bind_processor(dialect) for key in keys]
+    pairs = list(zip(keys, processors))
+    params = [tuple(p(row[k]) if p else row[k] for k, p in pairs) for row in rows]
+    conn.exec_driver_sql(str(compiled), params)
+
+
+# 插入顺序（外键依赖在前）
+_INSERT_ORDER = (
+    PlayerDB, PlayerProgressDB, GameSessionDB, TemporaryMarkerDB, PlayerInventoryDB,
+    PlayerAchievementDB, ScoreTransactionDB, ShopTransactionDB, TrapHistoryDB, EncounterHistoryDB,
+)
+
+
+def generate_population(db, spec: PopulationSpec,
+                        on_chunk: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    向数据库批量写入合成玩家群体（表需已创建，玩家ID前缀不能与已有数据冲突）
+
+    Args:
+        db: DatabaseManager
+        spec: 生成参数
+        on_chunk: 每写完一批后以已生成的玩家数调用
+
+    Returns:
+        各表写入的行数
+    """
+    now = spec.base_time or datetime.now().replace(microsecond=0)
+    args = (spec, _load_catalog(), db.packed_progress, now)
+    chunks = range((spec.players + spec.chunk_size - 1) // spec.chunk_size)
+    counts = {model.__tablename__: 0 for model in _INSERT_ORDER}
+    first_completions: Dict[int, tuple] = {}
+
+    pool = None
+    if spec.workers > 1:
+        # 工作进程生成后续批次的同时，主进程写入当前批次
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(spec.workers, initializer=_init_worker, initargs=args)
+        results = _prefetch(pool, chunks, spec.workers * 2)
+    else:
+        generator = _Generator(*args)
+        results = map(generator.chunk, chunks)
+
+    try:
+        with db.engine.connect() as conn:
+            if conn.dialect.name == "sqlite":
+                # 新建的测试库，写入期间不需要逐事务同步落盘
+                conn.execute(text("PRAGMA synchronous = OFF"))
+                conn.commit()
+            for index, (rows, chunk_first) in zip(chunks, results):
+                with conn.begin():
+                    for model in _INSERT_ORDER:
+                        if rows.get(model):
+                            _bulk_insert(conn, model.__table__, rows[model])
+                            counts[model.__tablename__] += len(rows[model])
+                for column, (player_id, completed_at) in chunk_first.items():
+                    known = first_completions.get(column)
+                    if known is None or completed_at < known[1]:
+                        first_completions[column] = (player_id, completed_at)
+                if on_chunk:
+                    on_chunk(min((index + 1) * spec.chunk_size, spec.players))
+
+            first = [
+                {"column_number": column, "player_id": player_id, "completed_at": completed_at,
+                 "reward_given": True}
+                for column, (player_id, completed_at) in sorted(first_completions.items())
+            ]
+            if first:
+                with conn.begin():
+                    conn.execute(FirstCompletionDB.__table__.delete().where(
+                        FirstCompletionDB.column_number.in_([row["column_number"] for row in first])))
+                    conn.execute(FirstCompletionDB.__table__.insert(), first)
+            counts[FirstCompletionDB.__tablename__] = len(first)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="生成合成玩家群体")
+    parser.add_argument("--players", type=int, default=10000, help="玩家数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=os.path.join("sqlite:///cache", "population.db"), help="数据库 URL")
+    parser.add_argument("--prefix", default="p", help="玩家ID前缀（向已有数据追加时避免冲突）")
+    parser.add_argument("--sessions", type=float, default=0.3, help="有进行中会话的玩家比例")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE, help="每批玩家数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="生成数据的进程数")
+    parser.add_argument("--reset", action="store_true", help="先删除并重建所有表")
+    args = parser.parse_args()
+
+    if args.db.startswith("sqlite:///"):
+        directory = os.path.dirname(args.db[len("sqlite:///"):])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    manager = DatabaseManager(args.db)
+    if args.reset:
+        manager.drop_tables()
+    manager.create_tables()
+
+    spec = PopulationSpec(players=args.players, seed=args.seed, id_prefix=args.prefix,
+                          active_session_rate=args.sessions, chunk_size=args.chunk, workers=args.workers)
+    started = time.perf_counter()
+    result = generate_population(
+        manager, spec, lambda done: print(f"\r已生成 {done}/{args.players} 名玩家", end="", flush=True))
+    elapsed = time.perf_counter() - started
+    print()
+    for table, rows in result.items():
+        print(f"{table:<22} {rows:>10,}")
+    print(f"用时 {elapsed:.1f} s（{args.players / elapsed:,.0f} 名玩家/秒）")
@@ -23,7 +23,7 @@ except ImportError as e:
     sys.exit(1)
 
 try:
-    from ..services.game_service import GameService
+    from ..services.service_registry import get_game_service
     from ..services.message_processor import MessageProcessor, UserMessage
     from ..core.achievement_system import AchievementSystem
     from ..core.trap_system import TrapSystem
@@ -32,7 +32,7 @@ try:
 except ImportError:
     try:
         sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
-        from src.services.game_service import GameService
+        from src.services.service_registry import get_game_service
         from src.services.message_processor import MessageProcessor, UserMessage
         from src.core.achievement_system import AchievementSystem
         from src.core.trap_system import TrapSystem
@@ -515,8 +515,8 @@ class GodModeGUI(QMainWindow):
         from ..utils.config import get_config
         config = get_config()
 
-        self.game_service = GameService()
-        self.message_processor = MessageProcessor()
+        self.game_service = get_game_service()
+        self.message_processor = MessageProcessor(self.game_service)
         self.achievement_system = AchievementSystem()
         self.trap_system = TrapSystem()
 
@@ -13,19 +13,22 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 
 from typing import Optional, List, Dict
-import json
 import os
 
+try:
+    from ..core.content_pack import load_json_config
+except ImportError:
+    from src.core.content_pack import load_json_config
+
 
 def load_available_traps() -> List[str]:
     """从配置文件加载可用的陷阱列表"""
     try:
         trap_plugins_path = "config/trap_plugins.json"
         if os.path.exists(trap_plugins_path):
-            with open(trap_plugins_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                traps = list(data.get("plugins", {}).keys())
-                return sorted(traps) if traps else ["小小火球术", "不要回头"]
+            data = load_json_config(trap_plugins_path)
+            traps = list(data.get("plugins", {}).keys())
+            return sorted(traps) if traps else ["小小火球术", "不要回头"]
     except Exception as e:
         print(f"加载陷阱列表失败: {e}")
 
@@ -38,10 +41,9 @@ def load_available_encounters() -> List[str]:
     try:
         encounters_path = "config/encounters.json"
         if os.path.exists(encounters_path):
-            with open(encounters_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                encounters = list(data.get("encounters", {}).keys())
-                return sorted(encounters) if encounters else ["喵", "梦"]
+            data = load_json_config(encounters_path)
+            encounters = list(data.get("encounters", {}).keys())
+            return sorted(encounters) if encounters else ["喵", "梦"]
     except Exception as e:
         print(f"加载遭遇列表失败: {e}")
 
@@ -2,10 +2,13 @@
 Can't Stop游戏核心数据模型
 """
 
-from typing import Dict, List, Optional, Set, Tuple
+from typing import ClassVar, Dict, Iterator, List, Mapping, MutableSet, Optional, Set, Tuple
+from collections import abc
 from enum import Enum
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import combinations
+from types import MappingProxyType
 import random
 
 
@@ -42,26 +45,59 @@ class EventType(Enum):
     REWARD = "reward"
 
 
-@dataclass
+# ==================== 棋盘几何（模块级不可变常量） ====================
+
+MIN_COLUMN = 3
+MAX_COLUMN = 18
+# 登顶即获胜所需的列数
+WINNING_COLUMN_COUNT = 3
+
+# 列号到格子数的映射 (3-18列)
+COLUMN_LENGTHS: Mapping[int, int] = MappingProxyType({
+    3: 3, 4: 4, 5: 5, 6: 6, 7: 7, 8: 8,
+    9: 9, 10: 10, 11: 10, 12: 9, 13: 8,
+    14: 7, 15: 6, 16: 5, 17: 4, 18: 3
+})
+
+# 按列号直接索引的长度表（无效列为 0）
+_COLUMN_LENGTH_TABLE: Tuple[int, ...] = tuple(COLUMN_LENGTHS.get(c, 0) for c in range(MAX_COLUMN + 1))
+
+
+def is_valid_column(column: int) -> bool:
+    """检查列号是否有效"""
+    return MIN_COLUMN <= column <= MAX_COLUMN
+
+
+def get_column_length(column: int) -> int:
+    """获取指定列的长度（无效列返回 0）"""
+    return _COLUMN_LENGTH_TABLE[column] if MIN_COLUMN <= column <= MAX_COLUMN else 0
+
+
+@dataclass(frozen=True, slots=True)
 class MapConfig:
-    """地图配置"""
-    # 列号到格子数的映射 (3-18列)
-    COLUMN_LENGTHS: Dict[int, int] = field(default_factory=lambda: {
-        3: 3, 4: 4, 5: 5, 6: 6, 7: 7, 8: 8,
-        9: 9, 10: 10, 11: 10, 12: 9, 13: 8,
-        14: 7, 15: 6, 16: 5, 17: 4, 18: 3
-    })
+    """地图配置（无状态，所有实例共享模块级棋盘几何）"""
+    COLUMN_LENGTHS: ClassVar[Mapping[int, int]] = COLUMN_LENGTHS
 
     def get_column_length(self, column: int) -> int:
         """获取指定列的长度"""
-        return self.COLUMN_LENGTHS.get(column, 0)
+        return get_column_length(column)
 
     def is_valid_column(self, column: int) -> bool:
         """检查列号是否有效"""
-        return column in self.COLUMN_LENGTHS
+        return is_valid_column(column)
 
 
-@dataclass
+# 6 颗骰子分成两组 3 颗的所有方式（组1的下标, 组2的下标）
+_DICE_SPLITS: Tuple[Tuple[Tuple[int, int, int], Tuple[int, ...]], ...] = tuple(
+    (group1, tuple(x for x in range(6) if x not in group1))
+    for group1 in combinations(range(6), 3)
+)
+
+# 组合只取决于点数的多重集（共 462 种），按排序后的点数缓存
+_COMBINATION_CACHE: Dict[Tuple[int, ...], Tuple[Tuple[int, int], ...]] = {}
+
+
+@dataclass(slots=True)
 class DiceRoll:
     """骰子投掷结果"""
     results: List[int]
@@ -75,78 +111,203 @@ class DiceRoll:
 
     def get_possible_combinations(self) -> List[Tuple[int, int]]:
         """获取所有可能的数字组合"""
-        combinations = []
-        used = set()
-
-        # 生成所有可能的3+3组合
-        for i in range(6):
-            for j in range(i+1, 6):
-                for k in range(j+1, 6):
-                    group1 = [i, j, k]
-                    group2 = [x for x in range(6) if x not in group1]
-
-                    sum1 = sum(self.results[idx] for idx in group1)
-                    sum2 = sum(self.results[idx] for idx in group2)
+        results = tuple(sorted(self.results))
+        cached = _COMBINATION_CACHE.get(results)
+        if cached is not None:
+            return list(cached)
 
-                    # 确保组合在有效范围内(3-18)
-                    if 3 <= sum1 <= 18 and 3 <= sum2 <= 18:
-                        combo = tuple(sorted([sum1, sum2]))
-                        if combo not in used:
-                            combinations.append(combo)
-                            used.add(combo)
+        used = set()
+        # 生成所有可能的3+3组合（3颗骰子之和必在3-18之间）
+        for (a, b, c), (d, e, f) in _DICE_SPLITS:
+            sum1 = results[a] + results[b] + results[c]
+            sum2 = results[d] + results[e] + results[f]
+            used.add((sum1, sum2) if sum1 <= sum2 else (sum2, sum1))
 
-        return sorted(combinations)
+        cached = _COMBINATION_CACHE[results] = tuple(sorted(used))
+        return list(cached)
 
 
-@dataclass
+@dataclass(slots=True)
 class TemporaryMarker:
     """临时标记"""
     column: int
     position: int
 
     def __post_init__(self):
-        if not MapConfig().is_valid_column(self.column):
+        if not MIN_COLUMN <= self.column <= MAX_COLUMN:
             raise ValueError(f"无效的列号: {self.column}")
         if self.position < 0:
             raise ValueError("位置不能为负数")
 
 
-@dataclass
+class _ProgressView(abc.Mapping):
+    """永久进度的只读字典视图：列号 -> 进度（只包含设置过的列，按列号排序）"""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "PlayerProgress"):
+        self._owner = owner
+
+    def __getitem__(self, column: int) -> int:
+        if not isinstance(column, int) or not MIN_COLUMN <= column <= MAX_COLUMN \
+                or not self._owner._present >> (column - MIN_COLUMN) & 1:
+            raise KeyError(column)
+        return self._owner._positions[column - MIN_COLUMN]
+
+    def __iter__(self) -> Iterator[int]:
+        present = self._owner._present
+        return (i + MIN_COLUMN for i in range(16) if present >> i & 1)
+
+    def __len__(self) -> int:
+        return self._owner._present.bit_count()
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _CompletedView(abc.MutableSet):
+    """已完成列的集合视图，背后是 16 位掩码"""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "PlayerProgress"):
+        self._owner = owner
+
+    def __contains__(self, column: object) -> bool:
+        return isinstance(column, int) and MIN_COLUMN <= column <= MAX_COLUMN \
+            and bool(self._owner._completed >> (column - MIN_COLUMN) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        completed = self._owner._completed
+        return (i + MIN_COLUMN for i in range(16) if completed >> i & 1)
+
+    def __len__(self) -> int:
+        return self._owner._completed.bit_count()
+
+    def add(self, column: int):
+        if not is_valid_column(column):
+            raise ValueError(f"无效的列号: {column}")
+        self._owner._completed |= 1 << (column - MIN_COLUMN)
+
+    def discard(self, column: int):
+        if is_valid_column(column):
+            self._owner._completed &= ~(1 << (column - MIN_COLUMN))
+
+    def __repr__(self) -> str:
+        return repr(set(self))
+
+
 class PlayerProgress:
-    """玩家进度"""
-    permanent_progress: Dict[int, int] = field(default_factory=dict)  # 列号 -> 永久进度
-    completed_columns: Set[int] = field(default_factory=set)  # 已完成的列
+    """
+    玩家进度
+
+    16 列的进度存放在 16 字节的 bytearray 中（下标 = 列号 - 3），
+    已完成列和已设置列各用一个 16 位掩码表示。
+    permanent_progress / completed_columns 以字典/集合视图的形式保持原有接口。
+    """
+
+    __slots__ = ("_positions", "_present", "_completed")
+
+    def __init__(self, permanent_progress: Optional[Dict[int, int]] = None,
+                 completed_columns: Optional[Set[int]] = None):
+        self._positions = bytearray(16)
+        self._present = 0
+        self._completed = 0
+        if permanent_progress:
+            for column, progress in permanent_progress.items():
+                self._store(column, progress)
+        if completed_columns:
+            for column in completed_columns:
+                self.completed_columns.add(column)
+
+    def _store(self, column: int, progress: int):
+        if not MIN_COLUMN <= column <= MAX_COLUMN:
+            raise ValueError(f"无效的列号: {column}")
+        index = column - MIN_COLUMN
+        self._positions[index] = progress
+        self._present |= 1 << index
+
+    @property
+    def permanent_progress(self) -> Mapping[int, int]:
+        """列号 -> 永久进度（只读视图，修改请使用 set_progress）"""
+        return _ProgressView(self)
+
+    @property
+    def completed_columns(self) -> MutableSet:
+        """已完成的列（集合视图）"""
+        return _CompletedView(self)
+
+    @property
+    def completed_mask(self) -> int:
+        """已完成列的 16 位掩码（第 i 位对应第 i+3 列）"""
+        return self._completed
 
     def get_progress(self, column: int) -> int:
         """获取指定列的永久进度"""
-        return self.permanent_progress.get(column, 0)
+        if not MIN_COLUMN <= column <= MAX_COLUMN:
+            return 0
+        return self._positions[column - MIN_COLUMN]
 
     def set_progress(self, column: int, progress: int):
         """设置指定列的进度"""
-        if not MapConfig().is_valid_column(column):
+        if not MIN_COLUMN <= column <= MAX_COLUMN:
             raise ValueError(f"无效的列号: {column}")
 
-        max_length = MapConfig().get_column_length(column)
+        max_length = _COLUMN_LENGTH_TABLE[column]
         if progress >= max_length:
-            self.completed_columns.add(column)
-            self.permanent_progress[column] = max_length
+            self._completed |= 1 << (column - MIN_COLUMN)
+            self._store(column, max_length)
         else:
-            self.permanent_progress[column] = max(0, progress)
+            self._store(column, max(0, progress))
 
     def is_completed(self, column: int) -> bool:
         """检查指定列是否已完成"""
-        return column in self.completed_columns
+        return MIN_COLUMN <= column <= MAX_COLUMN and bool(self._completed >> (column - MIN_COLUMN) & 1)
 
     def get_completed_count(self) -> int:
         """获取已完成列的数量"""
-        return len(self.completed_columns)
+        return self._completed.bit_count()
 
     def is_winner(self) -> bool:
         """检查是否获胜(3列登顶)"""
-        return self.get_completed_count() >= 3
+        return self._completed.bit_count() >= WINNING_COLUMN_COUNT
 
+    def pack(self) -> Tuple[bytes, int, int]:
+        """打包为 (16 字节进度, 已设置列掩码, 已完成列掩码)，用于单行存储"""
+        return bytes(self._positions), self._present, self._completed
 
-@dataclass
+    @classmethod
+    def unpack(cls, positions: bytes, present: int, completed: int) -> "PlayerProgress":
+        """从 pack() 的结果恢复进度"""
+        if len(positions) != 16:
+            raise ValueError(f"进度数据长度应为 16 字节: {len(positions)}")
+        progress = cls.__new__(cls)
+        progress._positions = bytearray(positions)
+        progress._present = present or 0
+        progress._completed = completed or 0
+        return progress
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PlayerProgress):
+            return NotImplemented
+        return (self._positions == other._positions and self._present == other._present
+                and self._completed == other._completed)
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.pack()
+
+    def __setstate__(self, state):
+        positions, self._present, self._completed = state
+        self._positions = bytearray(positions)
+
+    def __repr__(self) -> str:
+        return (f"PlayerProgress(permanent_progress={dict(self.permanent_progress.items())!r}, "
+                f"completed_columns={set(self.completed_columns)!r})")
+
+
+@dataclass(slots=True)
 class Player:
     """玩家类"""
     player_id: str
@@ -203,7 +364,7 @@ class Player:
         self.achievements.add(achievement_name)
 
 
-@dataclass
+@dataclass(slots=True)
 class GameSession:
     """游戏会话"""
     session_id: str
@@ -217,6 +378,16 @@ class GameSession:
     needs_checkin: bool = False  # 是否需要打卡
     forced_dice_result: Optional[List[int]] = None  # 强制骰子结果
     pending_summit_columns: List[int] = field(default_factory=list)  # 待确认的登顶列
+    # 道具/陷阱效果设置的会话状态（slots 模型不允许临时添加属性，需显式声明）
+    next_dice_count: Optional[int] = None  # 下一次掷骰的骰子数量
+    has_extra_dice_risk: bool = False  # 是否需要额外投掷风险骰子
+    extra_dice_risk_value: int = 6  # 风险骰子的触发点数
+    reset_current_column_progress: bool = False  # 重置当前列进度
+    forced_artwork: bool = False  # 强制绘制暂停
+    void_or_skip_pending: bool = False  # 作废本回合或跳过下一回合
+    pvp_battle_pending: Optional[Dict] = None  # 待进行的玩家对战
+    rng_seed: Optional[int] = None  # 骰子流种子（secure 模式为空）
+    rng_counter: int = 0  # 已由骰子流掷出的次数，(rng_seed, rng_counter) 可复现下一次掷骰
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
 
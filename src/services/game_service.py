@@ -13,9 +13,24 @@ from ..models.game_models import Faction, Player, GameSession, DiceRoll
 class GameService:
     """游戏服务类"""
 
-    def __init__(self):
-        self.engine = GameEngine()
-        self.db = get_db_manager()
+    def __init__(self, engine: Optional[GameEngine] = None, db=None):
+        """
+        初始化游戏服务
+
+        进程内应通过 service_registry.get_game_service() 共享同一实例，
+        直接构造只用于测试或独立工具。
+
+        Args:
+            engine: 游戏引擎，未指定时新建
+            db: 数据库管理器，未指定时使用全局实例
+        """
+        self.engine = engine if engine is not None else GameEngine()
+        self.db = db if db is not None else get_db_manager()
+        # 会话事件日志（可回放重建任意时刻的会话）
+        from ..config.config_manager import get_config
+        if get_config("game_config", "database.turn_log", True):
+            from ..core.turn_log import TurnLog
+            self.engine.set_turn_log(TurnLog(self.db))
 
     def register_player(self, player_id: str, username: str, faction_name: str) -> Tuple[bool, str]:
         """注册新玩家"""
@@ -82,6 +97,7 @@ class GameService:
             # 创建新会话
             session = self.engine.create_game_session(player_id)
             self.db.save_game_session(session)
+            self._flush_turn_log()
 
             return True, "新游戏开始！输入 .r6d6 开始第一回合"
 
@@ -318,6 +334,8 @@ class GameService:
             if not player:
                 return False, "玩家不存在"
 
+            item_name = self._canonical_item_name(item_name)
+
             # 获取道具配置
             items_config = get_config("game_config", "game.items", {})
             item_config = items_config.get(item_name)
@@ -381,6 +399,13 @@ class GameService:
         except Exception as e:
             return False, f"购买道具失败：{str(e)}"
 
+    def _canonical_item_name(self, item_name: str) -> str:
+        """将玩家输入的道具名（带阵营后缀、全角/半角变体、别名）解析为标准名称"""
+        from ..core.content_registry import get_content_registry, CONTENT_ITEM
+
+        entry = get_content_registry().resolve(CONTENT_ITEM, item_name.strip())
+        return entry.name if entry else item_name
+
     def use_item(self, player_id: str, item_name: str, choice: Optional[str] = None) -> Tuple[bool, str, Dict[str, Any]]:
         """使用道具"""
         from ..config.config_manager import get_config
@@ -391,6 +416,12 @@ class GameService:
             if not player:
                 return False, "玩家不存在", {}
 
+            item_name = self._canonical_item_name(item_name)
+
+            # 后悔券直接恢复掷骰前的检查点，不经过道具效果配置
+            if item_name == "后悔券":
+                return self.use_regret_ticket(player_id)
+
             # 检查道具是否存在于库存
             item_quantity = self.db.get_item_quantity(player_id, item_name)
             if item_quantity <= 0:
@@ -455,6 +486,55 @@ class GameService:
         except Exception as e:
             return False, f"使用道具失败：{str(e)}", {}
 
+    def use_regret_ticket(self, player_id: str) -> Tuple[bool, str, Dict[str, Any]]:
+        """使用后悔券：撤销当前掷骰（退回掷骰积分）并重新掷骰"""
+        try:
+            player, session = self._load_player_and_session(player_id)
+            if not player or not session:
+                return False, "请先开始游戏", {}
+
+            if self.db.get_item_quantity(player_id, "后悔券") <= 0:
+                return False, "你没有道具 '后悔券'", {}
+
+            success, message = self.engine.undo_last_roll(session.session_id)
+            if not success:
+                return False, message, {}
+
+            self.db.remove_item_from_inventory(player_id, "后悔券", 1)
+            self.db.update_item_used_count(player_id, "后悔券")
+            self._save_player_and_session(player, session)
+
+            success, roll_message, combinations = self.roll_dice(player_id)
+            message = f"✨ 使用道具：后悔券\n{message}，重新掷骰\n{roll_message}"
+            return success, message, {"combinations": combinations} if success else {}
+
+        except Exception as e:
+            return False, f"使用道具失败：{str(e)}", {}
+
+    def retry_turn(self, player_id: str) -> Tuple[bool, str]:
+        """使用重试回合效果：回到本轮开始时的状态"""
+        from ..core.item_system import BuffType, get_buff_manager
+
+        try:
+            player, session = self._load_player_and_session(player_id)
+            if not player or not session:
+                return False, "请先开始游戏"
+
+            buff_manager = get_buff_manager()
+            if not buff_manager.has_retry_turn_available(player_id):
+                return False, "你没有可用的重试回合效果"
+
+            success, message = self.engine.retry_turn(session.session_id)
+            if not success:
+                return False, message
+
+            buff_manager.consume_buff(player_id, BuffType.RETRY_TURN_AVAILABLE)
+            self._save_player_and_session(player, session)
+            return True, f"🔄 {message}，本轮临时进度已清除\n{self._get_current_status(player, session)}"
+
+        except Exception as e:
+            return False, f"重试回合失败：{str(e)}"
+
     def view_inventory(self, player_id: str) -> Tuple[bool, str]:
         """查看玩家库存"""
         try:
@@ -821,6 +901,23 @@ class GameService:
         """保存玩家和会话状态"""
         self.db.update_player(player)
         self.db.save_game_session(session)
+        if self.engine.turn_log is not None:
+            # 道具、遭遇等效果直接修改状态，保存前补记一条事件
+            from ..core.turn_log import EVENT_EFFECT
+            try:
+                self.engine.turn_log.record(session, player, EVENT_EFFECT)
+            except Exception as e:
+                print(f"记录会话事件失败: {e}")
+            self._flush_turn_log()
+
+    def _flush_turn_log(self):
+        """写入缓冲的会话事件（日志写入失败不影响游戏）"""
+        if self.engine.turn_log is None:
+            return
+        try:
+            self.engine.turn_log.flush()
+        except Exception as e:
+            print(f"写入会话事件日志失败: {e}")
 
     def _get_current_status(self, player: Player, session: GameSession) -> str:
         """获取当前状态摘要"""
@@ -846,8 +943,102 @@ class GameService:
         status += f"当前永久棋子位置：{permanent_str}\n"
         status += f"已登顶棋子数：{completed_count}/3"
 
+        risk = self._get_roll_risk(player, session)
+        if risk:
+            status += f"\n{risk}"
+
         return status
 
+    def _get_roll_risk(self, player: Player, session: GameSession) -> Optional[str]:
+        """三个标记都已放下时，下一次掷骰的爆掉概率（未放满时不会被动停止）"""
+        if len(session.temporary_markers) < 3:
+            return None
+
+        from ..core.bust_probability import advancing_columns, get_bust_table
+
+        # 已到顶的标记无法再推进，不计入可推进的列
+        columns = advancing_columns(player.progress, session.temporary_markers)
+        if not columns:
+            return "掷骰风险：三个标记均已到顶，继续掷骰必定爆掉，建议替换永久棋子"
+
+        bust = get_bust_table().bust_probability(columns)
+        return f"掷骰风险：继续掷骰有 {bust:.1%} 的概率爆掉（可推进列：{'、'.join(map(str, columns))}）"
+
+    def get_roll_risk(self, player_id: str, columns: Optional[List[int]] = None) -> Tuple[bool, str]:
+        """
+        查询掷骰风险
+
+        Args:
+            player_id: 玩家ID
+            columns: 指定 1-3 列时直接查表，未指定时使用玩家当前的临时标记
+        """
+        try:
+            from ..core.bust_probability import get_bust_table
+
+            if columns:
+                reach = get_bust_table().reach_probability(columns)
+                return True, (f"列 {'、'.join(map(str, columns))}：下一次掷骰至少推进其一的概率 {reach:.1%}，"
+                              f"爆掉概率 {1 - reach:.1%}")
+
+            player, session = self._load_player_and_session(player_id)
+            if not player or not session:
+                return False, "请先开始游戏"
+
+            risk = self._get_roll_risk(player, session)
+            if risk is None:
+                return True, f"掷骰风险：还有 {3 - len(session.temporary_markers)} 个空余标记，下一次掷骰不会爆掉"
+            return True, risk
+
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"查询掷骰风险失败：{str(e)}"
+
+    def get_turn_advice(self, player_id: str) -> Tuple[bool, str]:
+        """
+        查询停手建议（三个标记放满后按停手策略表给出最优推进方式和停手时机）
+
+        期望值为本轮最终入账的格数，不考虑登顶时立即入账。
+        """
+        try:
+            from ..core.turn_policy import DEFAULT_TABLE_PATH, get_turn_policy_table, turn_state
+            from ..models.game_models import TurnState
+
+            player, session = self._load_player_and_session(player_id)
+            if not player or not session:
+                return False, "请先开始游戏"
+
+            state = turn_state(player.progress, session.temporary_markers)
+            if state is None:
+                return True, (f"策略建议：还有 {3 - len(session.temporary_markers)} 个空余标记，"
+                              f"下一次掷骰不会爆掉，建议继续掷骰")
+
+            table = get_turn_policy_table()
+            if table is None:
+                return False, f"停手策略表尚未生成（{DEFAULT_TABLE_PATH}），请联系管理员运行 python -m src.core.turn_policy"
+
+            columns, rooms, at_risk = state
+            if session.turn_state == TurnState.MOVE_MARKERS and session.current_dice:
+                moves = []
+                for first, second in session.current_dice.get_possible_combinations():
+                    for move in ([first, second], [first], [second]):
+                        if move not in moves and self.engine.can_move_markers(session.session_id, move)[0]:
+                            moves.append(move)
+                ranked = table.rank_moves(columns, rooms, at_risk, moves)
+                if not ranked:
+                    return True, "策略建议：本次骰子没有可推进的列"
+                lines = [f"推进 {','.join(map(str, move))}：本轮期望入账 {value:.2f} 格" for move, value in ranked[:3]]
+                return True, "策略建议（按期望从高到低）：\n" + "\n".join(lines)
+
+            continuation = table.continue_value(columns, rooms, at_risk)
+            if continuation is None:
+                return True, f"策略建议：停手。本轮已推进 {at_risk} 格，继续掷骰的期望低于现在结束轮次"
+            return True, (f"策略建议：继续掷骰。按最优策略本轮期望入账 {continuation:.2f} 格"
+                          f"（现在停手入账 {at_risk} 格）")
+
+        except Exception as e:
+            return False, f"查询策略建议失败：{str(e)}"
+
     def _get_detailed_status(self, player: Player, session: Optional[GameSession]) -> str:
         """获取详细状态"""
         message = f"的游戏状态\n"
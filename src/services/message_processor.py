@@ -10,6 +10,8 @@ import asyncio
 import logging
 
 from .game_service import GameService
+from .service_registry import get_game_service
+from ..utils.metrics import get_metrics
 
 
 class MessageType(Enum):
@@ -29,6 +31,7 @@ class UserMessage:
     content: str
     group_id: Optional[str] = None
     timestamp: Optional[str] = None
+    idempotency_key: Optional[str] = None  # 用于积分变动类指令的持久化去重
 
 
 @dataclass
@@ -43,11 +46,13 @@ class BotResponse:
 class MessageProcessor:
     """消息处理器"""
 
-    def __init__(self):
-        self.game_service = GameService()
+    def __init__(self, game_service: Optional[GameService] = None):
+        # 默认使用进程内共享的游戏服务，避免重复创建引擎
+        self.game_service = game_service if game_service is not None else get_game_service()
         self.command_handlers: Dict[str, Callable] = {}
         self.pattern_handlers: List[Tuple[str, Callable]] = []
         self.logger = logging.getLogger(__name__)
+        self.metrics = get_metrics()
         self._init_handlers()
 
     def _init_handlers(self):
@@ -64,6 +69,9 @@ class MessageProcessor:
             "重投": self._handle_reroll_dice,
             "替换永久棋子": self._handle_end_turn,
             "查看当前进度": self._handle_get_status,
+            "掷骰风险": self._handle_roll_risk,
+            "策略建议": self._handle_turn_advice,
+            "重试回合": self._handle_retry_turn,
             "打卡完毕": self._handle_complete_checkin,
 
             # 积分奖励（图片奖励已禁用）
@@ -226,6 +234,9 @@ class MessageProcessor:
             (r"使用(.+)", self._handle_use_specific_item),
             (r"添加(.+)到道具商店", self._handle_add_item_to_shop),
 
+            # 指定列的掷骰风险（如 "掷骰风险6,7,8"）
+            (r"^掷骰风险\s*(\d+)(?:\s*,\s*(\d+))?(?:\s*,\s*(\d+))?$", self._handle_roll_risk_columns),
+
             # 花言巧语玩家选择
             (r"^选择玩家(\d+)$", self._handle_select_player_for_penalty),
 
@@ -236,12 +247,32 @@ class MessageProcessor:
             (r"^([1-5])\.\s*(.+)$", self._handle_numbered_trap_choice),
         ])
 
-    def process_message(self, user_id: str, message: str) -> Tuple[bool, Optional[str]]:
+        # 会改变积分的处理器：带幂等键的重复投递只执行一次
+        self.score_changing_handlers = {
+            self._handle_roll_dice,
+            self._handle_reroll_dice,
+            self._handle_reward_with_number,
+            self._handle_reward_doubled,
+            self._handle_super_satisfied,
+            self._handle_buy_item,
+            self._handle_buy_specific_item,
+            self._handle_use_item,
+            self._handle_use_specific_item,
+            self._handle_trap_choice,
+            self._handle_numbered_trap_choice,
+            self._handle_encounter_choice,
+            self._handle_encounter_follow_up,
+            self._handle_penalty_resistance,
+        }
+
+    def process_message(self, user_id: str, message: str,
+                        idempotency_key: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """同步处理消息的包装器"""
         import asyncio
         try:
             # 创建 UserMessage 对象
-            user_message = UserMessage(user_id=user_id, username="", content=message)
+            user_message = UserMessage(user_id=user_id, username="", content=message,
+                                       idempotency_key=idempotency_key)
 
             # 在事件循环中运行异步方法
             try:
@@ -284,6 +315,7 @@ class MessageProcessor:
             if not is_public_command:
                 player = self.game_service.db.get_player(message.user_id)
                 if not player:
+                    self.metrics.count_message("unregistered")
                     return BotResponse(
                         content="请先使用 \"选择阵营：收养人\" 或 \"选择阵营：Aeonreth\" 注册玩家",
                         message_type=MessageType.COMMAND,
@@ -294,6 +326,7 @@ class MessageProcessor:
                 if not is_registered_command:
                     session = self.game_service.db.get_player_active_session(message.user_id)
                     if not session:
+                        self.metrics.count_message("no_session")
                         return BotResponse(
                             content="你当前没有进行中的游戏，请先使用 \"轮次开始\" 命令开始游戏",
                             message_type=MessageType.COMMAND,
@@ -301,17 +334,33 @@ class MessageProcessor:
                         )
 
             # 尝试命令匹配
-            if content in self.command_handlers:
-                return await self._execute_handler(self.command_handlers[content], message)
+            handler, match = self.command_handlers.get(content), None
 
             # 尝试模式匹配
-            for pattern, handler in self.pattern_handlers:
-                match = re.match(pattern, content)
-                if match:
-                    return await self._execute_handler(handler, message, match)
+            if handler is None:
+                for pattern, pattern_handler in self.pattern_handlers:
+                    match = re.match(pattern, content)
+                    if match:
+                        handler = pattern_handler
+                        break
 
             # 未匹配的消息 - 不做任何反应
-            return None
+            if handler is None:
+                self.metrics.count_message("unmatched")
+                return None
+
+            # 积分变动类指令的重复投递 - 不做任何反应
+            claimed_key = None
+            if message.idempotency_key and handler in self.score_changing_handlers:
+                if not self.game_service.db.claim_command_key(
+                        message.idempotency_key, message.user_id, content):
+                    self.logger.info(f"忽略重复指令: {message.idempotency_key} {content}")
+                    self.metrics.count_message("duplicate")
+                    return None
+                claimed_key = message.idempotency_key
+
+            self.metrics.count_message("handled")
+            return await self._execute_handler(handler, message, match, claimed_key)
 
         except Exception as e:
             return BotResponse(
@@ -319,8 +368,15 @@ class MessageProcessor:
                 message_type=MessageType.UNKNOWN
             )
 
-    async def _execute_handler(self, handler: Callable, message: UserMessage, match: Optional[re.Match] = None) -> BotResponse:
-        """执行处理器"""
+    async def _execute_handler(self, handler: Callable, message: UserMessage, match: Optional[re.Match] = None,
+                               claimed_key: Optional[str] = None) -> BotResponse:
+        """
+        执行处理器（开启指标时按指令、是否抛出异常和群记录耗时）
+
+        处理器抛出异常时释放已登记的幂等键 claimed_key，重新投递的同一条消息可以再次执行
+        """
+        started = self.metrics.start()
+        success = "true"
         try:
             if asyncio.iscoroutinefunction(handler):
                 if match:
@@ -333,10 +389,24 @@ class MessageProcessor:
                 else:
                     return handler(message)
         except Exception as e:
+            success = "false"
+            if claimed_key:
+                self._release_command_key(claimed_key)
             return BotResponse(
                 content=f"执行操作失败：{str(e)}",
                 message_type=MessageType.UNKNOWN
             )
+        finally:
+            if started is not None:
+                self.metrics.observe_since(self.metrics.commands, started,
+                                           handler.__name__.replace("_handle_", "", 1), success,
+                                           message.group_id or "private")
+
+    def _release_command_key(self, idempotency_key: str):
+        try:
+            self.game_service.db.release_command_key(idempotency_key)
+        except Exception as e:
+            self.logger.error(f"释放指令幂等键失败: {idempotency_key} {e}")
 
     # 游戏流程处理器
     def _handle_faction_selection(self, message: UserMessage) -> BotResponse:
@@ -531,6 +601,43 @@ class MessageProcessor:
             should_mention=True
         )
 
+    def _handle_roll_risk(self, message: UserMessage) -> BotResponse:
+        """处理掷骰风险查询（当前临时标记）"""
+        success, msg = self.game_service.get_roll_risk(message.user_id)
+        return BotResponse(
+            content=msg,
+            message_type=MessageType.QUERY,
+            should_mention=True
+        )
+
+    def _handle_roll_risk_columns(self, message: UserMessage, match: re.Match) -> BotResponse:
+        """处理掷骰风险查询（指定列）"""
+        columns = [int(group) for group in match.groups() if group]
+        success, msg = self.game_service.get_roll_risk(message.user_id, columns)
+        return BotResponse(
+            content=msg,
+            message_type=MessageType.QUERY,
+            should_mention=True
+        )
+
+    def _handle_turn_advice(self, message: UserMessage) -> BotResponse:
+        """处理策略建议查询"""
+        success, msg = self.game_service.get_turn_advice(message.user_id)
+        return BotResponse(
+            content=msg,
+            message_type=MessageType.QUERY,
+            should_mention=True
+        )
+
+    def _handle_retry_turn(self, message: UserMessage) -> BotResponse:
+        """处理重试回合（需要重试回合效果）"""
+        success, msg = self.game_service.retry_turn(message.user_id)
+        return BotResponse(
+            content=msg,
+            message_type=MessageType.GAME_ACTION if success else MessageType.ERROR,
+            should_mention=True
+        )
+
     # 积分奖励处理器
     def _handle_add_score(self, message: UserMessage, score_type: str) -> BotResponse:
         """处理添加积分"""
@@ -704,6 +811,11 @@ class MessageProcessor:
 8 - 记录单数值，移动一个标记
 替换永久棋子 - 主动结束轮次
 查看当前进度 - 查看游戏状态
+掷骰风险 - 查看继续掷骰的爆掉概率
+掷骰风险6,7,8 - 查询任意1-3列的爆掉概率
+策略建议 - 查看最优推进方式和停手时机
+使用后悔券 - 撤销本次掷骰并重新掷骰（移动标记前）
+重试回合 - 回到本轮开始（需要重试回合效果）
 打卡完毕 - 恢复游戏功能
 
 💰 积分奖励
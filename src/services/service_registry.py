@@ -0,0 +1,183 @@
+"""
+服务注册表 - 进程内共享的惰性单例
+
+机器人、GUI、命令行和游戏引擎内部都需要游戏服务。各处各自 GameService()
+会重复创建 GameEngine、重复加载陷阱/遭遇配置，内存中的 players/game_sessions
+也会彼此分叉。注册表保证同一进程内只有一个引擎、一个数据库管理器和一个内容包，
+并提供显式的关闭流程。
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 内置服务名
+SERVICE_CONTENT_PACK = "content_pack"
+SERVICE_CONFIG = "config"
+SERVICE_DATABASE = "database"
+SERVICE_GAME_ENGINE = "game_engine"
+SERVICE_GAME_SERVICE = "game_service"
+
+
+class ServiceRegistry:
+    """惰性单例注册表"""
+
+    def __init__(self):
+        self._factories: Dict[str, Tuple[Callable[["ServiceRegistry"], Any], Optional[Callable[[Any], None]]]] = {}
+        self._instances: Dict[str, Any] = {}
+        # 创建顺序，关闭时逆序执行
+        self._order: List[str] = []
+        self._init_ms: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[["ServiceRegistry"], Any],
+                 shutdown: Optional[Callable[[Any], None]] = None, replace: bool = False):
+        """
+        注册服务工厂
+
+        Args:
+            name: 服务名
+            factory: 工厂函数，接收注册表本身以获取依赖
+            shutdown: 关闭时调用的清理函数
+            replace: 是否覆盖已注册的工厂（已创建的实例不受影响）
+        """
+        with self._lock:
+            if name in self._factories and not replace:
+                raise ValueError(f"服务已注册: {name}")
+            self._factories[name] = (factory, shutdown)
+
+    def provide(self, name: str, instance: Any):
+        """直接提供已创建的实例（用于测试或外部注入）"""
+        with self._lock:
+            if name not in self._instances:
+                self._order.append(name)
+            self._instances[name] = instance
+
+    def get(self, name: str) -> Any:
+        """获取服务实例，首次访问时创建"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            # 加锁后再检查一次，避免并发重复创建
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(f"未注册的服务: {name}")
+
+            factory, _ = self._factories[name]
+            start = time.perf_counter()
+            instance = factory(self)
+            self._init_ms[name] = (time.perf_counter() - start) * 1000
+            self._instances[name] = instance
+            self._order.append(name)
+            return instance
+
+    def is_initialized(self, name: str) -> bool:
+        """服务是否已创建"""
+        return name in self._instances
+
+    def shutdown(self):
+        """按创建顺序的逆序关闭所有服务并清空实例（工厂保留，可再次获取）"""
+        with self._lock:
+            for name in reversed(self._order):
+                instance = self._instances.get(name)
+                _, shutdown = self._factories.get(name, (None, None))
+                if instance is not None and shutdown is not None:
+                    try:
+                        shutdown(instance)
+                    except Exception as e:
+                        print(f"警告：关闭服务 {name} 失败: {e}")
+            self._instances.clear()
+            self._order.clear()
+            self._init_ms.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """各服务的初始化耗时（毫秒），按创建顺序"""
+        return {name: self._init_ms.get(name, 0.0) for name in self._order}
+
+    def format_stats(self) -> str:
+        """格式化初始化统计"""
+        if not self._order:
+            return "服务注册表: 尚未初始化任何服务"
+        parts = [f"{name} {ms:.1f}ms" for name, ms in self.get_stats().items()]
+        return "服务注册表: " + "，".join(parts)
+
+
+def _create_content_pack(registry: ServiceRegistry):
+    from ..core.content_pack import get_content_pack
+    return get_content_pack()
+
+
+def _create_config(registry: ServiceRegistry):
+    from ..config.config_manager import get_config_manager
+    return get_config_manager()
+
+
+def _shutdown_config(config_manager):
+    config_manager.stop_watching()
+    config_manager.flush()
+
+
+def _create_database(registry: ServiceRegistry):
+    from ..database.database import get_db_manager
+    return get_db_manager()
+
+
+def _shutdown_database(db_manager):
+    db_manager.engine.dispose()
+
+
+def _create_game_engine(registry: ServiceRegistry):
+    from ..core.game_engine import GameEngine
+    # 引擎依赖内容包和配置，先确保它们已加载
+    registry.get(SERVICE_CONTENT_PACK)
+    registry.get(SERVICE_CONFIG)
+    return GameEngine()
+
+
+def _create_game_service(registry: ServiceRegistry):
+    from .game_service import GameService
+    return GameService(engine=registry.get(SERVICE_GAME_ENGINE), db=registry.get(SERVICE_DATABASE))
+
+
+def _register_defaults(registry: ServiceRegistry):
+    registry.register(SERVICE_CONTENT_PACK, _create_content_pack)
+    registry.register(SERVICE_CONFIG, _create_config, _shutdown_config)
+    registry.register(SERVICE_DATABASE, _create_database, _shutdown_database)
+    registry.register(SERVICE_GAME_ENGINE, _create_game_engine)
+    registry.register(SERVICE_GAME_SERVICE, _create_game_service)
+
+
+# 全局实例
+_service_registry: Optional[ServiceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_service_registry() -> ServiceRegistry:
+    """获取全局服务注册表"""
+    global _service_registry
+    if _service_registry is None:
+        with _registry_lock:
+            if _service_registry is None:
+                registry = ServiceRegistry()
+                _register_defaults(registry)
+                _service_registry = registry
+    return _service_registry
+
+
+def get_game_service():
+    """获取共享的游戏服务"""
+    return get_service_registry().get(SERVICE_GAME_SERVICE)
+
+
+def get_game_engine():
+    """获取共享的游戏引擎"""
+    return get_service_registry().get(SERVICE_GAME_ENGINE)
+
+
+def shutdown_services():
+    """关闭所有已创建的服务（进程退出或重新初始化前调用）"""
+    if _service_registry is not None:
+        _service_registry.shutdown()
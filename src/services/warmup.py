@@ -0,0 +1,82 @@
+"""
+启动预热 - 机器人开始监听前初始化共享服务和只读缓存
+
+重启后第一条指令会冷启动：创建服务、构建内容注册表、加载掷骰风险表、
+建立数据库连接。预热阶段在 WebSocket/HTTP 监听之前一次性完成这些工作。
+
+玩家和会话不预加载：指令处理总是从数据库读取玩家和活跃会话（数据库是唯一可信来源，
+批量加分、GM 修改等路径直接写库），预加载的工作集条目不会被读取。
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from .service_registry import (
+    ServiceRegistry, get_service_registry,
+    SERVICE_CONTENT_PACK, SERVICE_CONFIG, SERVICE_DATABASE, SERVICE_GAME_ENGINE, SERVICE_GAME_SERVICE
+)
+
+
+@dataclass
+class WarmupReport:
+    """预热结果"""
+    duration_ms: float = 0.0
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def format(self) -> str:
+        """格式化预热报告"""
+        if self.error:
+            return f"缓存预热失败（{self.duration_ms:.1f} ms）: {self.error}"
+        stages = "，".join(f"{name} {ms:.1f}ms" for name, ms in self.stages.items())
+        return f"缓存预热完成: {self.duration_ms:.1f} ms\n阶段耗时: {stages}"
+
+
+def _open_connection(db):
+    """建立一次数据库连接（放入连接池供首条指令复用）"""
+    from sqlalchemy import text
+    with db.get_session() as session:
+        session.execute(text("SELECT 1"))
+
+
+def warm_up(registry: Optional[ServiceRegistry] = None) -> WarmupReport:
+    """
+    执行启动预热
+
+    预热失败不影响启动：各缓存仍会在首次使用时按需加载。
+
+    Args:
+        registry: 服务注册表，默认使用全局实例
+
+    Returns:
+        预热报告
+    """
+    registry = registry or get_service_registry()
+    report = WarmupReport()
+    start = time.perf_counter()
+
+    def stage(name: str, func):
+        stage_start = time.perf_counter()
+        result = func()
+        report.stages[name] = (time.perf_counter() - stage_start) * 1000
+        return result
+
+    try:
+        stage("内容包", lambda: registry.get(SERVICE_CONTENT_PACK))
+        stage("配置", lambda: registry.get(SERVICE_CONFIG))
+        db = stage("数据库", lambda: registry.get(SERVICE_DATABASE))
+        stage("数据库连接", lambda: _open_connection(db))
+        stage("游戏引擎", lambda: registry.get(SERVICE_GAME_ENGINE))
+        stage("游戏服务", lambda: registry.get(SERVICE_GAME_SERVICE))
+
+        from ..core.content_registry import get_content_registry
+        stage("内容注册表", get_content_registry)
+
+        from ..core.bust_probability import get_bust_table
+        stage("掷骰风险表", get_bust_table)
+    except Exception as e:
+        report.error = str(e)
+
+    report.duration_ms = (time.perf_counter() - start) * 1000
+    return report
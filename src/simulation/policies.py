@@ -0,0 +1,182 @@
+"""
+模拟玩家策略
+
+策略只做决定：每次掷骰后从合法移动中选一个、每次移动后决定是否停手、
+遭遇事件中选哪个选项。规则由 GameEngine 执行，策略不修改游戏状态。
+
+策略规格字符串（命令行使用）:
+    greedy          永不主动停手，只靠登顶确认保住进度
+    risk:0.3        爆掉概率超过阈值时停手（默认 0.3）
+    random:0.25     随机合法移动，每次移动后以给定概率停手（默认 0.25）
+    optimal         三个标记放满后按停手策略表选择推进方式和停手时机（需先生成策略表）
+"""
+
+import random
+from typing import Dict, List, Optional, Type
+
+from ..core.bust_probability import advancing_columns, get_bust_table
+from ..core.turn_policy import DEFAULT_TABLE_PATH, get_turn_policy_table, turn_state
+from ..models.game_models import GameSession, Player, get_column_length
+
+
+class Policy:
+    """策略基类"""
+
+    name = "base"
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    @property
+    def label(self) -> str:
+        """统计输出中使用的名称"""
+        return self.name
+
+    def choose_move(self, player: Player, session: GameSession, moves: List[List[int]]) -> List[int]:
+        """从合法移动中选择一个（moves 非空）"""
+        return max(moves, key=lambda move: move_value(player, session, move))
+
+    def should_stop(self, player: Player, session: GameSession) -> bool:
+        """移动后是否主动结束轮次"""
+        return False
+
+    def choose_encounter(self, choices: List[str]) -> str:
+        """选择遭遇选项（choices 非空）"""
+        return self.rng.choice(choices)
+
+
+def move_value(player: Player, session: GameSession, move: List[int]) -> float:
+    """
+    移动的启发式价值
+
+    按列长度折算推进格数（短列的一格更值钱），登顶额外加分，
+    新放下的标记扣分（标记放满后爆掉风险陡增）。
+    """
+    value = 0.0
+    steps: Dict[int, int] = {}
+    for column in move:
+        steps[column] = steps.get(column, 0) + 1
+
+    for column, count in steps.items():
+        length = get_column_length(column)
+        marker = session.get_temporary_marker(column)
+        position = player.progress.get_progress(column) + (marker.position if marker else 0)
+        gained = min(count, length - position)
+        value += gained / length
+        if position + gained >= length:
+            value += 1.0
+        if marker is None:
+            value -= 0.3
+    return value
+
+
+def bust_probability(player: Player, session: GameSession) -> float:
+    """下一次掷骰的爆掉概率（标记未放满时为 0）"""
+    if len(session.temporary_markers) < 3:
+        return 0.0
+    columns = advancing_columns(player.progress, session.temporary_markers)
+    if not columns:
+        return 1.0
+    return get_bust_table().bust_probability(columns)
+
+
+class GreedyPolicy(Policy):
+    """贪心：每次选价值最高的移动，从不主动停手"""
+
+    name = "greedy"
+
+
+class RiskThresholdPolicy(Policy):
+    """风险阈值：爆掉概率超过阈值时停手"""
+
+    name = "risk"
+
+    def __init__(self, rng: random.Random, threshold: float = 0.3):
+        super().__init__(rng)
+        self.threshold = threshold
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.threshold:g}"
+
+    def should_stop(self, player: Player, session: GameSession) -> bool:
+        return bust_probability(player, session) > self.threshold
+
+
+class RandomPolicy(Policy):
+    """随机：随机合法移动，每次移动后以固定概率停手"""
+
+    name = "random"
+
+    def __init__(self, rng: random.Random, stop_probability: float = 0.25):
+        super().__init__(rng)
+        self.stop_probability = stop_probability
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.stop_probability:g}"
+
+    def choose_move(self, player: Player, session: GameSession, moves: List[List[int]]) -> List[int]:
+        return self.rng.choice(moves)
+
+    def should_stop(self, player: Player, session: GameSession) -> bool:
+        return self.rng.random() < self.stop_probability
+
+
+class OptimalPolicy(Policy):
+    """最优停止：三个标记放满后按停手策略表决策，之前按启发式选择"""
+
+    name = "optimal"
+
+    def __init__(self, rng: random.Random):
+        super().__init__(rng)
+        self.table = get_turn_policy_table()
+        if self.table is None:
+            raise ValueError(f"停手策略表不存在: {DEFAULT_TABLE_PATH}（运行 python -m src.core.turn_policy 生成）")
+
+    def choose_move(self, player: Player, session: GameSession, moves: List[List[int]]) -> List[int]:
+        state = turn_state(player.progress, session.temporary_markers)
+        if state is not None:
+            ranked = self.table.rank_moves(*state, moves)
+            if ranked:
+                return ranked[0][0]
+        return super().choose_move(player, session, moves)
+
+    def should_stop(self, player: Player, session: GameSession) -> bool:
+        state = turn_state(player.progress, session.temporary_markers)
+        return state is not None and self.table.continue_value(*state) is None
+
+
+POLICIES: Dict[str, Type[Policy]] = {
+    GreedyPolicy.name: GreedyPolicy,
+    RiskThresholdPolicy.name: RiskThresholdPolicy,
+    RandomPolicy.name: RandomPolicy,
+    OptimalPolicy.name: OptimalPolicy,
+}
+
+
+def create_policy(spec: str, rng: Optional[random.Random] = None) -> Policy:
+    """
+    根据规格字符串创建策略
+
+    Args:
+        spec: 如 "greedy"、"risk:0.3"、"random:0.25"
+        rng: 策略使用的随机数生成器
+
+    Raises:
+        ValueError: 未知策略或参数无效
+    """
+    name, _, param = spec.partition(":")
+    policy_cls = POLICIES.get(name)
+    if policy_cls is None:
+        raise ValueError(f"未知策略: {name}（可选: {', '.join(POLICIES)}）")
+
+    rng = rng or random.Random()
+    if not param:
+        return policy_cls(rng)
+    if policy_cls in (GreedyPolicy, OptimalPolicy):
+        raise ValueError(f"策略 {name} 不接受参数: {spec}")
+    try:
+        return policy_cls(rng, float(param))
+    except ValueError:
+        raise ValueError(f"无效的策略参数: {spec}")
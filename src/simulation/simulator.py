@@ -0,0 +1,551 @@
+"""
+无界面对局模拟器 - 不经过数据库和机器人，直接驱动 GameEngine 做数值平衡测试
+
+调整陷阱布局（config/trap_config.json）、掷骰消耗和奖励时，用模拟代替真人试玩：
+每个策略按固定种子跑若干局单人对局，统计每个策略（获胜轮数、爆掉率、积分流向）、
+每一列（推进格数、登顶、爆掉损失）和每个陷阱/遭遇（触发次数、积分变化、进度损失），
+结果写入 CSV 或 Parquet。
+
+对局按块分发到 ProcessPoolExecutor，每块用由 (种子, 策略, 块序号) 派生的种子重新播种，
+结果与进程数无关。骰子由按块预生成的 DiceStream 提供（安装 NumPy 时向量化生成），
+每次掷骰先用位掩码判定是否爆掉，只有不爆时才逐个检查合法移动。
+
+与真实对局的差异:
+- 爆掉时按"进度回退"处理：清空临时标记并开始下一轮
+- 遭遇选项由策略选择并经效果处理器执行；需要玩家后续输入的陷阱
+  （河..土地神、花言巧语）只统计触发，不执行后续选择
+- 工作进程使用内存数据库，效果处理器中访问数据库的效果不会写入真实数据
+
+用法:
+    python -m src.simulation.simulator --games 2000 --policies greedy,risk:0.3,random --workers 4
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.batch_dice import DiceStream, is_bust
+from ..core.game_engine import GameEngine
+from ..models.game_models import DiceRoll, EventType, Faction, GameSession, MapEvent, Player, TurnState
+from .policies import Policy, create_policy
+
+DEFAULT_START_SCORE = 1_000_000
+DEFAULT_MAX_TURNS = 500
+DEFAULT_CHUNK_GAMES = 100
+OUTPUT_FORMATS = ("csv", "parquet")
+
+
+@dataclass
+class SimulationStats:
+    """可合并的模拟统计（各工作进程分别统计，主进程合并）"""
+    policies: Dict[str, Counter] = field(default_factory=dict)
+    turns_to_win: Dict[str, Counter] = field(default_factory=dict)       # 策略 -> {轮数: 局数}
+    columns: Dict[Tuple[str, int], Counter] = field(default_factory=dict)
+    events: Dict[Tuple[str, str, str], Counter] = field(default_factory=dict)  # (策略, 类型, 名称)
+
+    def policy(self, label: str) -> Counter:
+        return self.policies.setdefault(label, Counter())
+
+    def column(self, label: str, column: int) -> Counter:
+        return self.columns.setdefault((label, column), Counter())
+
+    def event(self, label: str, event: MapEvent) -> Counter:
+        return self.events.setdefault((label, event.event_type.value, event.name), Counter())
+
+    def merge(self, other: "SimulationStats"):
+        """合并另一份统计"""
+        for target, source in ((self.policies, other.policies), (self.turns_to_win, other.turns_to_win),
+                               (self.columns, other.columns), (self.events, other.events)):
+            for key, counter in source.items():
+                target.setdefault(key, Counter()).update(counter)
+
+    def policy_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for label, c in sorted(self.policies.items()):
+            games = c["games"] or 1
+            turns = c["turns"] or 1
+            wins = self.turns_to_win.get(label, Counter())
+            rows.append({
+                "policy": label,
+                "games": c["games"],
+                "wins": c["wins"],
+                "win_rate": round(c["wins"] / games, 4),
+                "avg_turns_to_win": round(sum(t * n for t, n in wins.items()) / c["wins"], 2) if c["wins"] else None,
+                "median_turns_to_win": _percentile(wins, 0.5),
+                "p90_turns_to_win": _percentile(wins, 0.9),
+                "turns": c["turns"],
+                "rolls": c["rolls"],
+                "rolls_per_turn": round(c["rolls"] / turns, 3),
+                "busts": c["busts"],
+                "bust_rate": round(c["busts"] / turns, 4),
+                "skipped_turns": c["skipped_turns"],
+                "capped_games": c["capped"],
+                "broke_games": c["broke"],
+                "dice_spent_per_game": round(c["dice_spent"] / games, 2),
+                "event_score_per_game": round(c["event_score"] / games, 2),
+                "summit_score_per_game": round(c["summit_score"] / games, 2),
+                "net_score_per_game": round((c["event_score"] + c["summit_score"] - c["dice_spent"]) / games, 2),
+            })
+        return rows
+
+    def column_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for (label, column), c in sorted(self.columns.items()):
+            games = self.policies.get(label, Counter())["games"] or 1
+            rows.append({
+                "policy": label,
+                "column": column,
+                "markers_placed": c["markers"],
+                "steps": c["steps"],
+                "lost_steps": c["lost_steps"],
+                "completions": c["completions"],
+                "completion_rate": round(c["completions"] / games, 4),
+            })
+        return rows
+
+    def event_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for (label, event_type, name), c in sorted(self.events.items()):
+            triggers = c["triggers"] or 1
+            rows.append({
+                "policy": label,
+                "event_type": event_type,
+                "name": name,
+                "triggers": c["triggers"],
+                "score_delta": c["score_delta"],
+                "avg_score_delta": round(c["score_delta"] / triggers, 2),
+                "progress_delta": c["progress_delta"],
+                "turns_ended": c["turns_ended"],
+                "effect_errors": c["effect_errors"],
+            })
+        return rows
+
+
+def _percentile(histogram: Counter, q: float) -> Optional[int]:
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = q * total
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= threshold:
+            return value
+    return None
+
+
+class GameSimulator:
+    """在一个 GameEngine 上逐局模拟（每个工作进程一个实例）"""
+
+    def __init__(self, engine: Optional[GameEngine] = None,
+                 start_score: int = DEFAULT_START_SCORE, max_turns: int = DEFAULT_MAX_TURNS):
+        self.engine = engine if engine is not None else GameEngine()
+        # 模拟使用固定布局，每局开始时重建事件，不在每次移动前重读配置
+        self.engine.reload_events_on_move = False
+        self.dice = DiceStream()
+        self.engine.dice_source = self.dice
+        # 单人模拟，"花言巧语"没有可选择的其他玩家
+        self.engine.set_player_directory(lambda: (True, []))
+        self.start_score = start_score
+        self.max_turns = max_turns
+        self._untriggered: List[MapEvent] = []
+
+    def play_game(self, policy: Policy, player_id: str, stats: SimulationStats):
+        """模拟一局单人对局，直到获胜、积分耗尽或达到轮数上限"""
+        engine = self.engine
+        engine.update_map_events_from_config()
+        self._untriggered = [event for events in engine.map_events.values() for event in events]
+
+        player = engine.create_player(player_id, player_id, Faction.ADOPTER)
+        player.current_score = self.start_score
+        session = engine.create_game_session(player_id)
+
+        counter = stats.policy(policy.label)
+        counter["games"] += 1
+        turns = 0
+        try:
+            while True:
+                if turns >= self.max_turns:
+                    counter["capped"] += 1
+                    break
+                turns += 1
+                outcome = self._play_turn(policy, player, session, stats)
+                if outcome == "win":
+                    counter["wins"] += 1
+                    stats.turns_to_win.setdefault(policy.label, Counter())[turns] += 1
+                    break
+                if outcome == "broke":
+                    counter["broke"] += 1
+                    break
+                if outcome == "skip":
+                    # 陷阱导致停止一回合
+                    turns += 1
+                    counter["skipped_turns"] += 1
+            counter["turns"] += turns
+        finally:
+            self._forget(player_id, session.session_id)
+
+    def _play_turn(self, policy: Policy, player: Player, session: GameSession, stats: SimulationStats) -> str:
+        """模拟一轮，返回 win / bust / stop / skip / broke"""
+        engine = self.engine
+        session_id = session.session_id
+        label = policy.label
+        counter = stats.policy(label)
+
+        while True:
+            score = player.current_score
+            try:
+                dice = engine.roll_dice(session_id)
+            except ValueError as e:
+                if "积分不足" in str(e):
+                    return "broke"
+                # 效果把轮次推进到了无法掷骰的状态
+                self._end_turn(session_id)
+                return "skip"
+            counter["rolls"] += 1
+            counter["dice_spent"] += score - player.current_score
+
+            if is_bust(dice.results, player.progress, session.temporary_markers):
+                moves = []
+            else:
+                moves = self._legal_moves(session_id, dice)
+            if not moves:
+                # 爆掉：本轮临时进度全部丢失
+                counter["busts"] += 1
+                for marker in session.temporary_markers:
+                    stats.column(label, marker.column)["lost_steps"] += marker.position
+                session.clear_temporary_markers()
+                engine.complete_checkin(session_id)
+                return "bust"
+
+            move = policy.choose_move(player, session, moves)
+            for column in set(move):
+                if session.get_temporary_marker(column) is None:
+                    stats.column(label, column)["markers"] += 1
+
+            score = player.current_score
+            expected_total = _board_total(player, session) + len(move)
+            engine.move_markers(session_id, move)
+            for column in move:
+                stats.column(label, column)["steps"] += 1
+            self._record_events(policy, player, session, stats, score, expected_total)
+
+            if session.turn_state == TurnState.WAITING_FOR_SUMMIT_CONFIRMATION:
+                for column in list(session.pending_summit_columns):
+                    score = player.current_score
+                    engine.confirm_summit(session_id, column)
+                    stats.column(label, column)["completions"] += 1
+                    counter["summit_score"] += player.current_score - score
+
+            if player.progress.is_winner():
+                engine.end_turn_actively(session_id)
+                return "win"
+
+            if session.turn_state == TurnState.ENDED:
+                # 小小火球术等陷阱结束本轮
+                self._end_turn(session_id)
+                return "win" if player.progress.is_winner() else "skip"
+
+            if policy.should_stop(player, session):
+                self._end_turn(session_id)
+                return "win" if player.progress.is_winner() else "stop"
+
+    def _legal_moves(self, session_id: str, dice: DiceRoll) -> List[List[int]]:
+        """当前骰子的所有合法移动（双数值或单个数值）"""
+        moves = []
+        seen = set()
+        for first, second in dice.get_possible_combinations():
+            for move in ([first, second], [first], [second]):
+                key = tuple(move)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if self.engine.can_move_markers(session_id, move)[0]:
+                    moves.append(move)
+        return moves
+
+    def _record_events(self, policy: Policy, player: Player, session: GameSession,
+                       stats: SimulationStats, score_before: int, expected_total: int):
+        """统计本次移动触发的事件，并按策略处理遭遇选择"""
+        triggered = [event for event in self._untriggered if event.is_triggered]
+        if not triggered:
+            return
+        self._untriggered = [event for event in self._untriggered if not event.is_triggered]
+
+        effect_errors = 0
+        if any(event.event_type == EventType.ENCOUNTER for event in triggered):
+            effect_errors = self._resolve_encounter(policy, player, session)
+
+        # 同一次移动触发多个事件时，积分/进度变化计入每个事件
+        score_delta = player.current_score - score_before
+        progress_delta = _board_total(player, session) - expected_total
+        for event in triggered:
+            counter = stats.event(policy.label, event)
+            counter["triggers"] += 1
+            counter["score_delta"] += score_delta
+            counter["progress_delta"] += progress_delta
+            counter["effect_errors"] += effect_errors
+            if session.turn_state == TurnState.ENDED:
+                counter["turns_ended"] += 1
+        stats.policy(policy.label)["event_score"] += score_delta
+
+    def _resolve_encounter(self, policy: Policy, player: Player, session: GameSession) -> int:
+        """按策略选择遭遇选项并执行效果，返回执行出错的次数"""
+        from ..core.encounter_system import get_encounter_manager
+        from ..core.effect_handler import get_effect_handler
+
+        encounter_mgr = get_encounter_manager()
+        pending = encounter_mgr.pending_encounters.get(player.player_id)
+        if pending is None or not pending.encounter_data.choices:
+            return 0
+
+        choice = policy.choose_encounter([c.name for c in pending.encounter_data.choices])
+        success, _, result = encounter_mgr.process_choice(player.player_id, choice)
+        # 不等待后续口令
+        encounter_mgr.pending_encounters.pop(player.player_id, None)
+        if not success:
+            return 0
+
+        cost = result.get("cost", 0)
+        if cost > 0 and not player.spend_score(cost, "遭遇消耗"):
+            return 0
+        cost_item = result.get("cost_item")
+        if cost_item and not player.use_item(cost_item):
+            return 0
+
+        game_effect = result.get("game_effect")
+        if not game_effect:
+            return 0
+        try:
+            get_effect_handler().apply_effect(player.player_id, game_effect, self.engine, session.turn_number)
+        except Exception:
+            return 1
+        return 0
+
+    def _end_turn(self, session_id: str):
+        """主动结束轮次（保存临时进度）并完成打卡"""
+        self.engine.end_turn_actively(session_id)
+        if self.engine.get_game_session(session_id).turn_state == TurnState.WAITING_FOR_CHECKIN:
+            self.engine.complete_checkin(session_id)
+
+    def _forget(self, player_id: str, session_id: str):
+        """清理一局结束后的玩家状态，避免长时间模拟时全局状态增长"""
+        from ..core.encounter_system import get_encounter_manager
+        from ..core.effect_handler import get_effect_handler
+        from ..core.item_system import get_buff_manager
+
+        self.engine.game_sessions.pop(session_id, None)
+        self.engine.players.pop(player_id, None)
+
+        effect_handler = get_effect_handler()
+        effect_handler.delayed_effects.pop(player_id, None)
+        effect_handler.active_buffs.pop(player_id, None)
+        effect_handler.player_unlocked_commands.pop(player_id, None)
+        get_buff_manager().buffs.pop(player_id, None)
+        encounter_mgr = get_encounter_manager()
+        encounter_mgr.pending_encounters.pop(player_id, None)
+        encounter_mgr.player_choices.pop(player_id, None)
+
+
+def _board_total(player: Player, session: GameSession) -> int:
+    """永久进度与临时标记的总格数"""
+    total = sum(player.progress.permanent_progress.values())
+    return total + sum(marker.position for marker in session.temporary_markers)
+
+
+# ==================== 并行执行 ====================
+
+@dataclass
+class SimulationTask:
+    """一块对局"""
+    policy: str
+    seed: int
+    games: int
+    index: int
+    start_score: int = DEFAULT_START_SCORE
+    max_turns: int = DEFAULT_MAX_TURNS
+
+
+_worker_simulator: Optional[GameSimulator] = None
+
+
+def _use_memory_database():
+    """把全局数据库管理器替换为内存数据库，效果处理器的数据库访问不会影响真实数据"""
+    try:
+        from ..database import database
+    except ImportError:
+        # 未安装数据库依赖时，访问数据库的效果在执行时失败并计入 effect_errors
+        return
+    database.db_manager = database.DatabaseManager("sqlite://")
+    database.db_manager.create_tables()
+
+
+def _init_worker(trap_config: Optional[str] = None):
+    """工作进程初始化：内存数据库 + 独立的引擎"""
+    global _worker_simulator
+    _use_memory_database()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        engine = GameEngine()
+        if trap_config:
+            from ..core.trap_config import TrapConfigManager
+            engine.trap_config = TrapConfigManager(trap_config)
+    _worker_simulator = GameSimulator(engine)
+
+
+def _run_task(task: SimulationTask) -> SimulationStats:
+    """在工作进程中模拟一块对局"""
+    simulator = _worker_simulator
+    simulator.start_score = task.start_score
+    simulator.max_turns = task.max_turns
+
+    random.seed(task.seed)
+    simulator.dice.reseed(task.seed + 2)
+    policy = create_policy(task.policy, random.Random(task.seed + 1))
+    stats = SimulationStats()
+    # 引擎会打印登顶提示等交互信息，模拟时丢弃
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for game in range(task.games):
+            simulator.play_game(policy, f"sim-{task.index}-{game}", stats)
+    return stats
+
+
+def _task_seed(seed: int, policy: str, index: int) -> int:
+    return random.Random(f"{seed}:{policy}:{index}").getrandbits(63)
+
+
+def run_simulation(policies: List[str], games: int, seed: int = 0, workers: int = 1,
+                   start_score: int = DEFAULT_START_SCORE, max_turns: int = DEFAULT_MAX_TURNS,
+                   chunk_games: int = DEFAULT_CHUNK_GAMES, trap_config: Optional[str] = None) -> SimulationStats:
+    """
+    运行模拟
+
+    Args:
+        policies: 策略规格列表，如 ["greedy", "risk:0.3"]
+        games: 每个策略的对局数
+        seed: 基础种子，相同参数的结果可复现
+        workers: 进程数；1 表示在当前进程内运行（会替换当前进程的全局数据库管理器）
+        start_score: 初始积分
+        max_turns: 每局轮数上限
+        chunk_games: 每个任务块的对局数
+        trap_config: 替代的陷阱配置文件
+
+    Returns:
+        合并后的统计
+    """
+    for spec in policies:
+        create_policy(spec)  # 提前校验策略规格
+
+    tasks = []
+    for spec in policies:
+        for index, first in enumerate(range(0, games, chunk_games)):
+            tasks.append(SimulationTask(spec, _task_seed(seed, spec, index), min(chunk_games, games - first),
+                                        index, start_score, max_turns))
+
+    stats = SimulationStats()
+    if workers <= 1:
+        _init_worker(trap_config)
+        for task in tasks:
+            stats.merge(_run_task(task))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(trap_config,)) as pool:
+        for partial in pool.map(_run_task, tasks):
+            stats.merge(partial)
+    return stats
+
+
+# ==================== 输出 ====================
+
+def _write_csv(rows: List[Dict[str, Any]], path: str):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if not rows:
+            return
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("写入 Parquet 需要安装 pyarrow（pip install pyarrow），或使用 --format csv")
+    return pyarrow, pyarrow.parquet
+
+
+def _write_parquet(rows: List[Dict[str, Any]], path: str):
+    pa, pq = _require_pyarrow()
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def write_results(stats: SimulationStats, out_dir: str, fmt: str = "csv") -> List[str]:
+    """把策略/列/事件统计分别写入 out_dir，返回写入的文件路径"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    writer = _write_csv if fmt == "csv" else _write_parquet
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, rows in (("policy_stats", stats.policy_rows()),
+                       ("column_stats", stats.column_rows()),
+                       ("event_stats", stats.event_rows())):
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        writer(rows, path)
+        paths.append(path)
+    return paths
+
+
+def format_summary(stats: SimulationStats) -> str:
+    """格式化策略统计摘要"""
+    lines = [f"{'策略':<14} {'局数':>7} {'胜率':>7} {'获胜轮数(中位)':>14} {'爆掉率':>7} {'每轮掷骰':>8} {'净积分/局':>10}"]
+    for row in stats.policy_rows():
+        median = row["median_turns_to_win"] if row["median_turns_to_win"] is not None else "-"
+        lines.append(f"{row['policy']:<14} {row['games']:>7} {row['win_rate']:>7.1%} {median:>14} "
+                     f"{row['bust_rate']:>7.1%} {row['rolls_per_turn']:>8.2f} {row['net_score_per_game']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面对局模拟器")
+    parser.add_argument("--games", type=int, default=1000, help="每个策略的对局数")
+    parser.add_argument("--policies", default="greedy,risk:0.3,random", help="逗号分隔的策略规格")
+    parser.add_argument("--seed", type=int, default=0, help="基础随机种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数")
+    parser.add_argument("--start-score", type=int, default=DEFAULT_START_SCORE, help="初始积分")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="每局轮数上限")
+    parser.add_argument("--chunk-games", type=int, default=DEFAULT_CHUNK_GAMES, help="每个任务块的对局数")
+    parser.add_argument("--trap-config", help="替代的陷阱配置文件")
+    parser.add_argument("--out", default=os.path.join("cache", "simulation"), help="输出目录")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="输出格式")
+    args = parser.parse_args()
+
+    try:
+        if args.format == "parquet":
+            _require_pyarrow()
+        policies = [spec.strip() for spec in args.policies.split(",") if spec.strip()]
+        start = time.perf_counter()
+        stats = run_simulation(policies, args.games, args.seed, args.workers, args.start_score,
+                               args.max_turns, args.chunk_games, args.trap_config)
+        elapsed = time.perf_counter() - start
+    except (RuntimeError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    turns = sum(c["turns"] for c in stats.policies.values())
+    print(format_summary(stats))
+    print(f"\n共 {turns} 轮，用时 {elapsed:.1f} s（{turns / elapsed:.0f} 轮/秒，{args.workers} 进程）")
+    for path in write_results(stats, args.out, args.format):
+        print(f"已写入: {path}")
+
+
+if __name__ == "__main__":
+    main()
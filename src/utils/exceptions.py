@@ -423,8 +423,8 @@ class ErrorRecoveryStrategy:
         """处理会话错误"""
         # 尝试恢复或重建会话
         try:
-            from ..services.game_service import GameService
-            game_service = GameService()
+            from ..services.service_registry import get_game_service
+            game_service = get_game_service()
             # 清理无效会话并创建新会话
             return True
         except Exception:
@@ -0,0 +1,346 @@
+"""
+运行指标 - 延迟直方图、计数器和队列深度，以 Prometheus 文本格式导出
+
+记录的指标：
+    cantstop_command_duration_seconds   指令处理耗时（command=处理器, success, group=群号/private）
+    cantstop_service_call_duration_seconds  GameService 公共方法耗时（method, success）
+    cantstop_db_call_duration_seconds   DatabaseManager 公共方法耗时（method, success）
+    cantstop_send_duration_seconds      出站发送耗时（bot, target=group/private, success）
+    cantstop_messages_total             入站消息去向（outcome=handled/unmatched/duplicate/unregistered/no_session）
+    cantstop_queue_depth                各机器人循环的队列深度（queue，导出时读取）
+
+默认关闭（game_config 的 metrics.enabled）。关闭时各记录点只做一次布尔判断；
+GameService / DatabaseManager 的计时包装在第一次开启时才安装到类上，之前完全不经过包装。
+直方图按固定桶计数（不保留样本），内存只与标签组合数有关。
+"""
+
+import asyncio
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 桶上界（秒），覆盖从内存操作到限速后的发送
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 不计时的方法（返回上下文管理器等）
+_UNTIMED_METHODS = {"get_session"}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """按标签组合累加的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _label_text(self.labelnames, labels), value
+
+    def reset(self):
+        self.values.clear()
+
+
+class Histogram:
+    """固定桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，最后一格为 +Inf）, 总和, 次数]
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _label_text(self.labelnames, labels, f'le="{le}"'), cumulative
+            yield f"{self.name}_sum", _label_text(self.labelnames, labels), total
+            yield f"{self.name}_count", _label_text(self.labelnames, labels), count
+
+    def quantile(self, q: float, counts: List[int]) -> float:
+        """由桶计数估计分位数（桶内线性插值，落在 +Inf 桶时返回最大上界）"""
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative, lower = 0, 0.0
+        for bound, bucket_count in zip(self.buckets, counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return self.buckets[-1]
+
+    def reset(self):
+        self.series.clear()
+
+
+class MetricsRegistry:
+    """进程内的指标注册表"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = False
+        self._metrics: Dict[str, object] = {}
+        # 队列深度等导出时读取的指标：指标名 -> (帮助, 标签名, {来源: 回调})
+        self._gauges: Dict[str, Tuple[str, Tuple[str, ...], Dict[str, Callable[[], Dict[Tuple, float]]]]] = {}
+        self._instrumented = False
+
+        self.commands = self.histogram(
+            "cantstop_command_duration_seconds", "指令处理耗时", ("command", "success", "group"))
+        self.service_calls = self.histogram(
+            "cantstop_service_call_duration_seconds", "GameService 方法耗时", ("method", "success"))
+        self.db_calls = self.histogram(
+            "cantstop_db_call_duration_seconds", "DatabaseManager 方法耗时", ("method", "success"))
+        self.sends = self.histogram(
+            "cantstop_send_duration_seconds", "出站消息发送耗时", ("bot", "target", "success"))
+        self.messages = self.counter(
+            "cantstop_messages_total", "入站消息去向", ("outcome",))
+        if enabled:
+            self.enable()
+
+    # ==================== 注册 ====================
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, labelnames, buckets)
+        return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text, labelnames)
+        return self._metrics[name]
+
+    def register_gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...], source: str,
+                       func: Callable[[], Dict[Tuple, float]]):
+        """
+        注册导出时读取的指标（同一来源重复注册时替换）
+
+        Args:
+            source: 来源标识，例如机器人实例
+            func: 返回 {标签值元组: 数值} 的回调
+        """
+        gauge = self._gauges.setdefault(name, (help_text, labelnames, {}))
+        gauge[2][source] = func
+
+    # ==================== 开关 ====================
+
+    def enable(self):
+        """开启记录（首次开启时为 GameService / DatabaseManager 安装计时包装）"""
+        if not self._instrumented:
+            self._instrumented = True
+            _install_default_instrumentation(self)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """清空已记录的数据"""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    # ==================== 记录 ====================
+
+    def start(self) -> Optional[float]:
+        """开始计时，关闭时返回 None"""
+        return time.perf_counter() if self.enabled else None
+
+    def observe_since(self, histogram: Histogram, started: Optional[float], *labels):
+        """以 start() 的返回值结束计时（关闭时不记录）"""
+        if started is not None:
+            histogram.observe(time.perf_counter() - started, *labels)
+
+    def count_message(self, outcome: str):
+        if self.enabled:
+            self.messages.inc(outcome)
+
+    # ==================== 导出 ====================
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for name, (help_text, labelnames, sources) in self._gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for func in list(sources.values()):
+                try:
+                    values = func()
+                except Exception:
+                    continue
+                for labels, value in values.items():
+                    lines.append(f"{name}{_label_text(labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self, limit: int = 10) -> str:
+        """按指令汇总的文字报告（管理员指令用）"""
+        if not self.enabled and not self.commands.series:
+            return "指标记录未开启（admin_metrics on 开启）"
+
+        # 合并各群：指令 -> [桶计数, 总和, 次数, 失败次数]
+        merged: Dict[str, list] = {}
+        for (command, success, _), (counts, total, count) in self.commands.series.items():
+            entry = merged.setdefault(command, [[0] * len(counts), 0.0, 0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += count
+            if success != "true":
+                entry[3] += count
+
+        lines = [f"运行指标（{'记录中' if self.enabled else '已暂停'}）"]
+        if merged:
+            lines.append("指令: 次数 / 失败 / 平均 / p95 (ms)")
+            ranked = sorted(merged.items(), key=lambda item: item[1][1], reverse=True)
+            for command, (counts, total, count, failed) in ranked[:limit]:
+                p95 = self.commands.quantile(0.95, counts)
+                lines.append(f"  {command}: {count} / {failed} / {total / count * 1000:.1f} / {p95 * 1000:.1f}")
+        else:
+            lines.append("暂无指令记录")
+
+        outcomes = ", ".join(f"{labels[0]} {int(value)}" for labels, value in sorted(self.messages.values.items()))
+        if outcomes:
+            lines.append(f"消息: {outcomes}")
+        for name, (_, _, sources) in self._gauges.items():
+            depths = []
+            for func in list(sources.values()):
+                try:
+                    depths.extend(f"{'/'.join(map(str, k))} {int(v)}" for k, v in func().items())
+                except Exception:
+                    continue
+            if depths:
+                lines.append(f"队列: {', '.join(depths)}")
+        return "\n".join(lines)
+
+    def handle_admin_command(self, argument: str = "") -> str:
+        """管理员指令 admin_metrics [on|off|reset]，无参数时返回汇总"""
+        argument = argument.strip().lower()
+        if argument == "on":
+            self.enable()
+            return "[OK] 已开启指标记录"
+        if argument == "off":
+            self.disable()
+            return "[OK] 已暂停指标记录"
+        if argument == "reset":
+            self.reset()
+            return "[OK] 已清空指标数据"
+        return self.format_summary()
+
+
+# ==================== 计时包装 ====================
+
+def _call_succeeded(result) -> bool:
+    """从返回值判断调用是否成功：(bool, ...) 取首项，False 视为失败"""
+    if isinstance(result, tuple) and result and isinstance(result[0], bool):
+        return result[0]
+    return result is not False
+
+
+def _timed_method(registry: MetricsRegistry, histogram: Histogram, name: str, func: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return await func(*args, **kwargs)
+            started = time.perf_counter()
+            success = "false"
+            try:
+                result = await func(*args, **kwargs)
+                success = "true" if _call_succeeded(result) else "false"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - started, name, success)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        success = "false"
+        try:
+            result = func(*args, **kwargs)
+            success = "true" if _call_succeeded(result) else "false"
+            return result
+        finally:
+            histogram.observe(time.perf_counter() - started, name, success)
+    return wrapper
+
+
+def instrument_methods(cls, registry: MetricsRegistry, histogram: Histogram):
+    """为类上直接定义的公共方法安装计时包装（method 标签为方法名）"""
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or name in _UNTIMED_METHODS or not inspect.isfunction(value):
+            continue
+        if getattr(value, "__metrics_wrapped__", False):
+            continue
+        wrapper = _timed_method(registry, histogram, name, value)
+        wrapper.__metrics_wrapped__ = True
+        setattr(cls, name, wrapper)
+
+
+def _install_default_instrumentation(registry: MetricsRegistry):
+    from ..database.database import DatabaseManager
+    from ..services.game_service import GameService
+
+    instrument_methods(GameService, registry, registry.service_calls)
+    instrument_methods(DatabaseManager, registry, registry.db_calls)
+
+
+# 全局实例
+_metrics: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取全局指标注册表（首次获取时按配置决定是否开启）"""
+    global _metrics
+    if _metrics is None:
+        from ..config.config_manager import get_config
+        _metrics = MetricsRegistry(enabled=bool(get_config("game_config", "metrics.enabled", False)))
+    return _metrics